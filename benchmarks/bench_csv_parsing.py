@@ -0,0 +1,103 @@
+"""Row-wise vs columnar parsing of the chocolate sales CSV.
+
+Replicates monitoring_agent/data/chocolate_sales.csv to --rows data rows in a
+temporary file, then times both loader parsers end to end (CSV text in, COPY
+payload out) without touching the database.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_csv_parsing --rows 10000000
+"""
+import argparse
+import csv
+import json
+import os
+import tempfile
+import time
+
+from monitoring_agent import load_sales_data
+
+
+class _NullRejects:
+    count = 0
+
+    def write(self, line_num, row, error):
+        self.count += 1
+
+
+def replicate_csv(source, rows, target):
+    with open(source, 'r', newline='') as f:
+        header = f.readline()
+        lines = f.readlines()
+    written = 0
+    with open(target, 'w', newline='') as out:
+        out.write(header)
+        while written < rows:
+            chunk = lines[: rows - written]
+            out.writelines(chunk)
+            written += len(chunk)
+    return written
+
+
+def run_rows(path, batch_size):
+    rejects = _NullRejects()
+    copied = payload = 0
+    with open(path, 'r', newline='') as f:
+        fieldnames = next(csv.reader(f))
+        reader = csv.DictReader(f, fieldnames=fieldnames)
+        for line in load_sales_data.iter_copy_lines(reader, rejects, line_offset=1):
+            copied += 1
+            payload += len(line)
+    return copied, payload, rejects.count
+
+
+def run_columnar(path, batch_size):
+    rejects = _NullRejects()
+    copied = payload = 0
+    with open(path, 'r', newline='') as f:
+        fieldnames = next(csv.reader(f))
+        for count, text in load_sales_data.iter_columnar_chunks(f, fieldnames, batch_size, rejects, 1):
+            copied += count
+            payload += len(text)
+    return copied, payload, rejects.count
+
+
+def _measure(func, path, batch_size):
+    started = time.perf_counter()
+    copied, payload, rejected = func(path, batch_size)
+    elapsed = time.perf_counter() - started
+    return {
+        "rows": copied,
+        "rejected": rejected,
+        "payload_bytes": payload,
+        "seconds": round(elapsed, 3),
+        "rows_per_second": round(copied / elapsed) if elapsed else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--batch-size", type=int, default=load_sales_data.BATCH_SIZE)
+    parser.add_argument("--source", default=load_sales_data.CSV_FILE)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "chocolate_sales_replicated.csv")
+        rows = replicate_csv(args.source, args.rows, path)
+        results = {
+            "rows": rows,
+            "file_bytes": os.path.getsize(path),
+            "batch_size": args.batch_size,
+            "rows_parser": _measure(run_rows, path, args.batch_size),
+            "columnar_parser": _measure(run_columnar, path, args.batch_size),
+        }
+    rows_rate = results["rows_parser"]["rows_per_second"]
+    columnar_rate = results["columnar_parser"]["rows_per_second"]
+    if rows_rate and columnar_rate:
+        results["speedup"] = round(columnar_rate / rows_rate, 2)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
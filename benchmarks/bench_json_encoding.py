@@ -0,0 +1,150 @@
+"""Encode time of a query result from fetched rows to response bytes.
+
+Builds --cells cells of synthetic chocolate_sales rows as psycopg2 returns
+them (Decimal amounts, date objects) plus a cursor description with the
+matching type OIDs, then times each pipeline per result_format:
+
+* before: per-cell isinstance conversion, then Flask's default JSON provider
+* after_stdlib / after_orjson: json_codec.row_converter built from the
+  description, then monitoring_api's FastJSONProvider on each backend
+
+Shaping (result_format) is timed separately; it is the same in every
+pipeline. No database needed.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_json_encoding --cells 100000
+"""
+import argparse
+import datetime
+import decimal
+import json
+import random
+import statistics
+import time
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from monitoring_api import json_codec, sales_analysis_tools
+from monitoring_api.app import FastJSONProvider
+
+# (name, type OID) as in cursor.description: int4, varchar x3, date, numeric, int4.
+DESCRIPTION = [
+    ("id", 23), ("sales_person", 1043), ("country", 1043), ("product", 1043),
+    ("date", 1082), ("amount", 1700), ("boxes_shipped", 23),
+]
+COLUMNS = [name for name, _ in DESCRIPTION]
+
+
+def fetched_rows(count, seed=7):
+    rng = random.Random(seed)
+    people = [f"Sales Person {i}" for i in range(25)]
+    countries = ["UK", "USA", "India", "Canada", "Australia", "New Zealand"]
+    products = [f"Chocolate Product {i}" for i in range(22)]
+    start = datetime.date(2022, 1, 1)
+    return [
+        (
+            i + 1,
+            rng.choice(people),
+            rng.choice(countries),
+            rng.choice(products),
+            start + datetime.timedelta(days=rng.randrange(730)),
+            decimal.Decimal(rng.randrange(100, 2_000_000)) / 100,
+            rng.randrange(1, 700),
+        )
+        for i in range(count)
+    ]
+
+
+def _isinstance_value(value):
+    # The per-cell conversion run_readonly_query used before json_codec.
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    return value
+
+
+def _isinstance_row(row):
+    if isinstance(row, (list, tuple)):
+        return [_isinstance_value(value) for value in row]
+    return _isinstance_value(row)
+
+
+def convert_isinstance(rows):
+    return [_isinstance_row(row) for row in rows]
+
+
+def convert_by_oid(rows):
+    convert = json_codec.row_converter(DESCRIPTION)
+    return [convert(row) for row in rows]
+
+
+def _result(rows):
+    return {
+        "status": "success",
+        "sql": "SELECT * FROM chocolate_sales",
+        "columns": list(COLUMNS),
+        "row_count": len(rows),
+        "truncated": False,
+        "rows": rows,
+    }
+
+
+def _median_ms(samples):
+    return round(statistics.median(samples) * 1000, 2)
+
+
+def measure(rows, result_format, convert, provider, repeats):
+    convert_samples, shape_samples, encode_samples = [], [], []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        converted = convert(rows)
+        convert_samples.append(time.perf_counter() - started)
+        started = time.perf_counter()
+        shaped = sales_analysis_tools._shape_result(_result(converted), result_format)
+        shape_samples.append(time.perf_counter() - started)
+        started = time.perf_counter()
+        body = provider.response(shaped).get_data()
+        encode_samples.append(time.perf_counter() - started)
+    convert_ms, encode_ms = _median_ms(convert_samples), _median_ms(encode_samples)
+    return {
+        "convert_ms": convert_ms,
+        "shape_ms": _median_ms(shape_samples),
+        "encode_ms": encode_ms,
+        "convert_plus_encode_ms": round(convert_ms + encode_ms, 2),
+        "bytes": len(body),
+    }, json.loads(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cells", type=int, default=100_000)
+    parser.add_argument("--repeats", type=int, default=7)
+    args = parser.parse_args()
+
+    rows = fetched_rows(max(1, args.cells // len(COLUMNS)))
+    app = Flask(__name__)
+    pipelines = {"before": (convert_isinstance, DefaultJSONProvider(app), None)}
+    pipelines["after_stdlib"] = (convert_by_oid, FastJSONProvider(app), "stdlib")
+    if json_codec.orjson is not None:
+        pipelines["after_orjson"] = (convert_by_oid, FastJSONProvider(app), "orjson")
+
+    results = {"cells": len(rows) * len(COLUMNS), "rows": len(rows)}
+    for result_format in sales_analysis_tools.RESULT_FORMATS:
+        formats = results[result_format] = {}
+        documents = {}
+        for name, (convert, provider, backend) in pipelines.items():
+            if backend:
+                json_codec._backend = backend  # normally fixed at import from JSON_BACKEND
+            formats[name], documents[name] = measure(rows, result_format, convert, provider, args.repeats)
+        baseline = formats["before"]["convert_plus_encode_ms"]
+        for name, measured in formats.items():
+            measured["speedup"] = round(baseline / measured["convert_plus_encode_ms"], 2)
+            measured["same_document"] = documents[name] == documents["before"]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""Partition pruning of month-bounded agent queries on sales_fact.
+
+Builds the star schema twice in scratch schemas, once from
+sql/create_tables.sql and once from sql/create_tables_partitioned.sql (whose
+calendar trigger creates the monthly partitions while the calendar is
+loaded), fills both with the same synthetic facts, then for each query
+reports the median runtime and how many sales_fact relations the executed
+plan actually touched.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_partition_pruning --years 3
+"""
+import argparse
+import json
+import statistics
+import time
+
+import psycopg2
+
+from monitoring_agent import db_pool
+
+LAYOUTS = {
+    "flat": ("bench_sales_flat", "sql/create_tables.sql"),
+    "partitioned": ("bench_sales_partitioned", "sql/create_tables_partitioned.sql"),
+}
+START_DATE = "2023-01-01"
+
+QUERIES = {
+    "month_total": """
+        SELECT SUM(net_sales) FROM sales_fact
+        WHERE date_id >= DATE '2024-03-01' AND date_id < DATE '2024-04-01'
+    """,
+    "month_by_store": """
+        SELECT s.store_name, SUM(f.net_sales) AS net_sales
+        FROM sales_fact f JOIN stores s ON s.store_id = f.store_id
+        WHERE f.date_id BETWEEN DATE '2024-06-01' AND DATE '2024-06-30'
+        GROUP BY s.store_name ORDER BY net_sales DESC
+    """,
+    "last_30_days_by_product": """
+        SELECT p.product_name, SUM(f.units_sold) AS units
+        FROM sales_fact f JOIN products p ON p.product_id = f.product_id
+        WHERE f.date_id > (SELECT MAX(date_id) FROM calendar) - 30
+        GROUP BY p.product_name ORDER BY units DESC LIMIT 10
+    """,
+    # Filtering through the calendar join instead of date_id: no plan-time pruning.
+    "quarter_via_calendar": """
+        SELECT SUM(f.net_sales) FROM sales_fact f
+        JOIN calendar c ON c.date_id = f.date_id
+        WHERE c.year = 2024 AND c.quarter = 2
+    """,
+}
+
+
+def _admin_connection(schema):
+    conn = psycopg2.connect(**db_pool._db_config())
+    conn.autocommit = False
+    with conn.cursor() as cursor:
+        cursor.execute(f"CREATE SCHEMA IF NOT EXISTS {schema};")
+        cursor.execute(f"SET search_path TO {schema};")
+    return conn
+
+
+def build_layout(schema, ddl_file, days, stores, products, density):
+    conn = _admin_connection(schema)
+    try:
+        with conn.cursor() as cursor:
+            with open(ddl_file) as f:
+                cursor.execute(f.read())
+            cursor.execute(
+                """
+                INSERT INTO stores (store_code, store_name, region)
+                SELECT 'STR' || i, 'Store ' || i, (ARRAY['East', 'West'])[1 + i %% 2]
+                FROM generate_series(1, %s) AS i
+                ON CONFLICT DO NOTHING;
+                """,
+                (stores,),
+            )
+            cursor.execute(
+                """
+                INSERT INTO products (sku_code, product_name, unit_price)
+                SELECT 'SKU' || i, 'Product ' || i, 1 + i %% 7
+                FROM generate_series(1, %s) AS i
+                ON CONFLICT DO NOTHING;
+                """,
+                (products,),
+            )
+            cursor.execute(
+                """
+                INSERT INTO calendar (date_id, year, month, day, quarter)
+                SELECT d, extract(year FROM d), extract(month FROM d), extract(day FROM d),
+                       extract(quarter FROM d)
+                FROM generate_series(%s::date, %s::date + %s - 1, INTERVAL '1 day') AS g(t),
+                     LATERAL (SELECT t::date AS d) AS day
+                ON CONFLICT DO NOTHING;
+                """,
+                (START_DATE, START_DATE, days),
+            )
+            # Deterministic "random" subset so both layouts hold identical rows.
+            cursor.execute(
+                """
+                INSERT INTO sales_fact (date_id, store_id, product_id, units_sold, gross_sales,
+                                        discount_amount, net_sales)
+                SELECT c.date_id, s.store_id, p.product_id, u, u * 2.5, 0, u * 2.5
+                FROM calendar c
+                CROSS JOIN stores s
+                CROSS JOIN products p
+                CROSS JOIN LATERAL (SELECT 1 + abs(hashint4(s.store_id * 7919 + p.product_id
+                                                            + (c.date_id - DATE '2000-01-01'))) %% 200 AS u) AS units
+                WHERE abs(hashint4(s.store_id * 104729 + p.product_id * 31 + (c.date_id - DATE '2000-01-01')))
+                      %% 100 < %s
+                ON CONFLICT DO NOTHING;
+                """,
+                (int(density * 100),),
+            )
+        conn.commit()
+        conn.autocommit = True
+        with conn.cursor() as cursor:
+            cursor.execute("VACUUM ANALYZE sales_fact;")
+            for table in ("stores", "products", "calendar"):
+                cursor.execute(f"ANALYZE {table};")
+            cursor.execute("SELECT COUNT(*) FROM sales_fact;")
+            row_count = cursor.fetchone()[0]
+            cursor.execute("SELECT COUNT(*) FROM pg_inherits WHERE inhparent = 'sales_fact'::regclass;")
+            partitions = cursor.fetchone()[0]
+        return {"rows": row_count, "partitions": partitions}
+    finally:
+        conn.close()
+
+
+def drop_layouts():
+    conn = psycopg2.connect(**db_pool._db_config())
+    conn.autocommit = True
+    try:
+        with conn.cursor() as cursor:
+            for schema, _ in LAYOUTS.values():
+                cursor.execute(f"DROP SCHEMA IF EXISTS {schema} CASCADE;")
+    finally:
+        conn.close()
+
+
+def _fact_relations(node, found):
+    relation = node.get("Relation Name", "")
+    # Partitions pruned at run time stay in the plan but are never executed.
+    if relation.startswith("sales_fact") and node.get("Actual Loops"):
+        found.add(relation)
+    for child in node.get("Plans", []):
+        _fact_relations(child, found)
+    return found
+
+
+def measure(schema, sql, repeats):
+    conn = _admin_connection(schema)
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(f"EXPLAIN (ANALYZE, FORMAT JSON) {sql}")
+            plan = cursor.fetchone()[0][0]
+            samples = []
+            for _ in range(repeats):
+                started = time.perf_counter()
+                cursor.execute(sql)
+                cursor.fetchall()
+                samples.append(time.perf_counter() - started)
+        conn.rollback()
+    finally:
+        conn.close()
+    return {
+        "median_ms": round(statistics.median(samples) * 1000, 2),
+        "fact_relations_scanned": len(_fact_relations(plan["Plan"], set())),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--years", type=int, default=3)
+    parser.add_argument("--stores", type=int, default=20)
+    parser.add_argument("--products", type=int, default=40)
+    parser.add_argument("--density", type=float, default=0.5,
+                        help="fraction of (day, store, product) combinations with a sale")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--keep", action="store_true", help="keep the scratch schemas afterwards")
+    args = parser.parse_args()
+
+    drop_layouts()
+    results = {"layouts": {}, "queries": {}}
+    try:
+        for layout, (schema, ddl_file) in LAYOUTS.items():
+            print(f"Building {layout} layout in schema {schema}...")
+            results["layouts"][layout] = build_layout(
+                schema, ddl_file, args.years * 365, args.stores, args.products, args.density
+            )
+        for name, sql in QUERIES.items():
+            timings = {
+                layout: measure(schema, sql, args.repeats) for layout, (schema, _) in LAYOUTS.items()
+            }
+            timings["speedup"] = round(
+                timings["flat"]["median_ms"] / max(timings["partitioned"]["median_ms"], 0.01), 2
+            )
+            results["queries"][name] = timings
+        print(json.dumps(results, indent=2))
+    finally:
+        if not args.keep:
+            print("Dropping scratch schemas...")
+            drop_layouts()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Serialization size and time of the query result formats.
+
+Builds a synthetic chocolate_sales-shaped result of --rows rows (already
+JSON-safe, as run_readonly_query produces them), then shapes it with each
+result_format and times json.dumps of the tool response. No database needed.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_result_formats --rows 10000
+"""
+import argparse
+import datetime
+import decimal
+import json
+import random
+import statistics
+import time
+import tracemalloc
+
+from monitoring_agent import json_codec, sales_analysis_tools
+
+COLUMNS = ["id", "sales_person", "country", "product", "date", "amount", "boxes_shipped"]
+
+
+def synthetic_rows(count, seed=7):
+    rng = random.Random(seed)
+    people = [f"Sales Person {i}" for i in range(25)]
+    countries = ["UK", "USA", "India", "Canada", "Australia", "New Zealand"]
+    products = [f"Chocolate Product {i}" for i in range(22)]
+    start = datetime.date(2022, 1, 1)
+    rows = []
+    for i in range(count):
+        rows.append(json_codec.json_safe_value((
+            i + 1,
+            rng.choice(people),
+            rng.choice(countries),
+            rng.choice(products),
+            start + datetime.timedelta(days=rng.randrange(730)),
+            decimal.Decimal(rng.randrange(100, 2_000_000)) / 100,
+            rng.randrange(1, 700),
+        )))
+    return rows
+
+
+def _result(rows):
+    return {
+        "status": "success",
+        "sql": "SELECT * FROM chocolate_sales",
+        "columns": list(COLUMNS),
+        "row_count": len(rows),
+        "truncated": False,
+        "rows": rows,
+    }
+
+
+def measure(rows, result_format, repeats):
+    shape_samples = []
+    dump_samples = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        shaped = sales_analysis_tools._shape_result(_result(rows), result_format)
+        shape_samples.append(time.perf_counter() - started)
+        started = time.perf_counter()
+        payload = json.dumps(shaped)
+        dump_samples.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    shaped = sales_analysis_tools._shape_result(_result(rows), result_format)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    del shaped
+
+    return {
+        "json_bytes": len(payload.encode()),
+        "shape_ms": round(statistics.median(shape_samples) * 1000, 2),
+        "dumps_ms": round(statistics.median(dump_samples) * 1000, 2),
+        "shape_peak_kib": round(peak / 1024, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeats", type=int, default=7)
+    args = parser.parse_args()
+
+    rows = synthetic_rows(args.rows)
+    results = {"row_count": args.rows}
+    for result_format in sales_analysis_tools.RESULT_FORMATS:
+        results[result_format] = measure(rows, result_format, args.repeats)
+    records_bytes = results["records"]["json_bytes"]
+    for result_format in sales_analysis_tools.RESULT_FORMATS:
+        results[result_format]["size_vs_records"] = round(
+            results[result_format]["json_bytes"] / records_bytes, 3
+        )
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""Compare information_schema vs pg_catalog schema introspection.
+
+Creates a scratch schema with N synthetic tables (each with a primary key and a
+foreign key to the previous table), then times:
+
+* the legacy three-query information_schema path,
+* a full CatalogIntrospector refresh (single pg_catalog round trip),
+* an incremental refresh with nothing changed,
+* an incremental refresh after one ALTER TABLE.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_schema_introspection --tables 5000
+"""
+import argparse
+import json
+import statistics
+import time
+
+import psycopg2
+
+from monitoring_agent import db_pool, introspection
+
+BENCH_SCHEMA = "bench_introspection"
+BATCH = 200
+
+LEGACY_QUERIES = [
+    """
+    SELECT table_schema, table_name, column_name, data_type, is_nullable
+    FROM information_schema.columns
+    WHERE table_schema NOT IN ('pg_catalog', 'information_schema')
+    ORDER BY table_schema, table_name, ordinal_position;
+    """,
+    """
+    SELECT tc.table_schema, tc.table_name, kcu.column_name
+    FROM information_schema.table_constraints tc
+    JOIN information_schema.key_column_usage kcu
+        ON tc.constraint_name = kcu.constraint_name
+        AND tc.table_schema = kcu.table_schema
+    WHERE tc.constraint_type = 'PRIMARY KEY'
+        AND tc.table_schema NOT IN ('pg_catalog', 'information_schema')
+    ORDER BY tc.table_schema, tc.table_name, kcu.ordinal_position;
+    """,
+    """
+    SELECT tc.table_schema, tc.table_name, kcu.column_name,
+           ccu.table_schema, ccu.table_name, ccu.column_name
+    FROM information_schema.table_constraints tc
+    JOIN information_schema.key_column_usage kcu
+        ON tc.constraint_name = kcu.constraint_name
+        AND tc.table_schema = kcu.table_schema
+    JOIN information_schema.constraint_column_usage ccu
+        ON ccu.constraint_name = tc.constraint_name
+        AND ccu.table_schema = tc.table_schema
+    WHERE tc.constraint_type = 'FOREIGN KEY'
+        AND tc.table_schema NOT IN ('pg_catalog', 'information_schema')
+    ORDER BY tc.table_schema, tc.table_name, kcu.ordinal_position;
+    """,
+]
+
+
+def _admin_connection():
+    conn = psycopg2.connect(**db_pool._db_config())
+    conn.autocommit = False
+    return conn
+
+
+def create_synthetic_schema(table_count):
+    conn = _admin_connection()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(f"CREATE SCHEMA IF NOT EXISTS {BENCH_SCHEMA};")
+        conn.commit()
+        # Commit in batches: one transaction over thousands of tables would
+        # exhaust max_locks_per_transaction.
+        for start in range(0, table_count, BATCH):
+            with conn.cursor() as cursor:
+                for i in range(start, min(start + BATCH, table_count)):
+                    parent = (
+                        f", parent_id INT REFERENCES {BENCH_SCHEMA}.t_{i - 1:05d}(id)" if i else ""
+                    )
+                    cursor.execute(
+                        f"""
+                        CREATE TABLE IF NOT EXISTS {BENCH_SCHEMA}.t_{i:05d} (
+                            id SERIAL PRIMARY KEY,
+                            name VARCHAR(100) NOT NULL,
+                            amount NUMERIC(10, 2),
+                            created DATE{parent}
+                        );
+                        """
+                    )
+            conn.commit()
+    finally:
+        conn.close()
+
+
+def drop_synthetic_schema(table_count):
+    conn = _admin_connection()
+    try:
+        for end in range(table_count, 0, -BATCH):
+            with conn.cursor() as cursor:
+                for i in range(end - 1, max(end - BATCH, 0) - 1, -1):
+                    cursor.execute(f"DROP TABLE IF EXISTS {BENCH_SCHEMA}.t_{i:05d} CASCADE;")
+            conn.commit()
+        with conn.cursor() as cursor:
+            cursor.execute(f"DROP SCHEMA IF EXISTS {BENCH_SCHEMA} CASCADE;")
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def legacy_fetch():
+    with db_pool.connection() as conn:
+        with conn.cursor() as cursor:
+            for query in LEGACY_QUERIES:
+                cursor.execute(query)
+                cursor.fetchall()
+
+
+def _time(func, repeats):
+    samples = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - started)
+    return {
+        "median_ms": round(statistics.median(samples) * 1000, 2),
+        "min_ms": round(min(samples) * 1000, 2),
+        "max_ms": round(max(samples) * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tables", type=int, default=5000)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--keep", action="store_true", help="keep the synthetic schema afterwards")
+    args = parser.parse_args()
+
+    print(f"Creating {args.tables} synthetic tables in schema {BENCH_SCHEMA}...")
+    create_synthetic_schema(args.tables)
+    try:
+        introspector = introspection.CatalogIntrospector()
+        results = {
+            "tables": args.tables,
+            "information_schema_3_queries": _time(legacy_fetch, args.repeats),
+            "pg_catalog_full": _time(lambda: introspector.refresh(full=True), args.repeats),
+            "pg_catalog_incremental_unchanged": _time(introspector.refresh, args.repeats),
+        }
+
+        def alter_and_refresh():
+            conn = _admin_connection()
+            try:
+                with conn.cursor() as cursor:
+                    cursor.execute(
+                        f"ALTER TABLE {BENCH_SCHEMA}.t_00000 ADD COLUMN extra_{time.time_ns()} INT;"
+                    )
+                conn.commit()
+            finally:
+                conn.close()
+            started = time.perf_counter()
+            introspector.refresh()
+            return time.perf_counter() - started
+
+        samples = [alter_and_refresh() for _ in range(args.repeats)]
+        results["pg_catalog_incremental_one_altered"] = {
+            "median_ms": round(statistics.median(samples) * 1000, 2),
+            "rebuilt": introspector.last_refresh["rebuilt"],
+        }
+        print(json.dumps(results, indent=2))
+    finally:
+        if not args.keep:
+            print("Dropping synthetic schema...")
+            drop_synthetic_schema(args.tables)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""/ask throughput and latency: Flask dev server vs gunicorn with concurrency limits.
+
+Starts an in-process benchmarks.fake_adk_server whose /run takes
+--adk-delay seconds and returns a canned tool result, then for each serving
+mode launches monitoring_api on a free port and drives /ask from --clients
+concurrent clients for --duration seconds (answer cache bypassed, one client
+id per client). Reports throughput,
+latency percentiles of successful turns, fast 503 load-shedding and errors.
+No database needed.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_serving --clients 200 --adk-delay 1
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+import requests
+
+from benchmarks import fake_adk_server
+
+MODES = {
+    # The previous Dockerfile CMD, no admission control.
+    "dev_server": {
+        "command": [sys.executable, "-m", "monitoring_api.app"],
+        "env": {"API_AGENT_CONCURRENCY": "0", "API_QUERY_CONCURRENCY": "0"},
+    },
+    "gunicorn_unlimited": {
+        "command": [sys.executable, "-m", "gunicorn", "--config", "monitoring_api/gunicorn.conf.py",
+                    "monitoring_api.app:create_app()"],
+        "env": {"API_AGENT_CONCURRENCY": "0", "API_QUERY_CONCURRENCY": "0", "GUNICORN_ACCESS_LOG": ""},
+    },
+    "gunicorn_limited": {
+        "command": [sys.executable, "-m", "gunicorn", "--config", "monitoring_api/gunicorn.conf.py",
+                    "monitoring_api.app:create_app()"],
+        "env": {"GUNICORN_ACCESS_LOG": ""},
+    },
+}
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_api(mode, port, adk_port, answer_cache=False):
+    env = {
+        **os.environ,
+        "PORT": str(port),
+        "ADK_API_BASE_URL": f"http://127.0.0.1:{adk_port}",
+        "ANSWER_CACHE_ENABLED": "true" if answer_cache else "false",
+        **MODES[mode]["env"],
+    }
+    process = subprocess.Popen(
+        MODES[mode]["command"], env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    deadline = time.monotonic() + 20
+    while time.monotonic() < deadline:
+        try:
+            requests.get(f"http://127.0.0.1:{port}/health", timeout=1)
+            return process
+        except requests.RequestException:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f"{mode} did not start")
+
+
+def drive(port, clients, duration):
+    results = []
+    lock = threading.Lock()
+    stop_at = time.monotonic() + duration
+
+    def client(index):
+        session = requests.Session()
+        headers = {"X-Client-Id": f"bench-client-{index:05d}"}
+        turn = 0
+        while time.monotonic() < stop_at:
+            turn += 1
+            started = time.perf_counter()
+            try:
+                response = session.post(
+                    f"http://127.0.0.1:{port}/ask",
+                    json={"query": f"question {index}-{turn}", "cache": False},
+                    headers=headers,
+                    timeout=90,
+                )
+                outcome = response.status_code
+            except requests.RequestException:
+                outcome = "error"
+            elapsed = time.perf_counter() - started
+            with lock:
+                results.append((outcome, elapsed))
+            if outcome == 503:
+                time.sleep(0.5)  # clients back off as Retry-After asks
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, time.monotonic() - started
+
+
+def _percentiles(samples):
+    if not samples:
+        return {}
+    samples = sorted(samples)
+    pick = lambda q: round(samples[min(len(samples) - 1, int(q * len(samples)))] * 1000, 1)
+    return {"p50_ms": pick(0.5), "p95_ms": pick(0.95), "p99_ms": pick(0.99), "max_ms": round(samples[-1] * 1000, 1)}
+
+
+def summarize(results, elapsed):
+    ok = [seconds for outcome, seconds in results if outcome == 200]
+    shed = [seconds for outcome, seconds in results if outcome == 503]
+    return {
+        "requests": len(results),
+        "ok": len(ok),
+        "shed_503": len(shed),
+        "errors": len(results) - len(ok) - len(shed),
+        "ok_per_second": round(len(ok) / elapsed, 1),
+        "ok_latency": _percentiles(ok),
+        "shed_latency_p50_ms": round(statistics.median(shed) * 1000, 1) if shed else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--adk-delay", type=float, default=1.0)
+    parser.add_argument("--modes", nargs="+", default=list(MODES), choices=list(MODES))
+    args = parser.parse_args()
+
+    adk_port = _free_port()
+    adk = fake_adk_server.start_server(
+        adk_port, llm_delay=args.adk_delay, answer_delay=0, jitter=0, tool_mode="canned"
+    )
+    results = {"clients": args.clients, "duration_s": args.duration, "adk_delay_s": args.adk_delay}
+    try:
+        for mode in args.modes:
+            port = _free_port()
+            print(f"Driving {mode}...", file=sys.stderr)
+            process = start_api(mode, port, adk_port)
+            try:
+                results[mode] = summarize(*drive(port, args.clients, args.duration))
+                results[mode]["server"] = requests.get(f"http://127.0.0.1:{port}/server/stats").json()
+            finally:
+                process.terminate()
+                process.wait(timeout=30)
+    finally:
+        adk.shutdown()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
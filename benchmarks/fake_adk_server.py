@@ -0,0 +1,242 @@
+"""Local stand-in for the ADK API server, for load tests without a Gemini key.
+
+Implements the endpoints monitoring_api uses (session create/delete, /run
+and /run_sse). Each turn sleeps --llm-delay (the model choosing a tool),
+calls run_readonly_query, sleeps --answer-delay (the model writing the
+answer) and returns ADK-shaped events: a functionCall part, its
+functionResponse and the final text. With --tool-mode execute the tool runs
+for real against Postgres, in this process, as it would inside the ADK agent;
+with canned it returns a fixed one-row result.
+
+Per-stage timings are served at GET /stats (POST /stats/reset clears them).
+
+Run from the repository root:
+
+    python -m benchmarks.fake_adk_server --port 8000 --llm-delay 0.8 --answer-delay 0.4
+"""
+import argparse
+import collections
+import json
+import random
+import re
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+AGENT_NAME = "sales_analyst"
+
+# SQL the "model" picks for a question, by hash of the question text.
+TYPICAL_SQL = [
+    "SELECT country, SUM(amount) AS total_amount FROM chocolate_sales GROUP BY country ORDER BY total_amount DESC",
+    "SELECT product, SUM(amount) AS total_amount FROM chocolate_sales GROUP BY product ORDER BY total_amount DESC LIMIT 10",
+    "SELECT sales_person, SUM(amount) AS total_amount FROM chocolate_sales GROUP BY sales_person ORDER BY total_amount DESC LIMIT 10",
+    "SELECT DATE_TRUNC('month', date) AS month, SUM(amount) AS total_amount FROM chocolate_sales GROUP BY month ORDER BY month",
+    "SELECT country, product, SUM(boxes_shipped) AS boxes FROM chocolate_sales WHERE date >= DATE '2022-03-01' AND date < DATE '2022-06-01' GROUP BY country, product ORDER BY boxes DESC LIMIT 20",
+    "SELECT sales_person, country, amount, date FROM chocolate_sales WHERE amount > 15000 ORDER BY amount DESC LIMIT 50",
+]
+
+CANNED_RESULT = {"status": "success", "sql": "SELECT 1", "columns": ["a"], "rows": [[1]], "row_count": 1}
+
+_SESSION_PATH = re.compile(r"^/apps/[^/]+/users/[^/]+/sessions/[^/]+$")
+
+
+def percentiles(samples):
+    """p50/p95/p99/max/mean in milliseconds of a list of seconds."""
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+    pick = lambda q: round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 2)
+    return {
+        "count": len(ordered),
+        "p50_ms": pick(0.50),
+        "p95_ms": pick(0.95),
+        "p99_ms": pick(0.99),
+        "max_ms": round(ordered[-1] * 1000, 2),
+        "mean_ms": round(sum(ordered) / len(ordered) * 1000, 2),
+    }
+
+
+class StageTimings:
+    def __init__(self, max_samples=200_000):
+        self._lock = threading.Lock()
+        self._samples = collections.defaultdict(lambda: collections.deque(maxlen=max_samples))
+
+    def record(self, stage, seconds):
+        with self._lock:
+            self._samples[stage].append(seconds)
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+
+    def summary(self):
+        with self._lock:
+            return {stage: percentiles(list(samples)) for stage, samples in self._samples.items()}
+
+
+class FakeAdk:
+    def __init__(self, llm_delay=0.8, answer_delay=0.4, jitter=0.2, tool_mode="execute", max_rows=200):
+        self.llm_delay = llm_delay
+        self.answer_delay = answer_delay
+        self.jitter = jitter
+        self.tool_mode = tool_mode
+        self.max_rows = max_rows
+        self.sessions = set()
+        self.sessions_lock = threading.Lock()
+        self.timings = StageTimings()
+        self._tools = None
+        if tool_mode == "execute":
+            from monitoring_agent import sales_analysis_tools
+
+            self._tools = sales_analysis_tools
+
+    def _sleep(self, seconds):
+        if seconds > 0:
+            time.sleep(seconds * random.uniform(1 - self.jitter, 1 + self.jitter))
+
+    def _tool(self, sql):
+        if self._tools is None:
+            return dict(CANNED_RESULT)
+        return self._tools.run_readonly_query(sql, max_rows=self.max_rows)
+
+    def turn(self, question):
+        """Yield ``(event, partial)`` for one agent turn, timing each stage."""
+        started = time.perf_counter()
+        sql = TYPICAL_SQL[zlib.crc32(question.encode()) % len(TYPICAL_SQL)]
+
+        self._sleep(self.llm_delay)
+        self.timings.record("llm_ms", time.perf_counter() - started)
+        yield _event("model", {"functionCall": {"name": "run_readonly_query", "args": {"sql": sql}}}), False
+
+        tool_started = time.perf_counter()
+        result = self._tool(sql)
+        self.timings.record("tool_ms", time.perf_counter() - tool_started)
+        yield _event("user", {"functionResponse": {"name": "run_readonly_query", "response": result}}), False
+
+        answer_started = time.perf_counter()
+        answer = (
+            f"Here is what I found for \"{question}\": {result.get('row_count', 0)} rows."
+            if result.get("status") == "success"
+            else f"The query failed: {result.get('error_message')}"
+        )
+        words = answer.split(" ")
+        for i in range(0, len(words), 4):
+            self._sleep(self.answer_delay / max(1, len(words) // 4))
+            yield _event("model", {"text": " ".join(words[i:i + 4]) + " "}), True
+        self.timings.record("answer_ms", time.perf_counter() - answer_started)
+        yield _event("model", {"text": answer}), False
+        self.timings.record("turn_ms", time.perf_counter() - started)
+
+
+def _event(role, part):
+    return {
+        "author": AGENT_NAME,
+        "timestamp": time.time(),
+        "content": {"role": role, "parts": [part]},
+    }
+
+
+def make_handler(adk):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status, payload):
+            body = json.dumps(payload, default=str).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _body(self):
+            length = int(self.headers.get("Content-Length", 0))
+            return json.loads(self.rfile.read(length) or b"{}")
+
+        def do_GET(self):
+            if self.path == "/stats":
+                return self._send(200, adk.timings.summary())
+            self._send(404, {"detail": "Not Found"})
+
+        def do_DELETE(self):
+            with adk.sessions_lock:
+                adk.sessions.discard(self.path)
+            self._send(200, {})
+
+        def do_POST(self):
+            body = self._body()
+            if self.path == "/stats/reset":
+                adk.timings.reset()
+                return self._send(200, {})
+            if _SESSION_PATH.match(self.path):
+                with adk.sessions_lock:
+                    if self.path in adk.sessions:
+                        return self._send(409, {"detail": "Session already exists"})
+                    adk.sessions.add(self.path)
+                return self._send(200, {"id": self.path.rsplit("/", 1)[-1]})
+            if self.path not in ("/run", "/run_sse"):
+                return self._send(404, {"detail": "Not Found"})
+
+            key = f"/apps/{body.get('appName')}/users/{body.get('userId')}/sessions/{body.get('sessionId')}"
+            with adk.sessions_lock:
+                known = key in adk.sessions
+            if not known:
+                return self._send(404, {"detail": "Session not found"})
+            question = "".join(part.get("text", "") for part in body["newMessage"]["parts"])
+
+            if self.path == "/run":
+                events = [event for event, partial in adk.turn(question) if not partial]
+                return self._send(200, events)
+
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for event, partial in adk.turn(question):
+                if partial:
+                    event["partial"] = True
+                chunk = f"data: {json.dumps(event, default=str)}\n\n".encode()
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+                self.wfile.flush()
+            self.wfile.write(b"0\r\n\r\n")
+            self.wfile.flush()
+
+    return Handler
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+
+def start_server(port, **options):
+    """Serve a FakeAdk on 127.0.0.1:``port`` from a background thread."""
+    server = _Server(("127.0.0.1", port), make_handler(FakeAdk(**options)))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--llm-delay", type=float, default=0.8)
+    parser.add_argument("--answer-delay", type=float, default=0.4)
+    parser.add_argument("--jitter", type=float, default=0.2, help="+/- fraction applied to each delay")
+    parser.add_argument("--tool-mode", choices=("execute", "canned"), default="execute")
+    args = parser.parse_args()
+
+    adk = FakeAdk(args.llm_delay, args.answer_delay, args.jitter, args.tool_mode)
+    server = _Server((args.host, args.port), make_handler(adk))
+    print(f"Fake ADK API server on http://{args.host}:{args.port} (tool mode: {args.tool_mode})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+"""Load test of /ask -> ADK /run -> run_readonly_query, no Gemini key needed.
+
+Starts benchmarks.fake_adk_server as a subprocess (its tool calls run real
+SQL against Postgres unless --tool-mode canned) and monitoring_api in the
+chosen serving mode, unless --adk-url / --api-url point at running ones.
+Then --concurrency clients each ask questions from QUESTIONS in a loop for
+--duration seconds (answer cache off unless --cache) and the run is written
+as JSON: throughput, p50/p95/p99 latency, status counts and a per-stage
+breakdown (client round trip, time inside the API, and the fake ADK's model
+and tool stages). Seed the database first with benchmarks.seed_postgres.
+
+Run from the repository root:
+
+    python -m benchmarks.seed_postgres --scale 50
+    python -m benchmarks.load_test --concurrency 64 --duration 30 --output load.json
+"""
+import argparse
+import collections
+import datetime
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import requests
+
+from benchmarks.bench_serving import MODES, _free_port, start_api
+from benchmarks.fake_adk_server import percentiles
+
+QUESTIONS = [
+    "What are total sales by country?",
+    "Which products sell best?",
+    "Who are the top 10 sales people?",
+    "Show monthly sales",
+    "Which country and product shipped the most boxes in spring 2022?",
+    "List the largest single sales",
+    "How much did we sell in the UK?",
+    "Compare revenue per product",
+]
+
+
+def start_fake_adk(port, args):
+    command = [
+        sys.executable, "-m", "benchmarks.fake_adk_server", "--port", str(port),
+        "--llm-delay", str(args.llm_delay), "--answer-delay", str(args.answer_delay),
+        "--jitter", str(args.jitter), "--tool-mode", args.tool_mode,
+    ]
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 20
+    while time.monotonic() < deadline:
+        try:
+            requests.get(f"http://127.0.0.1:{port}/stats", timeout=1)
+            return process
+        except requests.RequestException:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("fake ADK server did not start")
+
+
+def drive(api_url, concurrency, duration, endpoint, use_cache):
+    samples = []
+    lock = threading.Lock()
+    stop_at = time.monotonic() + duration
+
+    def client(index):
+        session = requests.Session()
+        headers = {"X-Client-Id": f"load-client-{index:05d}"}
+        turn = 0
+        while time.monotonic() < stop_at:
+            question = QUESTIONS[(index + turn) % len(QUESTIONS)]
+            turn += 1
+            started = time.perf_counter()
+            api_ms = None
+            try:
+                response = session.post(
+                    f"{api_url}{endpoint}",
+                    json={"query": question, "cache": use_cache},
+                    headers=headers,
+                    timeout=90,
+                )
+                status = response.status_code
+                if status == 200 and endpoint == "/ask":
+                    api_ms = (response.json().get("timing") or {}).get("total_ms")
+            except requests.RequestException:
+                status = "error"
+            elapsed = time.perf_counter() - started
+            with lock:
+                samples.append((status, elapsed, api_ms))
+            if status == 503:
+                time.sleep(0.5)  # back off as Retry-After asks
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples, time.monotonic() - started
+
+
+def report(samples, elapsed, adk_stages):
+    ok = [(seconds, api_ms) for status, seconds, api_ms in samples if status == 200]
+    api = [api_ms / 1000 for _, api_ms in ok if api_ms is not None]
+    overhead = [seconds - api_ms / 1000 for seconds, api_ms in ok if api_ms is not None]
+    stages = {}
+    if api:
+        stages["api"] = percentiles(api)
+        stages["client_minus_api"] = percentiles(overhead)
+    for stage, summary in sorted(adk_stages.items()):
+        stages[f"adk_{stage[:-3]}"] = summary
+    return {
+        "requests": len(samples),
+        "status": dict(collections.Counter(str(status) for status, _, _ in samples)),
+        "throughput_rps": round(len(ok) / elapsed, 2),
+        "latency": percentiles([seconds for seconds, _ in ok]),
+        "stages": stages,
+    }
+
+
+def _git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--endpoint", choices=("/ask", "/ask/stream"), default="/ask")
+    parser.add_argument("--cache", action="store_true", help="let the answer cache serve repeats")
+    parser.add_argument("--serve", choices=list(MODES), default="gunicorn_limited")
+    parser.add_argument("--api-url", help="drive an already running monitoring_api instead")
+    parser.add_argument("--adk-url", help="fake ADK server the started API should use")
+    parser.add_argument("--llm-delay", type=float, default=0.8)
+    parser.add_argument("--answer-delay", type=float, default=0.4)
+    parser.add_argument("--jitter", type=float, default=0.2)
+    parser.add_argument("--tool-mode", choices=("execute", "canned"), default="execute")
+    parser.add_argument("--output", help="also write the JSON report here")
+    args = parser.parse_args()
+
+    processes = []
+    adk_url = args.adk_url
+    api_url = args.api_url
+    try:
+        if not api_url:
+            if adk_url:
+                adk_port = int(adk_url.rsplit(":", 1)[-1].rstrip("/"))
+            else:
+                adk_port = _free_port()
+                processes.append(start_fake_adk(adk_port, args))
+                adk_url = f"http://127.0.0.1:{adk_port}"
+            api_port = _free_port()
+            processes.append(start_api(args.serve, api_port, adk_port, answer_cache=args.cache))
+            api_url = f"http://127.0.0.1:{api_port}"
+        if adk_url:
+            requests.post(f"{adk_url}/stats/reset", timeout=5)
+
+        print(f"Driving {api_url}{args.endpoint} with {args.concurrency} clients...", file=sys.stderr)
+        samples, elapsed = drive(api_url, args.concurrency, args.duration, args.endpoint, args.cache)
+        adk_stages = requests.get(f"{adk_url}/stats", timeout=5).json() if adk_url else {}
+        server = requests.get(f"{api_url}/server/stats", timeout=5).json()
+    finally:
+        for process in reversed(processes):
+            process.terminate()
+            process.wait(timeout=30)
+
+    results = {
+        "started_at": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "revision": _git_revision(),
+        "config": {
+            "concurrency": args.concurrency,
+            "duration_s": args.duration,
+            "endpoint": args.endpoint,
+            "cache": args.cache,
+            "serve": None if args.api_url else args.serve,
+            "llm_delay_s": args.llm_delay,
+            "answer_delay_s": args.answer_delay,
+            "tool_mode": args.tool_mode,
+            "db_pool_max": os.getenv("DB_POOL_MAX"),
+        },
+        **report(samples, elapsed, adk_stages),
+        "server": server,
+    }
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
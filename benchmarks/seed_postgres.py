@@ -0,0 +1,84 @@
+"""Seed chocolate_sales with monitoring_agent/data/chocolate_sales.csv scaled N times.
+
+Truncates chocolate_sales, COPYs the CSV in once with the loader's own code
+path, then adds --scale - 1 more copies server-side, each shifted one more
+year into the past so date-bounded queries see a realistic spread rather than
+N duplicates of the same days. Bumps the data version, analyzes the table
+and refreshes the rollups so caches and canned intents see the new data.
+
+Run from the repository root:
+
+    python -m benchmarks.seed_postgres --scale 50
+"""
+import argparse
+import json
+import time
+
+import psycopg2
+
+from monitoring_agent import load_sales_data
+
+COLUMNS = "sales_person, country, product, date, amount, boxes_shipped"
+
+
+def seed(conn, scale, csv_file=load_sales_data.CSV_FILE):
+    timings = {}
+    with conn.cursor() as cursor:
+        load_sales_data.create_table(cursor)
+        load_sales_data.create_data_versions_table(cursor)
+        cursor.execute("TRUNCATE chocolate_sales RESTART IDENTITY")
+
+        started = time.perf_counter()
+        base_rows = load_sales_data.load_csv_data(cursor, csv_file=csv_file)
+        timings["copy_s"] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        for years_back in range(1, scale):
+            cursor.execute(
+                f"""
+                INSERT INTO chocolate_sales ({COLUMNS})
+                SELECT sales_person, country, product, date - make_interval(years => %s), amount, boxes_shipped
+                FROM chocolate_sales WHERE id <= %s
+                """,
+                (years_back, base_rows),
+            )
+        timings["scale_s"] = time.perf_counter() - started
+        load_sales_data.bump_data_version(cursor)
+    conn.commit()
+
+    started = time.perf_counter()
+    conn.autocommit = True
+    with conn.cursor() as cursor:
+        cursor.execute("ANALYZE chocolate_sales")
+        cursor.execute("SELECT COUNT(*), MIN(date), MAX(date) FROM chocolate_sales")
+        rows, first, last = cursor.fetchone()
+    conn.autocommit = False
+    load_sales_data.refresh_rollups(conn)
+    timings["analyze_refresh_s"] = time.perf_counter() - started
+
+    return {
+        "scale": scale,
+        "rows": rows,
+        "first_date": str(first),
+        "last_date": str(last),
+        **{name: round(seconds, 2) for name, seconds in timings.items()},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", type=int, default=10, help="copies of the CSV to load")
+    parser.add_argument("--csv", default=load_sales_data.CSV_FILE)
+    args = parser.parse_args()
+    if args.scale < 1:
+        parser.error("--scale must be at least 1")
+
+    conn = psycopg2.connect(**load_sales_data.DB_CONFIG)
+    try:
+        print(json.dumps(seed(conn, args.scale, args.csv), indent=2))
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,6 @@
+import argparse
 import os
+import re
 import psycopg2
 from pathlib import Path
 from dotenv import load_dotenv
@@ -13,25 +15,113 @@ DB_CONFIG = {
     "password": os.getenv("DB_PASSWORD"),
 }
 
+MIGRATIONS_DIR = Path("sql/migrations")
+SCHEMA_FILES = {
+    False: "sql/create_tables.sql",
+    True: "sql/create_tables_partitioned.sql",
+}
+
 def run_sql_file(cursor, file_path):
     with open(file_path, "r") as f:
         sql = f.read()
         cursor.execute(sql)
 
+def migration_requirements(sql):
+    """Tables named in '-- requires:' header lines"""
+    tables = []
+    for line in sql.splitlines():
+        if line.startswith("-- requires:"):
+            tables += [name.strip() for name in line.split(":", 1)[1].split(",") if name.strip()]
+    return tables
+
+def migration_statements(sql):
+    lines = [line for line in sql.splitlines() if not line.lstrip().startswith("--")]
+    return [statement.strip() for statement in "\n".join(lines).split(";") if statement.strip()]
+
+def relkind(cursor, table):
+    cursor.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s);", (table,))
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+def build_index_statement(cursor, statement):
+    """Partitioned tables do not support CREATE INDEX CONCURRENTLY; build those in place"""
+    match = re.match(
+        r"CREATE\s+(?:UNIQUE\s+)?INDEX\s+CONCURRENTLY\b.*?\bON\s+(?:ONLY\s+)?([\w.]+)",
+        statement,
+        re.IGNORECASE | re.DOTALL,
+    )
+    if match and relkind(cursor, match.group(1)) == "p":
+        return re.sub(r"\s+CONCURRENTLY\b", "", statement, count=1, flags=re.IGNORECASE)
+    return statement
+
+def apply_migrations(conn, directory=MIGRATIONS_DIR):
+    """Apply sql/migrations/*.sql in order, once each.
+
+    Runs in autocommit because CREATE INDEX CONCURRENTLY cannot run inside a
+    transaction; IF NOT EXISTS keeps a half-applied file safe to re-run.
+    A file whose required tables do not exist yet is left for a later run.
+    """
+    conn.autocommit = True
+    with conn.cursor() as cursor:
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version TEXT PRIMARY KEY,
+                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            );
+        """)
+        cursor.execute("SELECT version FROM schema_migrations;")
+        applied = {row[0] for row in cursor.fetchall()}
+
+        for path in sorted(directory.glob("*.sql")):
+            if path.name in applied:
+                continue
+            sql = path.read_text()
+            missing = []
+            for table in migration_requirements(sql):
+                cursor.execute("SELECT to_regclass(%s);", (table,))
+                if cursor.fetchone()[0] is None:
+                    missing.append(table)
+            if missing:
+                print(f"⏭️  Skipping {path.name}: missing {', '.join(missing)}")
+                continue
+            for statement in migration_statements(sql):
+                cursor.execute(build_index_statement(cursor, statement))
+            cursor.execute("INSERT INTO schema_migrations (version) VALUES (%s);", (path.name,))
+            print(f"✅ Applied {path.name}")
+    conn.autocommit = False
+
 def main():
+    parser = argparse.ArgumentParser(description="Create the sales schema and sample data.")
+    parser.add_argument(
+        "--partitioned",
+        action="store_true",
+        help="create sales_fact with monthly range partitions on date_id",
+    )
+    args = parser.parse_args()
+
     print("Connecting to PostgreSQL...")
     conn = psycopg2.connect(**DB_CONFIG)
     conn.autocommit = False
 
     try:
         with conn.cursor() as cursor:
+            partitioned = args.partitioned
+            existing = relkind(cursor, "sales_fact")
+            if existing is not None and (existing == "p") != partitioned:
+                partitioned = existing == "p"
+                layout = "partitioned" if partitioned else "unpartitioned"
+                print(f"⚠️  sales_fact already exists ({layout}); keeping that layout")
+
             print("Creating tables...")
-            run_sql_file(cursor, "sql/create_tables.sql")
+            run_sql_file(cursor, SCHEMA_FILES[partitioned])
 
             print("Inserting sample data...")
             run_sql_file(cursor, "sql/insert_sample_data.sql")
 
         conn.commit()
+
+        print("Applying migrations...")
+        apply_migrations(conn)
         print("✅ Database initialized successfully!")
 
     except Exception as e:
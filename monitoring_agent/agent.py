@@ -1,10 +1,12 @@
 from dotenv import load_dotenv
 from google.adk.agents import Agent
 
-from . import sales_analysis_tools
+from . import metrics, sales_analysis_tools
 
 load_dotenv()
 
+metrics.serve_from_env()
+
 
 root_agent = Agent(
     name="Sales_Analysis_Agent",
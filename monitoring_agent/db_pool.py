@@ -0,0 +1,286 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+import psycopg2
+import psycopg2.extensions
+from dotenv import load_dotenv
+
+from . import metrics
+
+load_dotenv()
+
+
+class PoolTimeout(psycopg2.OperationalError):
+    """Raised when no connection could be checked out within the pool timeout."""
+
+
+def _db_config() -> Dict[str, Any]:
+    return {
+        "host": os.getenv("DB_HOST", "localhost"),
+        "port": int(os.getenv("DB_PORT", "5432")),
+        "dbname": os.getenv("DB_NAME", "mydb"),
+        "user": os.getenv("DB_USER", "postgres"),
+        "password": os.getenv("DB_PASSWORD", "postgres"),
+    }
+
+
+def _pool_config() -> Dict[str, Any]:
+    return {
+        "min_size": int(os.getenv("DB_POOL_MIN_SIZE", "1")),
+        "max_size": int(os.getenv("DB_POOL_MAX_SIZE", "10")),
+        "max_uses": int(os.getenv("DB_POOL_MAX_USES", "1000")),
+        "timeout": float(os.getenv("DB_POOL_TIMEOUT", "10")),
+        "health_check_interval": float(os.getenv("DB_POOL_HEALTH_CHECK_INTERVAL", "30")),
+    }
+
+
+class _PooledConnection:
+    __slots__ = ("conn", "uses", "last_used")
+
+    def __init__(self, conn: Any) -> None:
+        self.conn = conn
+        self.uses = 0
+        self.last_used = time.monotonic()
+
+
+class ConnectionPool:
+    """Thread-safe pool of read-only psycopg2 connections.
+
+    Physical connections are opened lazily up to ``max_size`` and configured
+    for read-only autocommit once, when they are created. Idle connections are
+    health-checked on checkout when they have been idle for longer than
+    ``health_check_interval`` seconds, and closed after ``max_uses`` checkouts.
+    """
+
+    def __init__(
+        self,
+        dsn: Optional[Dict[str, Any]] = None,
+        min_size: int = 1,
+        max_size: int = 10,
+        max_uses: int = 1000,
+        timeout: float = 10.0,
+        health_check_interval: float = 30.0,
+    ) -> None:
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self._dsn = dict(dsn or _db_config())
+        self.min_size = max(0, min(min_size, max_size))
+        self.max_size = max_size
+        self.max_uses = max_uses
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+
+        self._lock = threading.Condition(threading.Lock())
+        self._idle: List[_PooledConnection] = []
+        self._in_use: Dict[int, _PooledConnection] = {}
+        self._size = 0
+        self._closed = False
+        self._stats = {
+            "connections_created": 0,
+            "connections_closed": 0,
+            "connections_recycled": 0,
+            "health_check_failures": 0,
+            "checkouts": 0,
+            "waits": 0,
+            "timeouts": 0,
+            "wait_time_total": 0.0,
+            "wait_time_max": 0.0,
+        }
+
+    def _connect(self) -> _PooledConnection:
+        conn = psycopg2.connect(**self._dsn)
+        conn.set_session(readonly=True, autocommit=True)
+        with self._lock:
+            self._stats["connections_created"] += 1
+        return _PooledConnection(conn)
+
+    def _discard(self, pooled: _PooledConnection) -> None:
+        try:
+            pooled.conn.close()
+        except psycopg2.Error:
+            pass
+        with self._lock:
+            self._size -= 1
+            self._stats["connections_closed"] += 1
+            self._lock.notify()
+
+    def _is_healthy(self, pooled: _PooledConnection) -> bool:
+        if pooled.conn.closed:
+            return False
+        if time.monotonic() - pooled.last_used < self.health_check_interval:
+            return True
+        try:
+            with pooled.conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            return True
+        except psycopg2.Error:
+            return False
+
+    def fill(self) -> None:
+        """Open connections until ``min_size`` physical connections exist."""
+        while True:
+            with self._lock:
+                if self._closed or self._size >= self.min_size:
+                    return
+                self._size += 1
+            try:
+                pooled = self._connect()
+            except Exception:
+                with self._lock:
+                    self._size -= 1
+                raise
+            with self._lock:
+                self._idle.append(pooled)
+                self._lock.notify()
+
+    def getconn(self) -> Any:
+        deadline = time.monotonic() + self.timeout
+        waited = 0.0
+        while True:
+            pooled: Optional[_PooledConnection] = None
+            create = False
+            with self._lock:
+                if self._closed:
+                    raise psycopg2.InterfaceError("connection pool is closed")
+                started = time.monotonic()
+                while not self._idle and self._size >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats["timeouts"] += 1
+                        raise PoolTimeout(
+                            f"no connection available within {self.timeout:.1f}s "
+                            f"(max_size={self.max_size})"
+                        )
+                    self._lock.wait(remaining)
+                waited += time.monotonic() - started
+                if self._idle:
+                    pooled = self._idle.pop()
+                else:
+                    self._size += 1
+                    create = True
+
+            if create:
+                try:
+                    pooled = self._connect()
+                except Exception:
+                    with self._lock:
+                        self._size -= 1
+                        self._lock.notify()
+                    raise
+            elif not self._is_healthy(pooled):
+                with self._lock:
+                    self._stats["health_check_failures"] += 1
+                self._discard(pooled)
+                continue
+
+            pooled.uses += 1
+            with self._lock:
+                self._in_use[id(pooled.conn)] = pooled
+                self._stats["checkouts"] += 1
+                if waited > 0.001:
+                    self._stats["waits"] += 1
+                self._stats["wait_time_total"] += waited
+                self._stats["wait_time_max"] = max(self._stats["wait_time_max"], waited)
+            return pooled.conn
+
+    def putconn(self, conn: Any) -> None:
+        with self._lock:
+            pooled = self._in_use.pop(id(conn), None)
+        if pooled is None:
+            conn.close()
+            return
+
+        reusable = not conn.closed
+        if reusable and conn.info.transaction_status != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                reusable = False
+        if reusable and not conn.autocommit:
+            try:
+                conn.autocommit = True
+            except psycopg2.Error:
+                reusable = False
+
+        recycle = self.max_uses > 0 and pooled.uses >= self.max_uses
+        if not reusable or recycle:
+            if recycle:
+                with self._lock:
+                    self._stats["connections_recycled"] += 1
+            self._discard(pooled)
+            return
+
+        pooled.last_used = time.monotonic()
+        with self._lock:
+            if self._closed:
+                discard = True
+            else:
+                discard = False
+                self._idle.append(pooled)
+                self._lock.notify()
+        if discard:
+            self._discard(pooled)
+
+    @contextmanager
+    def connection(self) -> Iterator[Any]:
+        with metrics.stage("db_acquire"):
+            conn = self.getconn()
+        try:
+            yield conn
+        finally:
+            self.putconn(conn)
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._lock.notify_all()
+        for pooled in idle:
+            self._discard(pooled)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats.update(
+                {
+                    "size": self._size,
+                    "idle": len(self._idle),
+                    "in_use": self._size - len(self._idle),
+                    "min_size": self.min_size,
+                    "max_size": self.max_size,
+                }
+            )
+        checkouts = stats["checkouts"]
+        stats["wait_time_avg"] = stats["wait_time_total"] / checkouts if checkouts else 0.0
+        return stats
+
+
+_pool: Optional[ConnectionPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    """Return the process-wide connection pool, creating it on first use."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(**_pool_config())
+                try:
+                    _pool.fill()
+                except psycopg2.Error:
+                    # The database may not be up yet; connections are opened lazily.
+                    pass
+    return _pool
+
+
+def connection():
+    """Check out a pooled read-only connection as a context manager."""
+    return get_pool().connection()
+
+
+def pool_stats() -> Dict[str, Any]:
+    return get_pool().stats()
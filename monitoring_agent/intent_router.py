@@ -0,0 +1,398 @@
+import datetime
+import os
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+SOURCE_TABLE = "chocolate_sales"
+
+_MONTHS = {
+    name: number
+    for number, names in enumerate(
+        [("january", "jan"), ("february", "feb"), ("march", "mar"), ("april", "apr"),
+         ("may",), ("june", "jun"), ("july", "jul"), ("august", "aug"),
+         ("september", "sep", "sept"), ("october", "oct"), ("november", "nov"), ("december", "dec")],
+        start=1,
+    )
+    for name in names
+}
+_MONTH_NAMES = "|".join(sorted(_MONTHS, key=len, reverse=True))
+
+_TOP_N_RE = re.compile(r"\btop (\d{1,4})\b")
+_ISO_RANGE_RE = re.compile(r"\b(?:between|from) (\d{4}-\d{2}-\d{2}) (?:and|to|until) (\d{4}-\d{2}-\d{2})\b")
+_MONTH_YEAR_RE = re.compile(rf"\b({_MONTH_NAMES}) (\d{{4}})\b")
+_QUARTER_RE = re.compile(r"\bq([1-4]) (\d{4})\b")
+# Nouns that make a preceding number a count ("2000 products"), not a year.
+_COUNT_NOUNS = (
+    r"(?:sales ?(?:people|persons|reps?)|salespeople|people|persons|sellers|rows|records|"
+    r"results|products|countries|items|boxes|orders|transactions|customers)"
+)
+# A bare year, unless the number is a top N ("top 2000") or a count.
+_YEAR_RE = re.compile(rf"(?<!\btop )\b((?:19|20)\d{{2}})\b(?! {_COUNT_NOUNS}\b)")
+_TABLE_TAIL_RE = re.compile(r"([\w.]+)$")
+
+
+def _router_config() -> Dict[str, Any]:
+    return {
+        "enabled": os.getenv("INTENT_ROUTER_ENABLED", "true").lower() in ("1", "true", "yes"),
+        "values_ttl": float(os.getenv("INTENT_VALUES_TTL", "300")),
+    }
+
+
+class Intent(NamedTuple):
+    name: str
+    # Regex fragments matched against the lowercased, whitespace-collapsed question.
+    patterns: Tuple[str, ...]
+    build: Callable[[Dict[str, Any], Dict[str, Any]], Optional[Tuple[str, Dict[str, Any]]]]
+    # rollups.QUERIES key that answers the intent when no filter was extracted.
+    rollup: Optional[str] = None
+
+
+class RoutedQuery(NamedTuple):
+    intent: str
+    sql: str
+    params: Dict[str, Any]
+    rollup: Optional[str]
+
+
+def _where(params: Dict[str, Any]) -> str:
+    clauses = []
+    if "country" in params:
+        clauses.append("country = %(country)s")
+    if "product" in params:
+        clauses.append("product = %(product)s")
+    if "date_from" in params:
+        clauses.append("date >= %(date_from)s AND date < %(date_to)s")
+    return f" WHERE {' AND '.join(clauses)}" if clauses else ""
+
+
+def _total(column: str, alias: str) -> Callable:
+    def build(params, context):
+        return f"SELECT SUM({column}) AS {alias} FROM {SOURCE_TABLE}{_where(params)};", params
+    return build
+
+
+def _grouped(expression: str, alias: str, default_limit: Optional[int] = None) -> Callable:
+    def build(params, context):
+        if alias == "month":
+            order = "month"
+        else:
+            order = "total_amount DESC"
+        limit = ""
+        if "top_n" in params or default_limit is not None:
+            params.setdefault("top_n", default_limit)
+            limit = " LIMIT %(top_n)s"
+        column = expression if expression == alias else f"{expression} AS {alias}"
+        sql = (
+            f"SELECT {column}, SUM(amount) AS total_amount "
+            f"FROM {SOURCE_TABLE}{_where(params)} "
+            f"GROUP BY 1 ORDER BY {order}{limit};"
+        )
+        return sql, params
+    return build
+
+
+def _schema_table(context: Dict[str, Any]) -> Optional[str]:
+    match = _TABLE_TAIL_RE.search(context["question"])
+    if not match:
+        return None
+    tail = match.group(1)
+    for name in context["schema"].get("tables", {}):
+        if name == tail or name.endswith(f".{tail}"):
+            return name
+    return None
+
+
+def _list_tables(params, context):
+    return (
+        "SELECT table_schema, table_name FROM information_schema.tables "
+        "WHERE table_schema NOT IN ('pg_catalog', 'information_schema') "
+        "ORDER BY table_schema, table_name;",
+        {},
+    )
+
+
+def _describe(params, context):
+    table = _schema_table(context)
+    if table is None:
+        match = _TABLE_TAIL_RE.search(context["question"])
+        table = match.group(1) if match else None
+    if not table:
+        return None
+    column = "table_schema || '.' || table_name" if "." in table else "table_name"
+    return (
+        "SELECT column_name, data_type, is_nullable "
+        "FROM information_schema.columns "
+        f"WHERE {column} = %(table)s "
+        "ORDER BY ordinal_position;",
+        {"table": table},
+    )
+
+
+def _row_count(params, context):
+    table = _schema_table(context)
+    return (f"SELECT COUNT(*) AS row_count FROM {table};", {}) if table else None
+
+
+def _sample(params, context):
+    table = _schema_table(context)
+    return (f"SELECT * FROM {table} LIMIT 5;", {}) if table else None
+
+
+# Highest priority first: when several intents match a question, the earliest
+# one here wins (so "top products by sales" is top_products, not top_sales_people).
+INTENTS: List[Intent] = [
+    Intent("list_tables", (r"\b(?:list|show) tables\b",), _list_tables),
+    Intent("describe", (r"^(?:describe|show schema for) ",), _describe),
+    Intent("row_count", (r"\b(?:row count|count rows|how many rows)\b",), _row_count),
+    Intent("sample", (r"\b(?:sample|example rows)\b",), _sample),
+    Intent(
+        "total_boxes",
+        (r"\b(?:total|sum|number of) boxes\b", r"\bboxes shipped\b"),
+        _total("boxes_shipped", "total_boxes"),
+        rollup="total_boxes",
+    ),
+    Intent(
+        "top_countries",
+        (r"\btop(?: \d+)? countries\b", r"\bbest[- ]selling countries\b"),
+        _grouped("country", "country", default_limit=10),
+    ),
+    Intent(
+        "top_products",
+        (r"\btop(?: \d+)? products\b", r"\bbest[- ]selling products\b"),
+        _grouped("product", "product", default_limit=10),
+    ),
+    Intent(
+        "sales_by_country",
+        (r"\b(?:sales|revenue|amount) (?:by|per) country\b",),
+        _grouped("country", "country"),
+        rollup="sales_by_country",
+    ),
+    Intent(
+        "sales_by_product",
+        (r"\b(?:sales|revenue|amount) (?:by|per) product\b",),
+        _grouped("product", "product"),
+        rollup="sales_by_product",
+    ),
+    Intent(
+        "sales_by_month",
+        (r"\b(?:sales|revenue|amount) (?:by|per) month\b", r"\bmonthly (?:sales|revenue)\b"),
+        _grouped("DATE_TRUNC('month', date)", "month"),
+        rollup="sales_by_month",
+    ),
+    Intent(
+        "top_sales_people",
+        (
+            r"\btop(?: \d+)? (?:sales ?people|salespeople|sales ?persons|sales reps?|sellers)\b",
+            r"\bbest sales ?people\b",
+            r"\btop\b.*\bsales\b",
+        ),
+        _grouped("sales_person", "sales_person", default_limit=10),
+        rollup="top_sales_people",
+    ),
+    Intent(
+        "total_sales",
+        (r"\btotal (?:sales|revenue|amount)\b", r"\bsum(?: of)? amount\b"),
+        _total("amount", "total_amount"),
+        rollup="total_sales",
+    ),
+]
+
+
+def _compile(intents: List[Intent]) -> "re.Pattern":
+    # One alternation over every trigger phrase. Wrapping it in a lookahead
+    # makes the match zero-width, so finditer reports a match at every
+    # position and "total sales by country" yields both total_sales and
+    # sales_by_country instead of the first one consuming the text.
+    groups = [
+        f"(?P<{intent.name}>{'|'.join(f'(?:{pattern})' for pattern in intent.patterns)})"
+        for intent in intents
+    ]
+    return re.compile(f"(?=(?:{'|'.join(groups)}))")
+
+
+def _date_range(question: str) -> Optional[Tuple[datetime.date, datetime.date]]:
+    """``[from, to)`` for an explicit date range, month, quarter or year."""
+    match = _ISO_RANGE_RE.search(question)
+    if match:
+        try:
+            start = datetime.date.fromisoformat(match.group(1))
+            end = datetime.date.fromisoformat(match.group(2))
+        except ValueError:
+            return None
+        return start, end + datetime.timedelta(days=1)
+    match = _MONTH_YEAR_RE.search(question)
+    if match:
+        month, year = _MONTHS[match.group(1)], int(match.group(2))
+        start = datetime.date(year, month, 1)
+        return start, datetime.date(year + month // 12, month % 12 + 1, 1)
+    match = _QUARTER_RE.search(question)
+    if match:
+        quarter, year = int(match.group(1)), int(match.group(2))
+        start = datetime.date(year, 3 * quarter - 2, 1)
+        return start, datetime.date(year + quarter // 4, (3 * quarter) % 12 + 1, 1)
+    match = _YEAR_RE.search(question)
+    if match:
+        year = int(match.group(1))
+        return datetime.date(year, 1, 1), datetime.date(year + 1, 1, 1)
+    return None
+
+
+class IntentRouter:
+    """Answers common questions with parameterized SQL, without an LLM turn.
+
+    All trigger phrases are compiled into a single regex; country and product
+    values are matched against the distinct values returned by
+    ``values_loader`` (refreshed every ``values_ttl`` seconds). A loader that
+    returns None has failed: the previous values are kept and the lookup is
+    retried on the next question instead of being cached. SQL uses psycopg2
+    ``%(name)s`` placeholders; values are never interpolated.
+    """
+
+    def __init__(
+        self,
+        values_loader: Optional[Callable[[], Optional[Dict[str, List[str]]]]] = None,
+        enabled: bool = True,
+        values_ttl: float = 300.0,
+        intents: Optional[List[Intent]] = None,
+    ) -> None:
+        self.values_loader = values_loader
+        self.enabled = enabled
+        self.values_ttl = values_ttl
+        self.intents = {intent.name: intent for intent in intents or INTENTS}
+        self._priority = {name: i for i, name in enumerate(self.intents)}
+        self._matcher = _compile(list(self.intents.values()))
+        self._lock = threading.Lock()
+        self._values: Dict[str, Tuple["re.Pattern", Dict[str, str]]] = {}
+        self._values_loaded_at: Optional[float] = None
+        self._questions = 0
+        self._unmatched = 0
+        self._unmatched_seconds = 0.0
+        self._intent_stats: Dict[str, Dict[str, Any]] = {}
+
+    def _value_matchers(self) -> Dict[str, Tuple["re.Pattern", Dict[str, str]]]:
+        now = time.monotonic()
+        if self.values_loader is None:
+            return {}
+        if self._values_loaded_at is not None and now - self._values_loaded_at < self.values_ttl:
+            return self._values
+        loaded = self.values_loader()
+        if loaded is None:
+            return self._values
+        matchers = {}
+        for param, values in loaded.items():
+            by_lower = {value.lower(): value for value in values if value}
+            if not by_lower:
+                continue
+            alternation = "|".join(re.escape(value) for value in sorted(by_lower, key=len, reverse=True))
+            matchers[param] = (re.compile(rf"(?<!\w)(?:{alternation})(?!\w)"), by_lower)
+        with self._lock:
+            self._values = matchers
+            self._values_loaded_at = now
+        return matchers
+
+    def extract_params(self, question: str) -> Dict[str, Any]:
+        params: Dict[str, Any] = {}
+        for param, (pattern, by_lower) in self._value_matchers().items():
+            match = pattern.search(question)
+            if match:
+                params[param] = by_lower[match.group()]
+        date_range = _date_range(question)
+        if date_range is not None:
+            params["date_from"], params["date_to"] = date_range
+        match = _TOP_N_RE.search(question)
+        if match and int(match.group(1)) > 0:
+            params["top_n"] = int(match.group(1))
+        return params
+
+    def match(self, question: str) -> List[str]:
+        """Names of every intent whose trigger phrases occur, highest priority first."""
+        found = {
+            name
+            for m in self._matcher.finditer(question)
+            for name, text in m.groupdict().items()
+            if text is not None
+        }
+        return sorted(found, key=self._priority.__getitem__)
+
+    def route(self, question: str, schema: Dict[str, Any]) -> Optional[RoutedQuery]:
+        if not self.enabled:
+            return None
+        started = time.perf_counter()
+        normalized = " ".join(question.lower().split())
+        routed = None
+        for name in self.match(normalized):
+            intent = self.intents[name]
+            params = self.extract_params(normalized)
+            extracted = bool(params)
+            built = intent.build(params, {"question": normalized, "schema": schema})
+            if built is None:
+                continue
+            sql, params = built
+            unfiltered = not set(params) - {"top_n"} and params.get("top_n") in (None, 10)
+            rollup = intent.rollup if unfiltered else None
+            routed = RoutedQuery(name, sql, params, rollup)
+            break
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self._questions += 1
+            if routed is None:
+                self._unmatched += 1
+                self._unmatched_seconds += elapsed
+            else:
+                stats = self._stats_for(routed.intent)
+                stats["matches"] += 1
+                stats["route_seconds"] += elapsed
+                if extracted:
+                    stats["with_params"] += 1
+        return routed
+
+    def _stats_for(self, name: str) -> Dict[str, Any]:
+        return self._intent_stats.setdefault(
+            name,
+            {"matches": 0, "with_params": 0, "route_seconds": 0.0, "queries": 0, "errors": 0,
+             "query_seconds": 0.0, "max_query_seconds": 0.0},
+        )
+
+    def record_query(self, intent: str, seconds: float, ok: bool) -> None:
+        with self._lock:
+            stats = self._stats_for(intent)
+            stats["queries"] += 1
+            stats["errors"] += 0 if ok else 1
+            stats["query_seconds"] += seconds
+            stats["max_query_seconds"] = max(stats["max_query_seconds"], seconds)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            questions = self._questions
+            intents = {}
+            for name, stats in self._intent_stats.items():
+                intents[name] = {
+                    "matches": stats["matches"],
+                    "match_rate": round(stats["matches"] / questions, 4) if questions else 0.0,
+                    "with_params": stats["with_params"],
+                    "avg_route_ms": round(stats["route_seconds"] * 1000 / stats["matches"], 3)
+                    if stats["matches"] else 0.0,
+                    "queries": stats["queries"],
+                    "errors": stats["errors"],
+                    "avg_query_ms": round(stats["query_seconds"] * 1000 / stats["queries"], 2)
+                    if stats["queries"] else 0.0,
+                    "max_query_ms": round(stats["max_query_seconds"] * 1000, 2),
+                }
+            return {
+                "enabled": self.enabled,
+                "questions": questions,
+                "matched": questions - self._unmatched,
+                "match_rate": round((questions - self._unmatched) / questions, 4) if questions else 0.0,
+                "unmatched": self._unmatched,
+                "avg_unmatched_route_ms": round(self._unmatched_seconds * 1000 / self._unmatched, 3)
+                if self._unmatched else 0.0,
+                "intents": intents,
+            }
+
+
+def create_router(
+    values_loader: Optional[Callable[[], Optional[Dict[str, List[str]]]]] = None,
+) -> IntentRouter:
+    return IntentRouter(values_loader=values_loader, **_router_config())
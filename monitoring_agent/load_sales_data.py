@@ -1,10 +1,28 @@
 import os
+import io
+import re
 import csv
+import glob
+import time
+import argparse
+import itertools
+import collections
 import psycopg2
-from psycopg2.extras import execute_values
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime
 from dotenv import load_dotenv
 
+try:
+    from . import rollups
+except ImportError:  # run as a script: python monitoring_agent/load_sales_data.py
+    import rollups
+
+try:
+    import numpy as np
+    import pandas as pd
+except ImportError:  # only needed for --parser columnar
+    np = pd = None
+
 load_dotenv()
 
 DB_CONFIG = {
@@ -16,6 +34,28 @@ DB_CONFIG = {
 }
 
 CSV_FILE = "monitoring_agent/data/chocolate_sales.csv"
+REJECT_FILE = "monitoring_agent/data/chocolate_sales.rejects.csv"
+BATCH_SIZE = 50000
+COPY_BUFFER_SIZE = 64 * 1024
+
+COPY_SQL = """
+COPY chocolate_sales (sales_person, country, product, date, amount, boxes_shipped)
+FROM STDIN WITH (FORMAT text)
+"""
+
+# Unquoted empty fields are NULL in CSV COPY; keep the text columns as '' like the text path.
+COPY_CSV_SQL = """
+COPY chocolate_sales (sales_person, country, product, date, amount, boxes_shipped)
+FROM STDIN WITH (FORMAT csv, FORCE_NOT_NULL (sales_person, country, product))
+"""
+
+PARSERS = ("rows", "columnar")
+# Fills the place of a line with the wrong number of fields so later rows keep their line numbers.
+BAD_LINE_MARKER = '\ue000bad line\ue000'
+# A quoted field on one line ("" escapes match as two of these).
+_QUOTED_FIELD_RE = re.compile(r'"[^"\n]*"')
+DATE_CACHE_LIMIT = 100000
+_date_cache = {}
 
 def parse_amount(amount_str):
     """Convert '$5,320.00' to 5320.00"""
@@ -25,6 +65,296 @@ def parse_date(date_str):
     """Convert 'DD/MM/YYYY' to 'YYYY-MM-DD'"""
     return datetime.strptime(date_str, '%d/%m/%Y').strftime('%Y-%m-%d')
 
+def parse_row(row):
+    """Convert a CSV record into a chocolate_sales tuple"""
+    return (
+        row['Sales Person'],
+        row['Country'],
+        row['Product'],
+        parse_date(row['Date']),
+        parse_amount(row['Amount']),
+        int(row['Boxes Shipped'])
+    )
+
+def copy_escape(value):
+    """Escape a string for COPY text format"""
+    return (
+        value.replace('\\', '\\\\')
+        .replace('\t', '\\t')
+        .replace('\n', '\\n')
+        .replace('\r', '\\r')
+    )
+
+def format_copy_line(parsed_row):
+    """Render a parsed row as one COPY text-format line"""
+    sales_person, country, product, date, amount, boxes_shipped = parsed_row
+    return (
+        f"{copy_escape(sales_person)}\t{copy_escape(country)}\t{copy_escape(product)}"
+        f"\t{date}\t{amount!r}\t{boxes_shipped}\n"
+    )
+
+class IteratorFile(io.TextIOBase):
+    """Read-only text file whose content is pulled lazily from an iterator of strings"""
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._buffer = ""
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        parts = [self._buffer] if self._buffer else []
+        length = len(self._buffer)
+        self._buffer = ""
+        while size is None or size < 0 or length < size:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            parts.append(chunk)
+            length += len(chunk)
+        data = "".join(parts)
+        if size is not None and 0 <= size < len(data):
+            data, self._buffer = data[:size], data[size:]
+        return data
+
+    def readline(self, size=-1):
+        while "\n" not in self._buffer:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            self._buffer += chunk
+        end = self._buffer.find("\n") + 1 or len(self._buffer)
+        if size is not None and 0 <= size < end:
+            end = size
+        line, self._buffer = self._buffer[:end], self._buffer[end:]
+        return line
+
+class FieldCountFilter(io.TextIOBase):
+    """Text file that swaps lines with the wrong number of CSV fields for a BAD_LINE_MARKER line
+
+    pandas' C parser can only skip lines with too many fields (and drops some
+    without a warning when reading in chunks) and pads short ones with '', so
+    they are found here by counting the commas outside quotes on each line of
+    a block. Their fields are queued on ``bad_lines`` in file order.
+    """
+
+    def __init__(self, source, field_count):
+        self._source = source
+        self._tail = ""
+        self._field_count = field_count
+        self.bad_lines = collections.deque()
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        # Only whole lines are checked; a partial last line waits for the next read.
+        data = self._tail
+        while True:
+            chunk = self._source.read(size)
+            data += chunk
+            if not chunk:
+                self._tail = ""
+                return self._replace_bad_lines(data)
+            end = data.rfind("\n") + 1
+            if end:
+                data, self._tail = data[:end], data[end:]
+                return self._replace_bad_lines(data)
+
+    def _replace_bad_lines(self, text):
+        # ',' and '\n' are single bytes in UTF-8, so count them on the encoded text.
+        unquoted = _QUOTED_FIELD_RE.sub('', text).encode()
+        if not unquoted.endswith(b"\n"):
+            unquoted += b"\n"
+        chars = np.frombuffer(unquoted, dtype=np.uint8)
+        ends = np.flatnonzero(chars == ord("\n"))
+        commas = np.diff(np.cumsum(chars == ord(","))[ends], prepend=0)
+        # pandas skips blank lines itself.
+        blank = np.diff(ends, prepend=-1) - (chars[ends - 1] == ord("\r")) == 1
+        bad = np.flatnonzero((commas != self._field_count - 1) & ~blank)
+        if not len(bad):
+            return text
+        lines = text.split("\n")
+        for index in bad:
+            self.bad_lines.append(next(csv.reader([lines[index].rstrip("\r")])))
+            lines[index] = BAD_LINE_MARKER
+        return "\n".join(lines)
+
+class RejectWriter:
+    """Write malformed CSV rows to a reject file, opened on the first reject"""
+
+    def __init__(self, path, fieldnames):
+        self.path = path
+        self.fieldnames = list(fieldnames or [])
+        self.count = 0
+        self._file = None
+        self._writer = None
+
+    def write(self, line_num, row, error):
+        if self._writer is None:
+            self._file = open(self.path, 'w', newline='')
+            self._writer = csv.writer(self._file)
+            self._writer.writerow(['line', 'error'] + self.fieldnames)
+        self._writer.writerow([line_num, error] + [row.get(name) for name in self.fieldnames])
+        self.count += 1
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def iter_copy_lines(reader, rejects, line_offset=0):
+    """Parse CSV records lazily, yielding COPY lines and diverting bad rows to rejects"""
+    for row in reader:
+        try:
+            yield format_copy_line(parse_row(row))
+        except Exception as e:
+            rejects.write(reader.line_num + line_offset, row, f"{type(e).__name__}: {e}")
+
+def parse_date_column(dates):
+    """Convert a column of 'DD/MM/YYYY' strings, parsing each distinct value once"""
+    if len(_date_cache) > DATE_CACHE_LIMIT:
+        _date_cache.clear()
+    for value in dates.unique():
+        if value not in _date_cache:
+            try:
+                _date_cache[value] = parse_date(value)
+            except (TypeError, ValueError):
+                _date_cache[value] = None
+    return dates.map(_date_cache)
+
+def _map_distinct(column, convert):
+    """Apply a vectorized conversion to the distinct values of a column only"""
+    codes, uniques = pd.factorize(column)
+    converted = convert(pd.Series(uniques, dtype=object)).to_numpy()
+    result = pd.Series(converted.take(codes), index=column.index)
+    return result.where(codes >= 0)
+
+def parse_amount_column(amounts):
+    """Convert a column of '$5,320.00' strings to floats (NaN when malformed)"""
+    def convert(values):
+        cleaned = values.str.replace('$', '', regex=False).str.replace(',', '', regex=False)
+        return pd.to_numeric(cleaned, errors='coerce')
+    return _map_distinct(amounts, convert).astype(float)
+
+def valid_int_column(values):
+    """Boolean column: True where the string is an integer int() would accept"""
+    def convert(distinct):
+        return distinct.str.fullmatch(r'\s*[+-]?\d+\s*').fillna(False).astype(bool)
+    return _map_distinct(values, convert).fillna(False).astype(bool)
+
+def _reject_reason(row, date, amount, boxes_ok):
+    if pd.isna(date):
+        return f"invalid Date: {row.get('Date')!r}"
+    if pd.isna(amount):
+        return f"invalid Amount: {row.get('Amount')!r}"
+    if not boxes_ok:
+        return f"invalid Boxes Shipped: {row.get('Boxes Shipped')!r}"
+    return "malformed row"
+
+def iter_columnar_chunks(lines, fieldnames, batch_size, rejects, line_offset=0):
+    """Parse header-less CSV lines a column at a time, yielding (row count, COPY csv text)"""
+    if pd is None:
+        raise RuntimeError("The columnar parser needs pandas; install monitoring_agent/requirements.txt.")
+    # Lines with the wrong number of fields become marker rows (dropping them
+    # would shift the line numbers of every later reject) and are rejected below.
+    source = FieldCountFilter(lines if hasattr(lines, 'read') else IteratorFile(lines), len(fieldnames))
+    bad_lines = source.bad_lines
+    chunks = pd.read_csv(
+        source,
+        names=fieldnames,
+        header=None,
+        dtype=str,
+        keep_default_na=False,
+        chunksize=batch_size,
+        engine='c',
+    )
+    for chunk in chunks:
+        dates = parse_date_column(chunk['Date'])
+        amounts = parse_amount_column(chunk['Amount'])
+        boxes_ok = valid_int_column(chunk['Boxes Shipped'])
+        wrong_width = chunk[fieldnames[0]] == BAD_LINE_MARKER
+        bad = (
+            wrong_width
+            | dates.isna()
+            | amounts.isna()
+            | ~boxes_ok
+        )
+
+        if bad.any():
+            for index, row in chunk.loc[bad].iterrows():
+                if wrong_width[index]:
+                    fields = bad_lines.popleft()
+                    reason = f"expected {len(fieldnames)} fields, saw {len(fields)}"
+                    rejects.write(index + 1 + line_offset, dict(zip(fieldnames, fields)), reason)
+                    continue
+                row = row.to_dict()
+                reason = _reject_reason(row, dates[index], amounts[index], boxes_ok[index])
+                rejects.write(index + 1 + line_offset, row, reason)
+
+        good = ~bad
+        frame = pd.DataFrame({
+            'sales_person': chunk['Sales Person'][good],
+            'country': chunk['Country'][good],
+            'product': chunk['Product'][good],
+            'date': dates[good],
+            'amount': amounts[good],
+            'boxes_shipped': pd.to_numeric(chunk['Boxes Shipped'][good].str.strip()).astype('int64'),
+        })
+        buffer = io.StringIO()
+        frame.to_csv(buffer, header=False, index=False)
+        yield len(frame), buffer.getvalue()
+
+def copy_csv_chunks(cursor, chunks, label="chocolate_sales"):
+    """COPY pre-rendered CSV chunks into chocolate_sales; return rows copied"""
+    total = 0
+    started = time.perf_counter()
+    for count, text in chunks:
+        if not count:
+            continue
+        cursor.copy_expert(COPY_CSV_SQL, io.StringIO(text), size=COPY_BUFFER_SIZE)
+        total += count
+        elapsed = time.perf_counter() - started
+        print(f"[{label}] {total:,} rows copied ({total / elapsed:,.0f} rows/s)")
+    return total
+
+def copy_records(cursor, lines, fieldnames, rejects, batch_size=BATCH_SIZE, parser="rows",
+                 line_offset=0, label="chocolate_sales"):
+    """Parse header-less CSV lines with the chosen parser and COPY them; return rows copied"""
+    if parser == "columnar":
+        chunks = iter_columnar_chunks(lines, fieldnames, batch_size, rejects, line_offset)
+        return copy_csv_chunks(cursor, chunks, label=label)
+    reader = csv.DictReader(lines, fieldnames=fieldnames)
+    return copy_lines(cursor, iter_copy_lines(reader, rejects, line_offset), batch_size=batch_size, label=label)
+
+def _counted(iterable, counter):
+    for item in iterable:
+        counter[0] += 1
+        yield item
+
+def copy_lines(cursor, lines, batch_size=BATCH_SIZE, label="chocolate_sales"):
+    """Stream COPY lines into chocolate_sales, one COPY per batch; return rows copied"""
+    total = 0
+    started = time.perf_counter()
+    while True:
+        counter = [0]
+        batch = _counted(itertools.islice(lines, batch_size), counter)
+        cursor.copy_expert(COPY_SQL, IteratorFile(batch), size=COPY_BUFFER_SIZE)
+        if not counter[0]:
+            break
+        total += counter[0]
+        elapsed = time.perf_counter() - started
+        print(f"[{label}] {total:,} rows copied ({total / elapsed:,.0f} rows/s)")
+        if counter[0] < batch_size:
+            break
+    return total
+
 def create_table(cursor):
     """Create the chocolate_sales table if it doesn't exist"""
     create_table_sql = """
@@ -42,60 +372,297 @@ def create_table(cursor):
     cursor.execute(create_table_sql)
     print("Table 'chocolate_sales' created or already exists.")
 
-def load_csv_data(cursor):
-    """Load CSV data into the database"""
-    rows = []
-    
-    with open(CSV_FILE, 'r') as f:
-        reader = csv.DictReader(f)
-        for row_num, row in enumerate(reader, start=2):  # Start at 2 (after header)
+def create_data_versions_table(cursor):
+    """Create the table query caches read to notice reloaded data"""
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS data_versions (
+        table_name TEXT PRIMARY KEY,
+        version BIGINT NOT NULL DEFAULT 0,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    """)
+
+def bump_data_version(cursor, table_name="chocolate_sales"):
+    """Mark table_name as changed; committed together with the loaded rows"""
+    cursor.execute(
+        """
+        INSERT INTO data_versions (table_name, version) VALUES (%s, 1)
+        ON CONFLICT (table_name) DO UPDATE
+        SET version = data_versions.version + 1, updated_at = CURRENT_TIMESTAMP
+        """,
+        (table_name,),
+    )
+
+def refresh_rollups(conn):
+    """Refresh the pre-aggregated rollups the canned intents are answered from"""
+    timings = rollups.refresh_rollups(conn)
+    print(f"Refreshed {len(timings)} rollups in {sum(timings.values()):.2f}s.")
+
+def load_csv_data(cursor, csv_file=CSV_FILE, batch_size=BATCH_SIZE, reject_file=REJECT_FILE, parser="rows"):
+    """Stream CSV data into the database with COPY, in bounded memory"""
+    started = time.perf_counter()
+
+    with open(csv_file, 'r', newline='') as f:
+        fieldnames = next(csv.reader(f), [])
+        with RejectWriter(reject_file, fieldnames) as rejects:
             try:
-                parsed_row = (
-                    row['Sales Person'],
-                    row['Country'],
-                    row['Product'],
-                    parse_date(row['Date']),
-                    parse_amount(row['Amount']),
-                    int(row['Boxes Shipped'])
+                total = copy_records(
+                    cursor, f, fieldnames, rejects,
+                    batch_size=batch_size, parser=parser, line_offset=1,
                 )
-                rows.append(parsed_row)
             except Exception as e:
-                print(f"Error parsing row {row_num}: {e}")
-                continue
-    
-    if not rows:
+                print(f"Error inserting data: {e}")
+                raise
+
+    elapsed = time.perf_counter() - started
+    if not total:
         print("No data to insert.")
-        return
-    
-    insert_sql = """
-    INSERT INTO chocolate_sales (sales_person, country, product, date, amount, boxes_shipped)
-    VALUES %s
-    """
-    
+    else:
+        print(
+            f"Successfully inserted {total:,} rows into chocolate_sales table "
+            f"in {elapsed:.2f}s ({total / elapsed:,.0f} rows/s)."
+        )
+    if rejects.count:
+        print(f"Rejected {rejects.count:,} malformed rows; see {reject_file}.")
+    return total
+
+def create_checkpoint_table(cursor):
+    """Create the table recording shards that were loaded and committed"""
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS chocolate_sales_load_checkpoints (
+        shard_key TEXT PRIMARY KEY,
+        rows_loaded BIGINT NOT NULL,
+        rows_rejected BIGINT NOT NULL,
+        loaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    """)
+
+def list_shard_files(pattern):
+    """Expand a directory or glob pattern into a sorted list of CSV files"""
+    if os.path.isdir(pattern):
+        pattern = os.path.join(pattern, "*.csv")
+    return sorted(path for path in glob.glob(pattern) if os.path.isfile(path))
+
+def _shard(path, start, end, index):
+    stat = os.stat(path)
+    return {
+        "index": index,
+        "path": path,
+        "start": start,
+        "end": end,
+        "key": f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}:{start}-{end}",
+    }
+
+def plan_file_shards(paths):
+    """One shard per file"""
+    return [_shard(path, 0, os.path.getsize(path), i) for i, path in enumerate(paths)]
+
+def plan_byte_range_shards(path, parts):
+    """Split one CSV into byte ranges; a range owns every line that starts inside it"""
+    size = os.path.getsize(path)
+    step = max(1, -(-size // max(1, parts)))
+    return [
+        _shard(path, start, min(start + step, size), i)
+        for i, start in enumerate(range(0, size, step))
+    ]
+
+def iter_shard_lines(f, start, end):
+    """Yield decoded lines of a binary file whose first byte lies in [start, end)"""
+    if start:
+        # Land on the first line boundary at or after ``start``.
+        f.seek(start - 1)
+        f.readline()
+    while f.tell() < end:
+        line = f.readline()
+        if not line:
+            break
+        yield line.decode("utf-8")
+
+def read_header(path):
+    with open(path, 'r', newline='') as f:
+        return next(csv.reader(f))
+
+def shard_reject_file(reject_file, shard):
+    root, ext = os.path.splitext(reject_file)
+    return f"{root}.shard{shard['index']:04d}{ext or '.csv'}"
+
+def load_shard(shard, batch_size=BATCH_SIZE, reject_file=REJECT_FILE, parser="rows"):
+    """Load one shard on its own connection and commit it together with its checkpoint"""
+    started = time.perf_counter()
+    label = f"shard {shard['index']}"
+    conn = psycopg2.connect(**DB_CONFIG)
     try:
-        execute_values(cursor, insert_sql, rows)
-        print(f"Successfully inserted {len(rows)} rows into chocolate_sales table.")
-    except Exception as e:
-        print(f"Error inserting data: {e}")
+        with conn.cursor() as cursor:
+            cursor.execute(
+                "SELECT 1 FROM chocolate_sales_load_checkpoints WHERE shard_key = %s",
+                (shard["key"],),
+            )
+            if cursor.fetchone():
+                return {"shard": shard["index"], "rows": 0, "rejected": 0, "skipped": True}
+
+            fieldnames = read_header(shard["path"])
+            with open(shard["path"], 'rb') as f, \
+                    RejectWriter(shard_reject_file(reject_file, shard), fieldnames) as rejects:
+                lines = iter_shard_lines(f, shard["start"], shard["end"])
+                line_offset = 0
+                if shard["start"] == 0:
+                    next(lines, None)  # header
+                    line_offset = 1
+                total = copy_records(
+                    cursor, lines, fieldnames, rejects,
+                    batch_size=batch_size, parser=parser, line_offset=line_offset, label=label,
+                )
+
+            cursor.execute(
+                """
+                INSERT INTO chocolate_sales_load_checkpoints (shard_key, rows_loaded, rows_rejected)
+                VALUES (%s, %s, %s)
+                """,
+                (shard["key"], total, rejects.count),
+            )
+            bump_data_version(cursor)
+        conn.commit()
+    except Exception:
+        conn.rollback()
         raise
+    finally:
+        conn.close()
+
+    return {
+        "shard": shard["index"],
+        "rows": total,
+        "rejected": rejects.count,
+        "skipped": False,
+        "seconds": time.perf_counter() - started,
+    }
+
+def load_shards_parallel(shards, workers=None, batch_size=BATCH_SIZE, reject_file=REJECT_FILE, parser="rows"):
+    """Load shards across a process pool; completed shards are skipped on re-runs"""
+    conn = psycopg2.connect(**DB_CONFIG)
+    try:
+        with conn.cursor() as cursor:
+            create_table(cursor)
+            create_checkpoint_table(cursor)
+            create_data_versions_table(cursor)
+            cursor.execute(
+                "SELECT shard_key FROM chocolate_sales_load_checkpoints WHERE shard_key = ANY(%s)",
+                ([shard["key"] for shard in shards],),
+            )
+            done = {row[0] for row in cursor.fetchall()}
+        conn.commit()
+    finally:
+        conn.close()
+
+    pending = [shard for shard in shards if shard["key"] not in done]
+    print(f"{len(shards)} shards planned, {len(done)} already loaded, {len(pending)} to load.")
+
+    started = time.perf_counter()
+    total = rejected = 0
+    failures = []
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        futures = {
+            pool.submit(load_shard, shard, batch_size, reject_file, parser): shard for shard in pending
+        }
+        for future in as_completed(futures):
+            shard = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                failures.append(shard)
+                print(f"Shard {shard['index']} ({shard['path']}) failed: {e}")
+                continue
+            total += result["rows"]
+            rejected += result["rejected"]
+            if not result["skipped"]:
+                print(
+                    f"Shard {result['shard']} committed: {result['rows']:,} rows, "
+                    f"{result['rejected']:,} rejected in {result['seconds']:.2f}s."
+                )
+
+    elapsed = time.perf_counter() - started
+    rate = total / elapsed if elapsed else 0
+    print(f"Loaded {total:,} rows from {len(pending) - len(failures)} shards in {elapsed:.2f}s ({rate:,.0f} rows/s).")
+    if rejected:
+        print(f"Rejected {rejected:,} malformed rows; see {os.path.splitext(reject_file)[0]}.shard*.csv.")
+    if failures:
+        raise RuntimeError(f"{len(failures)} shards failed; re-run to resume from the last checkpoint.")
+    return total
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Load chocolate sales CSV data into PostgreSQL.")
+    parser.add_argument("--csv", default=CSV_FILE, help="CSV file to load")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="rows per COPY batch")
+    parser.add_argument("--reject-file", default=REJECT_FILE, help="where malformed rows are written")
+    parser.add_argument(
+        "--shards",
+        help="directory or glob of CSV shards to load in parallel (each with a header row)",
+    )
+    parser.add_argument(
+        "--split",
+        type=int,
+        help="split --csv into this many byte ranges and load them in parallel "
+             "(records must not contain embedded newlines)",
+    )
+    parser.add_argument("--workers", type=int, help="parallel worker processes (default: CPU count)")
+    parser.add_argument(
+        "--parser",
+        choices=PARSERS,
+        default="rows",
+        help="rows: per-record csv parsing; columnar: vectorized pandas parsing per batch",
+    )
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    if args.shards or args.split:
+        if args.shards:
+            paths = list_shard_files(args.shards)
+            if not paths:
+                raise SystemExit(f"No CSV shards match {args.shards}")
+            shards = plan_file_shards(paths)
+        else:
+            shards = plan_byte_range_shards(args.csv, args.split)
+        load_shards_parallel(
+            shards,
+            workers=args.workers,
+            batch_size=args.batch_size,
+            reject_file=args.reject_file,
+            parser=args.parser,
+        )
+        print("Data loaded successfully!")
+        conn = psycopg2.connect(**DB_CONFIG)
+        try:
+            refresh_rollups(conn)
+        finally:
+            conn.close()
+        return
 
-def main():
     print("Connecting to PostgreSQL...")
     conn = psycopg2.connect(**DB_CONFIG)
-    
+
     try:
         with conn.cursor() as cursor:
             create_table(cursor)
-            load_csv_data(cursor)
-        
+            create_data_versions_table(cursor)
+            load_csv_data(
+                cursor,
+                csv_file=args.csv,
+                batch_size=args.batch_size,
+                reject_file=args.reject_file,
+                parser=args.parser,
+            )
+            bump_data_version(cursor)
+
         conn.commit()
         print("Data loaded successfully!")
-    
+        refresh_rollups(conn)
+
     except Exception as e:
         conn.rollback()
         print(f"Error occurred: {e}")
         raise
-    
+
     finally:
         conn.close()
         print("Connection closed.")
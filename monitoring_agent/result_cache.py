@@ -0,0 +1,267 @@
+import copy
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from . import db_pool, sql_parser
+
+# Per-table data version: relfilenode changes on TRUNCATE / VACUUM FULL, the
+# tuple counters on every committed write. pg_stat only sees a writer's
+# counters once that backend flushes them (up to ~10 s later while it stays
+# connected), so the loader also bumps data_versions, which is visible as
+# soon as the load commits.
+_TABLE_VERSIONS_SQL = """
+SELECT s.relname, c.relfilenode::text || ':' || (s.n_tup_ins + s.n_tup_upd + s.n_tup_del)::text
+FROM pg_stat_user_tables s
+JOIN pg_class c ON c.oid = s.relid;
+"""
+
+_DATA_VERSIONS_SQL = "SELECT table_name, version::text FROM data_versions;"
+
+# <table>_change_seq sequences are bumped by statement triggers (see
+# rollups.py) at write time, without waiting for pg_stat.
+_CHANGE_SEQUENCES_SQL = r"""
+SELECT left(sequencename, -length('_change_seq')), coalesce(last_value, 0)::text
+FROM pg_sequences
+WHERE sequencename LIKE '%\_change\_seq';
+"""
+
+def _cache_config() -> Dict[str, Any]:
+    return {
+        "enabled": os.getenv("RESULT_CACHE_ENABLED", "true").lower() in ("1", "true", "yes"),
+        "max_entries": int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "256")),
+        "ttl": float(os.getenv("RESULT_CACHE_TTL", "300")),
+        "version_interval": float(os.getenv("RESULT_CACHE_VERSION_INTERVAL", "1")),
+        "path": os.getenv("RESULT_CACHE_PATH") or None,
+    }
+
+
+def normalize_sql(sql: str) -> str:
+    """Token stream with comments/whitespace dropped and keywords/names lowercased."""
+    return sql_parser.analyze_sql(sql).normalized
+
+
+def cache_key(sql: str, max_rows: int, offset: int = 0) -> str:
+    return hashlib.sha1(f"{max_rows}\x00{offset}\x00{normalize_sql(sql)}".encode()).hexdigest()
+
+
+def referenced_tables(sql: str, known: Dict[str, str]) -> Optional[Tuple[str, ...]]:
+    """Relnames the statement reads, or None if it reads anything we cannot version."""
+    relnames = {name.rsplit(".", 1)[-1] for name in sql_parser.analyze_sql(sql).tables}
+    if not relnames or not relnames.issubset(known):
+        return None
+    return tuple(sorted(relnames))
+
+
+class MemoryBackend:
+    """Size-bounded LRU of cache entries, local to this process."""
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key: str, entry: Dict[str, Any]) -> int:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        evicted = 0
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            evicted += 1
+        return evicted
+
+    def delete(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SqliteBackend:
+    """LRU cache entries in a SQLite file, so they survive restarts."""
+
+    def __init__(self, path: str, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS result_cache (
+                key TEXT PRIMARY KEY,
+                entry TEXT NOT NULL,
+                last_used REAL NOT NULL
+            )
+            """
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS result_cache_lru ON result_cache (last_used)")
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        row = self._db.execute("SELECT entry FROM result_cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        self._db.execute("UPDATE result_cache SET last_used = ? WHERE key = ?", (time.time(), key))
+        return json.loads(row[0])
+
+    def put(self, key: str, entry: Dict[str, Any]) -> int:
+        self._db.execute(
+            "INSERT OR REPLACE INTO result_cache (key, entry, last_used) VALUES (?, ?, ?)",
+            (key, json.dumps(entry, default=str), time.time()),
+        )
+        excess = len(self) - self.max_entries
+        if excess <= 0:
+            return 0
+        self._db.execute(
+            "DELETE FROM result_cache WHERE key IN "
+            "(SELECT key FROM result_cache ORDER BY last_used LIMIT ?)",
+            (excess,),
+        )
+        return excess
+
+    def delete(self, key: str) -> None:
+        self._db.execute("DELETE FROM result_cache WHERE key = ?", (key,))
+
+    def clear(self) -> None:
+        self._db.execute("DELETE FROM result_cache")
+
+    def __len__(self) -> int:
+        return self._db.execute("SELECT count(*) FROM result_cache").fetchone()[0]
+
+
+class ResultCache:
+    """Caches read-only query results keyed on normalized SQL, ``max_rows`` and page offset.
+
+    Each entry records the data version of the tables it reads. A hit is
+    served only while the entry is younger than ``ttl`` and those versions
+    are unchanged; the versions themselves are re-read from Postgres at most
+    every ``version_interval`` seconds.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        ttl: float = 300.0,
+        version_interval: float = 1.0,
+        path: Optional[str] = None,
+        enabled: bool = True,
+    ) -> None:
+        self.enabled = enabled
+        self.ttl = ttl
+        self.version_interval = version_interval
+        self.backend = SqliteBackend(path, max_entries) if path else MemoryBackend(max_entries)
+        self._lock = threading.Lock()
+        self._versions: Dict[str, str] = {}
+        self._versions_at = 0.0
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "stale": 0,
+            "expired": 0,
+            "evictions": 0,
+            "invalidations": 0,
+        }
+
+    def _fetch_versions(self) -> Dict[str, str]:
+        with db_pool.connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(_TABLE_VERSIONS_SQL)
+                versions = dict(cursor.fetchall())
+                cursor.execute(_CHANGE_SEQUENCES_SQL)
+                for table_name, version in cursor.fetchall():
+                    if table_name in versions:
+                        versions[table_name] = f"{versions[table_name]}~{version}"
+                # Only present once a loader has run.
+                if "data_versions" in versions:
+                    cursor.execute(_DATA_VERSIONS_SQL)
+                    for table_name, version in cursor.fetchall():
+                        versions[table_name] = f"{versions.get(table_name, '')}/{version}"
+        return versions
+
+    def table_versions(self) -> Dict[str, str]:
+        now = time.monotonic()
+        with self._lock:
+            if now - self._versions_at < self.version_interval:
+                return self._versions
+        versions = self._fetch_versions()
+        with self._lock:
+            self._versions = versions
+            self._versions_at = now
+        return versions
+
+    def snapshot(self, sql: str) -> Dict[str, str]:
+        """Data versions of the tables ``sql`` reads (or of everything)."""
+        versions = self.table_versions()
+        tables = referenced_tables(sql, versions)
+        if tables is None:
+            # Views, catalogs or no tables at all: depend on everything.
+            return {"*": hashlib.sha1(json.dumps(versions, sort_keys=True).encode()).hexdigest()}
+        return {name: versions[name] for name in tables}
+
+    def get(self, sql: str, max_rows: int, offset: int = 0) -> Optional[Dict[str, Any]]:
+        if not self.enabled:
+            return None
+        key = cache_key(sql, max_rows, offset)
+        with self._lock:
+            entry = self.backend.get(key)
+        if entry is None:
+            self._count("misses")
+            return None
+        if time.time() - entry["stored_at"] > self.ttl:
+            self._drop(key, "expired")
+            return None
+        if entry["versions"] != self.snapshot(sql):
+            self._drop(key, "stale")
+            return None
+        self._count("hits")
+        return copy.copy(entry["result"])
+
+    def put(self, sql: str, max_rows: int, result: Dict[str, Any], offset: int = 0) -> None:
+        if not self.enabled or result.get("status") != "success":
+            return
+        entry = {"stored_at": time.time(), "versions": self.snapshot(sql), "result": copy.copy(result)}
+        with self._lock:
+            evicted = self.backend.put(cache_key(sql, max_rows, offset), entry)
+            self._stats["evictions"] += evicted
+
+    def _drop(self, key: str, reason: str) -> None:
+        with self._lock:
+            self.backend.delete(key)
+            self._stats[reason] += 1
+            self._stats["misses"] += 1
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._stats[name] += 1
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self.backend.clear()
+            self._versions_at = 0.0
+            self._stats["invalidations"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats: Dict[str, Any] = dict(self._stats)
+            stats["size"] = len(self.backend)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        stats["enabled"] = self.enabled
+        stats["backend"] = type(self.backend).__name__
+        stats["ttl"] = self.ttl
+        return stats
+
+
+def create_cache() -> ResultCache:
+    return ResultCache(**_cache_config())
@@ -0,0 +1,223 @@
+import time
+from typing import Any, Dict, NamedTuple, Optional
+
+import psycopg2
+
+SOURCE_TABLE = "chocolate_sales"
+# Bumped (non-transactionally, so without lock contention between parallel
+# loaders) by a statement trigger on every write to the source table.
+CHANGE_SEQUENCE = "chocolate_sales_change_seq"
+
+# Materialized views over chocolate_sales; each has a unique index so it can
+# be refreshed CONCURRENTLY while dashboards keep reading it.
+ROLLUP_VIEWS: Dict[str, Dict[str, str]] = {
+    "chocolate_sales_totals": {
+        "definition": """
+            SELECT 'all'::text AS scope,
+                   SUM(amount) AS total_amount,
+                   SUM(boxes_shipped) AS total_boxes,
+                   COUNT(*) AS row_count
+            FROM chocolate_sales
+        """,
+        "key": "scope",
+    },
+    "chocolate_sales_by_country": {
+        "definition": """
+            SELECT country, SUM(amount) AS total_amount
+            FROM chocolate_sales
+            GROUP BY country
+        """,
+        "key": "country",
+    },
+    "chocolate_sales_by_product": {
+        "definition": """
+            SELECT product, SUM(amount) AS total_amount
+            FROM chocolate_sales
+            GROUP BY product
+        """,
+        "key": "product",
+    },
+    "chocolate_sales_by_person": {
+        "definition": """
+            SELECT sales_person, SUM(amount) AS total_amount
+            FROM chocolate_sales
+            GROUP BY sales_person
+        """,
+        "key": "sales_person",
+    },
+    "chocolate_sales_by_month": {
+        "definition": """
+            SELECT DATE_TRUNC('month', date) AS month, SUM(amount) AS total_amount
+            FROM chocolate_sales
+            GROUP BY month
+        """,
+        "key": "month",
+    },
+}
+
+
+class RollupQuery(NamedTuple):
+    view: str
+    rollup_sql: str
+    base_sql: str
+
+
+# Canned intent queries and their equivalent over the rollups.
+QUERIES: Dict[str, RollupQuery] = {
+    "total_sales": RollupQuery(
+        "chocolate_sales_totals",
+        "SELECT total_amount FROM chocolate_sales_totals;",
+        "SELECT SUM(amount) AS total_amount FROM chocolate_sales;",
+    ),
+    "total_boxes": RollupQuery(
+        "chocolate_sales_totals",
+        "SELECT total_boxes FROM chocolate_sales_totals;",
+        "SELECT SUM(boxes_shipped) AS total_boxes FROM chocolate_sales;",
+    ),
+    "top_sales_people": RollupQuery(
+        "chocolate_sales_by_person",
+        "SELECT sales_person, total_amount "
+        "FROM chocolate_sales_by_person "
+        "ORDER BY total_amount DESC LIMIT 10;",
+        "SELECT sales_person, SUM(amount) AS total_amount "
+        "FROM chocolate_sales "
+        "GROUP BY sales_person "
+        "ORDER BY total_amount DESC LIMIT 10;",
+    ),
+    "sales_by_country": RollupQuery(
+        "chocolate_sales_by_country",
+        "SELECT country, total_amount "
+        "FROM chocolate_sales_by_country "
+        "ORDER BY total_amount DESC;",
+        "SELECT country, SUM(amount) AS total_amount "
+        "FROM chocolate_sales "
+        "GROUP BY country "
+        "ORDER BY total_amount DESC;",
+    ),
+    "sales_by_product": RollupQuery(
+        "chocolate_sales_by_product",
+        "SELECT product, total_amount "
+        "FROM chocolate_sales_by_product "
+        "ORDER BY total_amount DESC;",
+        "SELECT product, SUM(amount) AS total_amount "
+        "FROM chocolate_sales "
+        "GROUP BY product "
+        "ORDER BY total_amount DESC;",
+    ),
+    "sales_by_month": RollupQuery(
+        "chocolate_sales_by_month",
+        "SELECT month, total_amount "
+        "FROM chocolate_sales_by_month "
+        "ORDER BY month;",
+        "SELECT DATE_TRUNC('month', date) AS month, SUM(amount) AS total_amount "
+        "FROM chocolate_sales "
+        "GROUP BY month "
+        "ORDER BY month;",
+    ),
+}
+
+_SOURCE_VERSION_SQL = f"""
+SELECT CASE WHEN is_called THEN last_value ELSE 0 END FROM {CHANGE_SEQUENCE}
+"""
+
+_FRESH_SQL = f"""
+SELECT source_version = ({_SOURCE_VERSION_SQL})
+FROM rollup_state
+WHERE view_name = %s
+"""
+
+
+def create_rollups(cursor: Any) -> None:
+    """Create the change trigger, the state table and (empty) rollup views."""
+    cursor.execute(f"CREATE SEQUENCE IF NOT EXISTS {CHANGE_SEQUENCE};")
+    cursor.execute(
+        f"""
+        CREATE OR REPLACE FUNCTION {SOURCE_TABLE}_bump_change_seq() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            PERFORM nextval('{CHANGE_SEQUENCE}');
+            RETURN NULL;
+        END;
+        $$;
+        """
+    )
+    cursor.execute(f"DROP TRIGGER IF EXISTS {SOURCE_TABLE}_change_seq ON {SOURCE_TABLE};")
+    cursor.execute(
+        f"""
+        CREATE TRIGGER {SOURCE_TABLE}_change_seq
+        AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {SOURCE_TABLE}
+        FOR EACH STATEMENT EXECUTE FUNCTION {SOURCE_TABLE}_bump_change_seq();
+        """
+    )
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS rollup_state (
+            view_name TEXT PRIMARY KEY,
+            source_version BIGINT NOT NULL,
+            refreshed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            refresh_seconds DOUBLE PRECISION
+        );
+        """
+    )
+    for name, view in ROLLUP_VIEWS.items():
+        cursor.execute(
+            f"CREATE MATERIALIZED VIEW IF NOT EXISTS {name} AS {view['definition']} WITH NO DATA;"
+        )
+        cursor.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS {name}_key ON {name} ({view['key']});")
+
+
+def refresh_rollups(conn: Any) -> Dict[str, float]:
+    """Refresh every rollup and record the source version it reflects.
+
+    Runs in one transaction holding a SHARE lock on the source table, so no
+    write can slip in between reading the change sequence and the refresh
+    snapshot. Returns seconds per view.
+    """
+    timings: Dict[str, float] = {}
+    with conn.cursor() as cursor:
+        create_rollups(cursor)
+        conn.commit()
+
+        cursor.execute(f"LOCK TABLE {SOURCE_TABLE} IN SHARE MODE;")
+        cursor.execute(_SOURCE_VERSION_SQL)
+        version = cursor.fetchone()[0]
+        for name in ROLLUP_VIEWS:
+            cursor.execute(
+                "SELECT relispopulated FROM pg_class WHERE oid = %s::regclass", (name,)
+            )
+            concurrently = "CONCURRENTLY " if cursor.fetchone()[0] else ""
+            started = time.perf_counter()
+            cursor.execute(f"REFRESH MATERIALIZED VIEW {concurrently}{name};")
+            timings[name] = time.perf_counter() - started
+            cursor.execute(
+                """
+                INSERT INTO rollup_state (view_name, source_version, refresh_seconds)
+                VALUES (%s, %s, %s)
+                ON CONFLICT (view_name) DO UPDATE
+                SET source_version = EXCLUDED.source_version,
+                    refreshed_at = CURRENT_TIMESTAMP,
+                    refresh_seconds = EXCLUDED.refresh_seconds
+                """,
+                (name, version, timings[name]),
+            )
+    conn.commit()
+    return timings
+
+
+def is_fresh(cursor: Any, view: str) -> bool:
+    """True when ``view`` was refreshed after the last write to the source table."""
+    try:
+        cursor.execute(_FRESH_SQL, (view,))
+    except psycopg2.Error:
+        # Rollups not installed yet (no loader run); use the base table.
+        return False
+    row = cursor.fetchone()
+    return bool(row and row[0])
+
+
+def choose_sql(cursor: Any, query: str) -> Optional[str]:
+    """SQL for a canned query: the rollup when fresh, the base table otherwise."""
+    spec = QUERIES.get(query)
+    if spec is None:
+        return None
+    return spec.rollup_sql if is_fresh(cursor, spec.view) else spec.base_sql
@@ -0,0 +1,405 @@
+import atexit
+import json
+import os
+import queue
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
+
+import psycopg2
+
+from . import db_pool, sql_parser
+
+_LITERAL_KINDS = frozenset({"string", "dollar", "number", "param"})
+_LITERAL_LIST_RE = re.compile(r"\?(?: , \?)+")
+_SCAN_NODES = ("Seq Scan", "Index Scan", "Index Only Scan", "Bitmap Heap Scan", "Tid Scan")
+ORDERS = {"total_time": "total_ms", "calls": "calls", "max_time": "max_ms", "slow_calls": "slow_calls"}
+
+_question: ContextVar[Optional[str]] = ContextVar("slow_query_question", default=None)
+
+
+def _log_config() -> Dict[str, Any]:
+    return {
+        "enabled": os.getenv("SLOW_QUERY_LOG_ENABLED", "true").lower() in ("1", "true", "yes"),
+        "path": os.getenv("SLOW_QUERY_LOG") or None,
+        "threshold_ms": float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "500")),
+        "explain": os.getenv("SLOW_QUERY_EXPLAIN", "false").lower() in ("1", "true", "yes"),
+        "explain_interval": float(os.getenv("SLOW_QUERY_EXPLAIN_INTERVAL", "300")),
+        "explain_timeout_ms": int(os.getenv("SLOW_QUERY_EXPLAIN_TIMEOUT_MS", "30000")),
+        "max_records": int(os.getenv("SLOW_QUERY_MAX_RECORDS", "5000")),
+        "flush_interval": float(os.getenv("SLOW_QUERY_FLUSH_INTERVAL", "30")),
+    }
+
+
+@contextmanager
+def question_context(question: Optional[str]) -> Iterator[None]:
+    """Attribute queries run inside the block to ``question``."""
+    token = _question.set(question)
+    try:
+        yield
+    finally:
+        _question.reset(token)
+
+
+def fingerprint(sql: str) -> str:
+    """Normalized statement with literals and IN lists collapsed to ``?``."""
+    words = [
+        "?" if token.kind in _LITERAL_KINDS else token.value if token.kind == "word" else token.text
+        for token in sql_parser.tokenize(sql)
+        if token.kind != "semicolon"
+    ]
+    return _LITERAL_LIST_RE.sub("?", " ".join(words))
+
+
+def _walk(node: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    yield node
+    for child in node.get("Plans", []):
+        yield from _walk(child)
+
+
+def plan_summary(plan: Dict[str, Any]) -> Dict[str, Any]:
+    """Rows scanned and buffer usage from an EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) plan."""
+    root = plan["Plan"]
+    scans = []
+    for node in _walk(root):
+        if node["Node Type"] not in _SCAN_NODES:
+            continue
+        loops = node.get("Actual Loops", 1)
+        scanned = (node.get("Actual Rows", 0) + node.get("Rows Removed by Filter", 0)) * loops
+        scans.append({
+            "node_type": node["Node Type"],
+            "relation": node.get("Relation Name"),
+            "index": node.get("Index Name"),
+            "rows_scanned": scanned,
+        })
+    return {
+        "rows_scanned": sum(scan["rows_scanned"] for scan in scans),
+        "shared_hit_blocks": root.get("Shared Hit Blocks", 0),
+        "shared_read_blocks": root.get("Shared Read Blocks", 0),
+        "temp_written_blocks": root.get("Temp Written Blocks", 0),
+        "execution_ms": plan.get("Execution Time"),
+        "scans": scans,
+    }
+
+
+class SlowQueryLog:
+    """Per-fingerprint timings of executed statements, plus a log of the slow ones.
+
+    Executions are aggregated in memory by :func:`fingerprint` and flushed to
+    SQLite every ``flush_interval`` seconds. Executions at or above
+    ``threshold_ms`` are also logged one by one with the question being
+    answered and, when ``explain`` is on, an ``EXPLAIN (ANALYZE, BUFFERS)``
+    summary. EXPLAIN ANALYZE runs the statement again, so it happens on a
+    background thread, at most once per fingerprint per ``explain_interval``.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        enabled: bool = True,
+        threshold_ms: float = 500.0,
+        explain: bool = False,
+        explain_interval: float = 300.0,
+        explain_timeout_ms: int = 30000,
+        max_records: int = 5000,
+        flush_interval: float = 30.0,
+    ) -> None:
+        self.path = path
+        self.enabled = enabled
+        self.threshold_ms = threshold_ms
+        self.explain = explain
+        self.explain_interval = explain_interval
+        self.explain_timeout_ms = explain_timeout_ms
+        self.max_records = max_records
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        # fingerprint -> aggregate since the last flush
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._flushed_at = time.monotonic()
+        self._explained_at: Dict[str, float] = {}
+        self._slow: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=256)
+        self._worker: Optional[threading.Thread] = None
+        self._stats = {"recorded": 0, "slow": 0, "explained": 0, "explain_errors": 0, "dropped": 0}
+        self._db = sqlite3.connect(path or ":memory:", check_same_thread=False, isolation_level=None)
+        if path:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            atexit.register(self.flush)
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS query_stats (
+                fingerprint TEXT PRIMARY KEY,
+                sample_sql TEXT NOT NULL,
+                calls INTEGER NOT NULL,
+                total_ms REAL NOT NULL,
+                max_ms REAL NOT NULL,
+                rows_returned INTEGER NOT NULL,
+                slow_calls INTEGER NOT NULL,
+                last_seen REAL NOT NULL
+            )
+            """
+        )
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS slow_queries (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                recorded_at REAL NOT NULL,
+                fingerprint TEXT NOT NULL,
+                sql TEXT NOT NULL,
+                question TEXT,
+                status TEXT NOT NULL,
+                wall_ms REAL NOT NULL,
+                rows_returned INTEGER,
+                rows_scanned INTEGER,
+                profile TEXT
+            )
+            """
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS slow_queries_fingerprint ON slow_queries (fingerprint, id)")
+
+    def record(
+        self,
+        sql: str,
+        seconds: float,
+        rows_returned: Optional[int] = None,
+        status: str = "ok",
+        executed_sql: Optional[str] = None,
+    ) -> None:
+        """Count one execution of ``sql``; ``executed_sql`` is what EXPLAIN should rerun."""
+        if not self.enabled:
+            return
+        key = fingerprint(sql)
+        wall_ms = seconds * 1000
+        slow = wall_ms >= self.threshold_ms
+        with self._lock:
+            self._stats["recorded"] += 1
+            entry = self._pending.get(key)
+            if entry is None:
+                entry = self._pending[key] = {
+                    "sql": sql, "calls": 0, "total_ms": 0.0, "max_ms": 0.0, "rows": 0, "slow_calls": 0,
+                }
+            entry["calls"] += 1
+            entry["total_ms"] += wall_ms
+            entry["max_ms"] = max(entry["max_ms"], wall_ms)
+            entry["rows"] += rows_returned or 0
+            entry["slow_calls"] += slow
+            due = time.monotonic() - self._flushed_at > self.flush_interval
+            if slow:
+                self._stats["slow"] += 1
+        if slow:
+            self._log_slow({
+                "recorded_at": time.time(),
+                "fingerprint": key,
+                "sql": sql,
+                "executed_sql": executed_sql or sql,
+                "question": _question.get(),
+                "status": status,
+                "wall_ms": round(wall_ms, 2),
+                "rows_returned": rows_returned,
+            })
+        if due:
+            self.flush()
+
+    def _log_slow(self, record: Dict[str, Any]) -> None:
+        if self._worker is None:
+            with self._lock:
+                if self._worker is None:
+                    self._worker = threading.Thread(target=self._run_worker, name="slow-query-log", daemon=True)
+                    self._worker.start()
+        try:
+            self._slow.put_nowait(record)
+        except queue.Full:
+            with self._lock:
+                self._stats["dropped"] += 1
+
+    def _run_worker(self) -> None:
+        while True:
+            record = self._slow.get()
+            try:
+                self._store_slow(record)
+            except Exception:
+                with self._lock:
+                    self._stats["dropped"] += 1
+
+    def _explain_due(self, key: str) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            last = self._explained_at.get(key)
+            if last is not None and now - last < self.explain_interval:
+                return False
+            self._explained_at[key] = now
+            if len(self._explained_at) > self.max_records:
+                self._explained_at.pop(next(iter(self._explained_at)))
+            return True
+
+    def _profile(self, sql: str) -> Dict[str, Any]:
+        try:
+            with db_pool.connection() as conn:
+                conn.autocommit = False
+                with conn.cursor() as cursor:
+                    cursor.execute("SET LOCAL statement_timeout = %s", (self.explain_timeout_ms,))
+                    cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}")
+                    plan = cursor.fetchone()[0][0]
+        except psycopg2.Error as e:
+            with self._lock:
+                self._stats["explain_errors"] += 1
+            return {"explain_error": str(e).strip()}
+        with self._lock:
+            self._stats["explained"] += 1
+        return {**plan_summary(plan), "plan": plan}
+
+    def _store_slow(self, record: Dict[str, Any]) -> None:
+        profile = None
+        if self.explain and record["status"] == "ok" and self._explain_due(record["fingerprint"]):
+            profile = self._profile(record["executed_sql"])
+        with self._db_lock:
+            self._db.execute(
+                """
+                INSERT INTO slow_queries
+                    (recorded_at, fingerprint, sql, question, status, wall_ms, rows_returned, rows_scanned, profile)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    record["recorded_at"], record["fingerprint"], record["sql"], record["question"],
+                    record["status"], record["wall_ms"], record["rows_returned"],
+                    (profile or {}).get("rows_scanned"),
+                    json.dumps(profile, default=str) if profile else None,
+                ),
+            )
+            self._db.execute(
+                "DELETE FROM slow_queries WHERE id <= (SELECT max(id) FROM slow_queries) - ?",
+                (self.max_records,),
+            )
+
+    def flush(self) -> None:
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._flushed_at = time.monotonic()
+        if not pending:
+            return
+        now = time.time()
+        with self._db_lock, self._db:
+            self._db.execute("BEGIN")
+            self._db.executemany(
+                """
+                INSERT INTO query_stats
+                    (fingerprint, sample_sql, calls, total_ms, max_ms, rows_returned, slow_calls, last_seen)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (fingerprint) DO UPDATE SET
+                    sample_sql = excluded.sample_sql,
+                    calls = calls + excluded.calls,
+                    total_ms = total_ms + excluded.total_ms,
+                    max_ms = max(max_ms, excluded.max_ms),
+                    rows_returned = rows_returned + excluded.rows_returned,
+                    slow_calls = slow_calls + excluded.slow_calls,
+                    last_seen = excluded.last_seen
+                """,
+                [
+                    (key, entry["sql"], entry["calls"], entry["total_ms"], entry["max_ms"],
+                     entry["rows"], entry["slow_calls"], now)
+                    for key, entry in pending.items()
+                ],
+            )
+            self._db.execute(
+                """
+                DELETE FROM query_stats WHERE fingerprint IN (
+                    SELECT fingerprint FROM query_stats ORDER BY last_seen DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_records,),
+            )
+
+    def top(self, order: str = "total_time", limit: int = 20) -> List[Dict[str, Any]]:
+        """Fingerprints with the most ``order`` (see ORDERS), each with its latest slow run."""
+        self.flush()
+        with self._db_lock:
+            rows = self._db.execute(
+                f"""
+                SELECT s.fingerprint, s.sample_sql, s.calls, s.total_ms, s.max_ms, s.rows_returned,
+                       s.slow_calls, s.last_seen, q.question, q.wall_ms, q.rows_scanned, q.recorded_at
+                FROM query_stats s
+                LEFT JOIN slow_queries q ON q.id = (
+                    SELECT max(id) FROM slow_queries WHERE fingerprint = s.fingerprint
+                )
+                ORDER BY s.{ORDERS[order]} DESC
+                LIMIT ?
+                """,
+                (limit,),
+            ).fetchall()
+        return [
+            {
+                "fingerprint": row[0],
+                "sql": row[1],
+                "calls": row[2],
+                "total_ms": round(row[3], 2),
+                "avg_ms": round(row[3] / row[2], 2) if row[2] else 0.0,
+                "max_ms": round(row[4], 2),
+                "rows_returned": row[5],
+                "slow_calls": row[6],
+                "last_seen": row[7],
+                "last_slow": None if row[11] is None else {
+                    "question": row[8],
+                    "wall_ms": row[9],
+                    "rows_scanned": row[10],
+                    "recorded_at": row[11],
+                },
+            }
+            for row in rows
+        ]
+
+    def recent(self, limit: int = 20, plans: bool = False) -> List[Dict[str, Any]]:
+        """The newest slow executions, with their profile when one was captured."""
+        with self._db_lock:
+            rows = self._db.execute(
+                """
+                SELECT recorded_at, sql, question, status, wall_ms, rows_returned, rows_scanned, profile
+                FROM slow_queries ORDER BY id DESC LIMIT ?
+                """,
+                (limit,),
+            ).fetchall()
+        records = []
+        for recorded_at, sql, question, status, wall_ms, rows_returned, rows_scanned, profile in rows:
+            profile = json.loads(profile) if profile else None
+            if profile is not None and not plans:
+                profile.pop("plan", None)
+            records.append({
+                "recorded_at": recorded_at,
+                "sql": sql,
+                "question": question,
+                "status": status,
+                "wall_ms": wall_ms,
+                "rows_returned": rows_returned,
+                "rows_scanned": rows_scanned,
+                "profile": profile,
+            })
+        return records
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats: Dict[str, Any] = dict(self._stats)
+        stats.update({
+            "enabled": self.enabled,
+            "threshold_ms": self.threshold_ms,
+            "explain": self.explain,
+            "path": self.path,
+            "pending_profiles": self._slow.qsize(),
+        })
+        return stats
+
+
+_query_log: Optional[SlowQueryLog] = None
+_query_log_lock = threading.Lock()
+
+
+def query_log() -> SlowQueryLog:
+    """Return the process-wide slow-query log, creating it on first use."""
+    global _query_log
+    if _query_log is None:
+        with _query_log_lock:
+            if _query_log is None:
+                _query_log = SlowQueryLog(**_log_config())
+    return _query_log
@@ -0,0 +1,149 @@
+import os
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+import psycopg2
+
+from . import sql_parser
+
+_JOIN_NODES = ("Nested Loop", "Hash Join", "Merge Join")
+# A join node with none of these has no join condition at all: a cartesian product.
+_JOIN_CONDITIONS = ("Hash Cond", "Merge Cond", "Join Filter")
+
+
+def _guard_config() -> Dict[str, Any]:
+    return {
+        "enabled": os.getenv("QUERY_GUARD_ENABLED", "true").lower() in ("1", "true", "yes"),
+        "max_cost": float(os.getenv("QUERY_MAX_PLAN_COST", "1000000")),
+        "max_rows": float(os.getenv("QUERY_MAX_PLAN_ROWS", "10000000")),
+        "statement_timeout_ms": int(os.getenv("QUERY_STATEMENT_TIMEOUT_MS", "15000")),
+    }
+
+
+def limit_sql(sql: str, limit: int) -> str:
+    """Wrap ``sql`` so Postgres stops after ``limit`` rows.
+
+    Trailing semicolons and comments are dropped first (``SELECT 1; -- done``
+    would otherwise end up inside the parentheses); the newline before the
+    closing parenthesis keeps a ``--`` comment on the last line from
+    swallowing it.
+    """
+    inner = sql_parser.strip_statement_end(sql)
+    return f"SELECT * FROM (\n{inner}\n) AS _q LIMIT {int(limit)}"
+
+
+def _walk(node: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    yield node
+    for child in node.get("Plans", []):
+        yield from _walk(child)
+
+
+def _describe(node: Dict[str, Any]) -> Dict[str, Any]:
+    described = {"node_type": node["Node Type"], "estimated_rows": node.get("Plan Rows")}
+    if node.get("Relation Name"):
+        described["relation"] = node["Relation Name"]
+    return described
+
+
+def review_plan(plan: Dict[str, Any], max_cost: float, max_rows: float) -> Optional[Dict[str, Any]]:
+    """Return a structured rejection reason for an EXPLAIN (FORMAT JSON) plan, or None."""
+    root = plan["Plan"]
+    nodes = list(_walk(root))
+    seq_scans: List[Dict[str, Any]] = [
+        _describe(node) for node in nodes if node["Node Type"] == "Seq Scan"
+    ]
+
+    for node in nodes:
+        if node["Node Type"] in _JOIN_NODES and node.get("Plan Rows", 0) > max_rows:
+            cartesian = not any(key in node for key in _JOIN_CONDITIONS) and not any(
+                "Index Cond" in child for child in _walk(node)
+            )
+            return {
+                "code": "plan_rows_exceeded",
+                "estimated_rows": node["Plan Rows"],
+                "max_rows": max_rows,
+                "node": _describe(node),
+                "cartesian_join": cartesian,
+                "seq_scans": seq_scans,
+                "hint": (
+                    "A join is estimated to produce too many rows"
+                    + (" and has no join condition (cartesian product)" if cartesian else "")
+                    + ". Add join conditions or filters, or aggregate before joining."
+                ),
+            }
+
+    if root["Total Cost"] > max_cost:
+        return {
+            "code": "plan_cost_exceeded",
+            "estimated_cost": root["Total Cost"],
+            "max_cost": max_cost,
+            "estimated_rows": root.get("Plan Rows"),
+            "node": _describe(root),
+            "seq_scans": seq_scans,
+            "hint": (
+                "The query is estimated to be too expensive. Filter on indexed columns, "
+                "narrow the date range, or aggregate instead of selecting raw rows."
+            ),
+        }
+    return None
+
+
+class QueryGuard:
+    """Pre-execution checks for agent-written SQL.
+
+    ``prepare()`` runs inside the transaction the query will use: it sets a
+    ``SET LOCAL statement_timeout`` and reviews the ``EXPLAIN (FORMAT JSON)``
+    plan of the already LIMIT-wrapped statement, so the cost it sees is the
+    cost of producing the rows that will actually be fetched.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        max_cost: float = 1_000_000.0,
+        max_rows: float = 10_000_000.0,
+        statement_timeout_ms: int = 15000,
+    ) -> None:
+        self.enabled = enabled
+        self.max_cost = max_cost
+        self.max_rows = max_rows
+        self.statement_timeout_ms = statement_timeout_ms
+
+    def prepare(self, conn: Any, sql: str, tables: Sequence[str] = ()) -> Optional[Dict[str, Any]]:
+        """Set the timeout and review the plan; ``tables`` (from sql_parser) is echoed in rejections."""
+        with conn.cursor() as cursor:
+            if self.statement_timeout_ms > 0:
+                cursor.execute("SET LOCAL statement_timeout = %s", (self.statement_timeout_ms,))
+            if not self.enabled:
+                return None
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}")
+            plan = cursor.fetchone()[0][0]
+        reason = review_plan(plan, self.max_cost, self.max_rows)
+        if reason is not None:
+            reason["tables"] = list(tables)
+        return reason
+
+    def timeout_reason(self, tables: Sequence[str] = ()) -> Dict[str, Any]:
+        return {
+            "code": "statement_timeout",
+            "timeout_ms": self.statement_timeout_ms,
+            "tables": list(tables),
+            "hint": "The query ran past the statement timeout. Narrow it with filters or aggregation.",
+        }
+
+    def error_reason(self, error: psycopg2.Error, tables: Sequence[str] = ()) -> Dict[str, Any]:
+        """Structured reason for a statement Postgres refused to plan or run."""
+        diag = error.diag
+        return {
+            "code": "query_error",
+            "sqlstate": error.pgcode,
+            "message": diag.message_primary or str(error).strip(),
+            "detail": diag.message_detail,
+            "tables": list(tables),
+            "hint": diag.message_hint or (
+                "Postgres rejected the query. Check column and table names against the schema."
+            ),
+        }
+
+
+def create_guard() -> QueryGuard:
+    return QueryGuard(**_guard_config())
@@ -0,0 +1,360 @@
+import re
+from functools import lru_cache
+from typing import List, NamedTuple, Optional, Set, Tuple
+
+# One pass over the statement. Comments and literals are single tokens, so
+# keywords inside them (a ' create ' in a string, a -- drop comment) never
+# reach the checks below. Backslash only escapes inside E'...' strings: with
+# standard_conforming_strings on (the default) '\' is a complete literal.
+_TOKEN_RE = re.compile(
+    r"""
+    (?P<ws>\s+)
+  | (?P<comment>--[^\n]*|/\*.*?\*/)
+  | (?P<string>'(?:[^']|'')*')
+  | (?P<estring>[eE]'(?:[^'\\]|''|\\.)*')
+  | (?P<dollar>\$(?P<tag>[A-Za-z_]*)\$.*?\$(?P=tag)\$)
+  | (?P<quoted>"(?:[^"]|"")*")
+  | (?P<number>\d+(?:\.\d*)?(?:[eE][-+]?\d+)?|\.\d+(?:[eE][-+]?\d+)?)
+  | (?P<param>\$\d+|%\(\w+\)s|%s)
+  | (?P<word>[A-Za-z_][A-Za-z0-9_$]*)
+  | (?P<semicolon>;)
+  | (?P<op>::|<=|>=|<>|!=|\|\||[-+*/%^<>=~!@#&|`?(),.\[\]:])
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+
+READONLY_STATEMENTS = frozenset({"select", "with"})
+
+# Data-modifying statements Postgres accepts after a WITH clause or inside a
+# CTE, with the word that follows each when it opens a statement (None: a
+# table name). Elsewhere these words are ordinary column names or aliases;
+# every other statement is caught because the query must start with
+# SELECT/WITH.
+WRITE_STATEMENTS = {"insert": "into", "merge": "into", "delete": "from", "update": None}
+
+# SELECT ... FOR UPDATE / NO KEY UPDATE / SHARE / KEY SHARE take row locks.
+_LOCKING_CLAUSES = frozenset({"update", "no", "share", "key"})
+
+FORBIDDEN_FUNCTIONS = frozenset({
+    "pg_sleep", "pg_sleep_for", "pg_sleep_until",
+    "pg_read_file", "pg_read_binary_file", "pg_ls_dir", "pg_stat_file",
+    "pg_ls_logdir", "pg_ls_waldir", "pg_ls_tmpdir", "pg_ls_archive_statusdir",
+    "lo_import", "lo_export", "lo_from_bytea", "lo_put", "lo_unlink",
+    "pg_terminate_backend", "pg_cancel_backend", "pg_reload_conf", "pg_rotate_logfile",
+    "pg_promote", "pg_switch_wal", "pg_create_restore_point",
+    "set_config", "nextval", "setval",
+    "dblink", "dblink_exec", "dblink_connect", "dblink_send_query",
+    "query_to_xml", "query_to_xml_and_xmlschema", "table_to_xml", "cursor_to_xml",
+    "pg_notify", "txid_current", "pg_current_xact_id",
+})
+
+_FORBIDDEN_FUNCTION_PREFIXES = ("pg_advisory_", "pg_try_advisory_", "pg_logical_", "pg_replication_")
+
+# Settings that would let a pooled connection write; refused by name even if
+# set_config() is ever allowed for other settings.
+_READ_ONLY_SETTINGS = frozenset({"transaction_read_only", "default_transaction_read_only"})
+
+# Words treated as SQL syntax rather than table/column names.
+KEYWORDS = frozenset({
+    "select", "from", "where", "group", "by", "order", "having", "limit", "offset",
+    "join", "inner", "left", "right", "full", "outer", "cross", "natural", "lateral",
+    "on", "using", "as", "and", "or", "not", "in", "is", "null", "true", "false",
+    "like", "ilike", "similar", "escape", "between", "case", "when", "then", "else", "end",
+    "distinct", "all", "any", "some", "exists", "union", "intersect", "except",
+    "with", "recursive", "materialized", "asc", "desc", "nulls", "first", "last",
+    "over", "partition", "rows", "range", "groups", "window", "filter", "within",
+    "unbounded", "preceding", "following", "current", "row", "exclude", "ties", "others",
+    "fetch", "next", "only", "values", "collate", "at", "zone", "cast", "extract",
+    "current_date", "current_time", "current_timestamp", "localtime", "localtimestamp",
+    "current_user", "session_user", "user", "default", "array", "tablesample",
+    "grouping", "sets", "cube", "rollup", "ordinality", "for", "of", "share", "nowait",
+    "skip", "locked", "no", "key", "percent",
+})
+
+# Type names that are only syntax when they prefix a literal (date '2024-01-01');
+# elsewhere they are ordinary identifiers (chocolate_sales.date).
+_TYPED_LITERAL_WORDS = frozenset({"date", "time", "timestamp", "timestamptz", "interval"})
+
+_TABLE_INTRODUCERS = frozenset({"from", "join"})
+# Clauses that end a FROM list; JOIN ... ON/USING does not (FROM a JOIN b ON .., c).
+_FROM_LIST_END = frozenset({
+    "where", "group", "order", "having", "limit", "offset", "union", "intersect",
+    "except", "window", "fetch", "for",
+})
+
+
+class SqlAnalysis(NamedTuple):
+    readonly: bool
+    reason: Optional[str]
+    statement: Optional[str]
+    tables: Tuple[str, ...]
+    columns: Tuple[str, ...]
+    normalized: str
+
+
+class _Token(NamedTuple):
+    kind: str
+    text: str
+    value: str
+
+
+def tokenize(sql: str) -> List[_Token]:
+    """Split ``sql`` into tokens, dropping whitespace and comments.
+
+    ``value`` is the lowercased text for words, the unquoted name for quoted
+    identifiers and the raw text otherwise.
+    """
+    tokens: List[_Token] = []
+    position = 0
+    for match in _TOKEN_RE.finditer(sql):
+        if match.start() != position:
+            break
+        position = match.end()
+        kind = match.lastgroup
+        if kind == "tag":
+            kind = "dollar"
+        elif kind == "estring":
+            kind = "string"
+        if kind in ("ws", "comment"):
+            continue
+        text = match.group()
+        if kind == "word":
+            value = text.lower()
+        elif kind == "quoted":
+            value = text[1:-1].replace('""', '"')
+        else:
+            value = text
+        tokens.append(_Token(kind, text, value))
+    if position != len(sql):
+        # Unterminated literal/comment or a character we do not know.
+        tokens.append(_Token("invalid", sql[position:], sql[position:]))
+    return tokens
+
+
+def strip_statement_end(sql: str) -> str:
+    """``sql`` without the trailing semicolons, comments and whitespace.
+
+    Text the tokenizer cannot read is returned stripped but otherwise as is,
+    for Postgres to reject.
+    """
+    end = position = 0
+    for match in _TOKEN_RE.finditer(sql):
+        if match.start() != position:
+            break
+        position = match.end()
+        if match.lastgroup not in ("ws", "comment", "semicolon"):
+            end = position
+    if position != len(sql):
+        return sql.strip()
+    return sql[:end].lstrip()
+
+
+def string_value(token: _Token) -> str:
+    """The contents of a string or dollar-quoted literal; other tokens give their text."""
+    if token.kind == "dollar":
+        return token.text[token.text.index("$", 1) + 1:token.text.rindex("$", 0, -1)]
+    if token.kind != "string":
+        return token.text
+    if token.text[0] in "eE":
+        return re.sub(r"\\(.)", r"\1", token.text[2:-1].replace("''", "'"), flags=re.DOTALL)
+    return token.text[1:-1].replace("''", "'")
+
+
+def is_name(token: Optional[_Token]) -> bool:
+    return token is not None and (
+        token.kind == "quoted" or (token.kind == "word" and token.value not in KEYWORDS)
+    )
+
+
+def read_qualified(tokens: List[_Token], i: int) -> Tuple[str, int]:
+    parts = [tokens[i].value]
+    i += 1
+    while i + 1 < len(tokens) and tokens[i].text == "." and is_name(tokens[i + 1]):
+        parts.append(tokens[i + 1].value)
+        i += 2
+    return ".".join(parts), i
+
+
+def _extract(tokens: List[_Token]) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+    tables: Set[str] = set()
+    ctes: Set[str] = set()
+    aliases: Set[str] = set()
+    functions: Set[str] = set()
+    columns: Set[str] = set()
+
+    # CTE names: (WITH [RECURSIVE] | ,) name [ (cols) ] AS [NOT] [MATERIALIZED] (
+    for i, token in enumerate(tokens):
+        if (
+            token.kind in ("word", "quoted")
+            and 0 < i < len(tokens) - 1
+            and tokens[i - 1].value in ("with", "recursive", ",")
+        ):
+            j = i + 1
+            if tokens[j].text == "(":
+                depth = 0
+                while j < len(tokens):
+                    depth += tokens[j].text == "("
+                    depth -= tokens[j].text == ")"
+                    j += 1
+                    if depth == 0:
+                        break
+            if j < len(tokens) and tokens[j].value == "as":
+                k = j + 1
+                while k < len(tokens) and tokens[k].value in ("not", "materialized"):
+                    k += 1
+                if k < len(tokens) and tokens[k].text == "(" and token.value not in KEYWORDS:
+                    ctes.add(token.value)
+
+    # FROM/JOIN table references, including comma-separated FROM lists.
+    # FROM inside a function call (extract(month FROM date)) is not a clause.
+    depth = 0
+    from_depths: List[int] = []
+    in_call: List[bool] = [False]
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        if token.text == "(":
+            depth += 1
+            previous = tokens[i - 1] if i else None
+            in_call.append(
+                previous is not None
+                and previous.kind in ("word", "quoted")
+                and (previous.value not in KEYWORDS or previous.value in ("extract", "cast"))
+            )
+        elif token.text == ")":
+            depth -= 1
+            if len(in_call) > 1:
+                in_call.pop()
+            while from_depths and from_depths[-1] > depth:
+                from_depths.pop()
+        elif token.kind == "word" and token.value in _FROM_LIST_END:
+            while from_depths and from_depths[-1] == depth:
+                from_depths.pop()
+
+        is_clause = token.kind == "word" and token.value in _TABLE_INTRODUCERS and not in_call[-1]
+        expects_table = is_clause
+        if token.text == "," and from_depths and from_depths[-1] == depth:
+            expects_table = True
+        if is_clause and token.value == "from":
+            from_depths.append(depth)
+
+        if expects_table:
+            j = i + 1
+            if j < len(tokens) and tokens[j].value in ("lateral", "only"):
+                j += 1
+            if is_name(tokens[j] if j < len(tokens) else None):
+                name, j = read_qualified(tokens, j)
+                if j < len(tokens) and tokens[j].text == "(":
+                    functions.add(name)
+                elif name not in ctes:
+                    tables.add(name)
+                if j < len(tokens) and tokens[j].value == "as":
+                    j += 1
+                if is_name(tokens[j] if j < len(tokens) else None):
+                    aliases.add(tokens[j].value)
+                    j += 1
+                i = j
+                continue
+        i += 1
+
+    table_names = tables | {name.rsplit(".", 1)[-1] for name in tables}
+    for i, token in enumerate(tokens):
+        if not is_name(token):
+            continue
+        previous = tokens[i - 1] if i else None
+        following = tokens[i + 1] if i + 1 < len(tokens) else None
+        if following is not None and following.text == "(":
+            functions.add(token.value)
+            continue
+        if following is not None and following.text == ".":
+            continue  # qualifier; the column is the next name
+        if previous is not None and (
+            previous.value == "as" or previous.text == ")" or is_name(previous)
+            or previous.kind in ("number", "string")
+        ):
+            # "expr AS alias" or the bare "expr alias" form.
+            aliases.add(token.value)
+            continue
+        if token.value in _TYPED_LITERAL_WORDS and following is not None and following.kind == "string":
+            continue
+        if previous is not None and previous.text == "::":
+            continue  # type name in a cast
+        columns.add(token.value)
+
+    columns -= table_names | ctes | aliases | functions
+    return tuple(sorted(tables)), tuple(sorted(columns))
+
+
+def _verdict(tokens: List[_Token]) -> Tuple[bool, Optional[str], Optional[str]]:
+    if not tokens:
+        return False, "empty statement", None
+    for token in tokens:
+        if token.kind == "invalid":
+            return False, "unterminated string, identifier or comment", None
+    first = next((token for token in tokens if token.text != "("), tokens[0])
+    statement = first.value if first.kind == "word" else None
+    if statement not in READONLY_STATEMENTS:
+        return False, "only SELECT/WITH statements are allowed", statement
+
+    for i, token in enumerate(tokens):
+        if token.kind == "semicolon":
+            if any(rest.kind != "semicolon" for rest in tokens[i + 1:]):
+                return False, "multiple statements are not allowed", statement
+            break
+        previous = tokens[i - 1] if i else None
+        following = tokens[i + 1] if i + 1 < len(tokens) else None
+        # After a dot any keyword is a column name (t.into, t.do).
+        if token.kind == "word" and (previous is None or previous.text != "."):
+            # INTO is reserved, so it is always SELECT ... INTO (creates a table).
+            if token.value == "into":
+                return False, "SELECT ... INTO is not allowed in a read-only query", statement
+            if token.value == "for" and following is not None and (
+                following.kind == "word" and following.value in _LOCKING_CLAUSES
+            ):
+                return False, "FOR UPDATE/SHARE row locks are not allowed", statement
+            if previous is not None and previous.text in ("(", ")") and _opens_write(token, following):
+                return False, f"{token.value.upper()} is not allowed in a read-only query", statement
+        if token.kind not in ("word", "quoted"):
+            continue
+        if following is None or following.text != "(":
+            continue
+        # "pg_sleep"(1) calls pg_sleep too; compare quoted names case-folded.
+        name = token.value.lower()
+        if name == "set_config":
+            argument = tokens[i + 2] if i + 2 < len(tokens) else None
+            if argument is not None and string_value(argument).lower() in _READ_ONLY_SETTINGS:
+                return False, "set_config() cannot change transaction_read_only", statement
+        if name in FORBIDDEN_FUNCTIONS or name.startswith(_FORBIDDEN_FUNCTION_PREFIXES):
+            return False, f"function {name}() is not allowed", statement
+    return True, None, statement
+
+
+def _opens_write(token: _Token, following: Optional[_Token]) -> bool:
+    if token.value not in WRITE_STATEMENTS or following is None:
+        return False
+    expected = WRITE_STATEMENTS[token.value]
+    if expected is None:
+        return is_name(following)
+    return following.kind == "word" and following.value == expected
+
+
+def _normalize(tokens: List[_Token]) -> str:
+    words = [
+        token.value if token.kind == "word" else token.text
+        for token in tokens
+        if token.kind != "semicolon"
+    ]
+    return " ".join(words)
+
+
+@lru_cache(maxsize=2048)
+def analyze_sql(sql: str) -> SqlAnalysis:
+    """Tokenize ``sql`` once and return its verdict and referenced objects.
+
+    Results are cached per statement text, so the validator, the result
+    cache and the query guard all share one parse.
+    """
+    tokens = tokenize(sql)
+    readonly, reason, statement = _verdict(tokens)
+    tables, columns = _extract(tokens) if readonly else ((), ())
+    return SqlAnalysis(readonly, reason, statement, tables, columns, _normalize(tokens))
@@ -0,0 +1,292 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from . import metrics
+
+# Statuses worth retrying for idempotent calls (session create).
+RETRY_STATUSES = (502, 503, 504)
+# Session-create statuses meaning the session now exists (ADK answers 400/409
+# when it already did).
+SESSION_EXISTS_STATUSES = (400, 409)
+
+
+def _client_config() -> Dict[str, Any]:
+    return {
+        "pool_connections": int(os.getenv("ADK_HTTP_POOL_CONNECTIONS", "4")),
+        "pool_maxsize": int(os.getenv("ADK_HTTP_POOL_MAXSIZE", "32")),
+        "retries": int(os.getenv("ADK_HTTP_RETRIES", "3")),
+        "backoff": float(os.getenv("ADK_HTTP_BACKOFF", "0.5")),
+        "session_timeout": float(os.getenv("ADK_SESSION_TIMEOUT", "10")),
+        "run_timeout": float(os.getenv("ADK_RUN_TIMEOUT", "60")),
+        "session_cache_size": int(os.getenv("ADK_SESSION_CACHE_SIZE", "10000")),
+        "session_cache_ttl": float(os.getenv("ADK_SESSION_CACHE_TTL", "600")),
+    }
+
+
+def _run_payload(app_name: str, user_id: str, session_id: str, text: str) -> Dict[str, Any]:
+    return {
+        "appName": app_name,
+        "userId": user_id,
+        "sessionId": session_id,
+        "newMessage": {
+            "role": "user",
+            "parts": [{"text": text}],
+        },
+    }
+
+
+def _session_missing(status: int, body: str) -> bool:
+    return status == 404 and "session" in body.lower()
+
+
+class SessionCache:
+    """Bounded LRU of ``(app, user, session)`` keys known to exist on the ADK server.
+
+    Entries expire ``ttl`` seconds after they were last confirmed, so a
+    restarted ADK server (whose in-memory sessions are gone) is noticed even
+    without a failed ``/run``.
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl: float = 600.0) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[str, str, str], float]" = OrderedDict()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "invalidations": 0}
+
+    def contains(self, key: Tuple[str, str, str]) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            expires_at = self._entries.get(key)
+            if expires_at is not None and expires_at > now:
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return True
+            if expires_at is not None:
+                del self._entries[key]
+                self._stats["expirations"] += 1
+            self._stats["misses"] += 1
+            return False
+
+    def add(self, key: Tuple[str, str, str]) -> None:
+        with self._lock:
+            self._entries[key] = time.monotonic() + self.ttl
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def discard(self, key: Tuple[str, str, str]) -> None:
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self._stats["invalidations"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["size"] = len(self._entries)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        stats["max_entries"] = self.max_entries
+        stats["ttl"] = self.ttl
+        return stats
+
+
+class AdkClient:
+    """Keep-alive HTTP client for the ADK API server.
+
+    All calls share one ``requests.Session`` whose adapters keep up to
+    ``pool_maxsize`` connections per host and block instead of opening more.
+    Retries are left to urllib3: connection failures are retried with backoff
+    for every call (nothing was sent), and session URLs, whose calls are
+    idempotent, get an adapter of their own that also retries read errors and
+    502/503/504. ``/run`` is never re-sent once it reached the server.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        app_name: str,
+        pool_connections: int = 4,
+        pool_maxsize: int = 32,
+        retries: int = 3,
+        backoff: float = 0.5,
+        session_timeout: float = 10.0,
+        run_timeout: float = 60.0,
+        session_cache_size: int = 10000,
+        session_cache_ttl: float = 600.0,
+    ) -> None:
+        self.base_url = base_url.rstrip("/")
+        self.app_name = app_name
+        self.retries = retries
+        self.backoff = backoff
+        self.session_timeout = session_timeout
+        self.run_timeout = run_timeout
+        self.sessions = SessionCache(session_cache_size, session_cache_ttl)
+        self._stats_lock = threading.Lock()
+        self._stats = {"session_creates": 0, "session_recreates": 0, "session_deletes": 0, "runs": 0}
+
+        retry = Retry(
+            total=None,
+            connect=retries,
+            read=0,
+            status=0,
+            other=0,
+            redirect=0,
+            backoff_factor=backoff,
+            allowed_methods=None,
+        )
+        session_retry = Retry(
+            total=None,
+            connect=retries,
+            read=retries,
+            status=retries,
+            other=0,
+            redirect=0,
+            backoff_factor=backoff,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=None,
+            # Hand the last 5xx back to the caller instead of raising.
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=True,
+            max_retries=retry,
+        )
+        session_adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=True,
+            max_retries=session_retry,
+        )
+        self._http = requests.Session()
+        self._http.mount("http://", adapter)
+        self._http.mount("https://", adapter)
+        # requests picks the longest matching prefix, so session create and
+        # delete go through the adapter that retries them.
+        self._http.mount(f"{self.base_url}/apps/", session_adapter)
+
+    def session_url(self, user_id: str, session_id: str) -> str:
+        return f"{self.base_url}/apps/{self.app_name}/users/{user_id}/sessions/{session_id}"
+
+    def create_session(self, user_id: str, session_id: str) -> requests.Response:
+        """Create the session; an already existing session is not an error for callers."""
+        with metrics.stage("adk_session_create"):
+            return self._http.post(
+                self.session_url(user_id, session_id), json={}, timeout=self.session_timeout
+            )
+
+    def _count(self, name: str) -> None:
+        with self._stats_lock:
+            self._stats[name] += 1
+
+    def ensure_session(self, user_id: str, session_id: str) -> None:
+        """Create the session unless it is already known to exist."""
+        key = (self.app_name, user_id, session_id)
+        if self.sessions.contains(key):
+            return
+        resp = self.create_session(user_id, session_id)
+        self._count("session_creates")
+        if resp.ok or resp.status_code in SESSION_EXISTS_STATUSES:
+            self.sessions.add(key)
+
+    def delete_session(self, user_id: str, session_id: str) -> None:
+        """Best-effort delete of a session that is no longer used."""
+        key = (self.app_name, user_id, session_id)
+        self.sessions.discard(key)
+        try:
+            self._http.delete(self.session_url(user_id, session_id), timeout=self.session_timeout)
+            self._count("session_deletes")
+        except requests.RequestException:
+            pass
+
+    def run(self, user_id: str, session_id: str, text: str) -> requests.Response:
+        """POST one user message to ``/run`` and return the raw response.
+
+        If ADK reports the session as missing (e.g. after an ADK restart), the
+        session is recreated and the message sent once more.
+        """
+        self._count("runs")
+        key = (self.app_name, user_id, session_id)
+        payload = _run_payload(self.app_name, user_id, session_id, text)
+        with metrics.stage("adk_run"):
+            resp = self._http.post(f"{self.base_url}/run", json=payload, timeout=self.run_timeout)
+            if _session_missing(resp.status_code, resp.text):
+                self.sessions.discard(key)
+                self._count("session_recreates")
+                self.ensure_session(user_id, session_id)
+                resp = self._http.post(f"{self.base_url}/run", json=payload, timeout=self.run_timeout)
+        if resp.ok:
+            self.sessions.add(key)
+        return resp
+
+    def run_sse(self, user_id: str, session_id: str, text: str) -> Iterator[Dict[str, Any]]:
+        """Stream ``/run_sse`` events (with token-level partials) as they arrive.
+
+        Raises ``requests.RequestException`` from the first iteration when ADK
+        cannot be reached or rejects the run; a missing session is recreated
+        once, as in :meth:`run`.
+        """
+        self._count("runs")
+        started = time.perf_counter()
+        key = (self.app_name, user_id, session_id)
+        payload = dict(_run_payload(self.app_name, user_id, session_id, text), streaming=True)
+        resp = self._http.post(
+            f"{self.base_url}/run_sse", json=payload, timeout=self.run_timeout, stream=True
+        )
+        if _session_missing(resp.status_code, resp.text if resp.status_code == 404 else ""):
+            resp.close()
+            self.sessions.discard(key)
+            self._count("session_recreates")
+            self.ensure_session(user_id, session_id)
+            resp = self._http.post(
+                f"{self.base_url}/run_sse", json=payload, timeout=self.run_timeout, stream=True
+            )
+        first_event = True
+        with resp:
+            resp.raise_for_status()
+            self.sessions.add(key)
+            for line in resp.iter_lines(chunk_size=None, decode_unicode=True):
+                if line and line.startswith("data:"):
+                    if first_event:
+                        metrics.observe_stage("adk_run_sse_first_event", time.perf_counter() - started)
+                        first_event = False
+                    yield json.loads(line[5:].strip())
+        metrics.observe_stage("adk_run_sse", time.perf_counter() - started)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            stats: Dict[str, Any] = dict(self._stats)
+        stats["session_cache"] = self.sessions.stats()
+        stats["session_round_trips_saved"] = stats["session_cache"]["hits"]
+        return stats
+
+    def close(self) -> None:
+        self._http.close()
+
+
+_clients: Dict[Any, AdkClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(base_url: str, app_name: str) -> AdkClient:
+    """Return the process-wide pooled client for ``base_url``/``app_name``."""
+    key = (base_url, app_name)
+    client: Optional[AdkClient] = _clients.get(key)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(key)
+            if client is None:
+                client = AdkClient(base_url, app_name, **_client_config())
+                _clients[key] = client
+    return client
@@ -0,0 +1,273 @@
+import copy
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Applied in order to the lowercased question, so paraphrases of the same
+# request normalize to the same words before exact or TF-IDF matching.
+_SYNONYMS: List[Tuple["re.Pattern", str]] = [
+    (re.compile(pattern), replacement)
+    for pattern, replacement in [
+        (r"\b(?:who sold the most|best performing sales ?people|highest selling sales ?people)\b",
+         "top sales people"),
+        (r"\b(?:best|biggest|leading) (sellers|sales ?people|sales ?persons|sales reps?)\b", r"top \1"),
+        (r"\b(?:salespeople|sales ?persons|sales reps?|sellers|reps)\b", "sales people"),
+        (r"\bhow much (?:did we|have we) sell\b", "total sales"),
+        (r"\b(?:revenue|turnover|income)\b", "sales"),
+        (r"\bper\b", "by"),
+        (r"\b(?:nations?|countries)\b", "country"),
+        (r"\bproducts\b", "product"),
+        (r"\bmonthly\b", "by month"),
+    ]
+]
+
+_STOPWORDS = frozenset({
+    "a", "an", "the", "of", "for", "to", "in", "on", "me", "us", "our", "we", "i", "is", "are",
+    "was", "were", "what", "which", "show", "list", "give", "tell", "please", "can", "you",
+    "could", "would", "do", "does", "did", "all", "with", "and", "by", "about", "from",
+})
+
+# Follow-ups that lean on the previous turn ("what about India?") cannot be
+# answered from a cache keyed on the question alone.
+_CONTEXT_DEPENDENT_RE = re.compile(
+    r"^(?:and|also|what about|how about|same|now|then|instead)\b|\b(?:it|those|these|them|previous)\b"
+)
+_TOKEN_RE = re.compile(r"[a-z0-9%]+(?:[.'-][a-z0-9]+)*")
+
+
+def _cache_config() -> Dict[str, Any]:
+    return {
+        "enabled": os.getenv("ANSWER_CACHE_ENABLED", "true").lower() in ("1", "true", "yes"),
+        "max_entries": int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "512")),
+        "ttl": float(os.getenv("ANSWER_CACHE_TTL", "3600")),
+        "threshold": float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.85")),
+        "embedding_model": os.getenv("ANSWER_CACHE_EMBEDDING_MODEL") or None,
+    }
+
+
+def normalize_question(question: str) -> str:
+    text = " ".join(question.lower().split())
+    for pattern, replacement in _SYNONYMS:
+        text = pattern.sub(replacement, text)
+    return " ".join(token for token in _TOKEN_RE.findall(text) if token not in _STOPWORDS)
+
+
+def _features(normalized: str) -> Counter:
+    # Unordered bigrams: "sales by month" and "monthly sales" share "month sales".
+    words = normalized.split()
+    return Counter(words + [" ".join(sorted(pair)) for pair in zip(words, words[1:])])
+
+
+def _numbers(normalized: str) -> Tuple[str, ...]:
+    # "top 5" and "top 10" are different questions however similar the text.
+    return tuple(sorted(token for token in normalized.split() if any(c.isdigit() for c in token)))
+
+
+def _load_embedder(model_name: Optional[str]) -> Optional[Callable[[str], List[float]]]:
+    """A local sentence-transformers model, if one is configured and installed."""
+    if not model_name:
+        return None
+    try:
+        from sentence_transformers import SentenceTransformer
+    except ImportError:
+        return None
+    model = SentenceTransformer(model_name)
+
+    def embed(text: str) -> List[float]:
+        return [float(value) for value in model.encode(text, normalize_embeddings=True)]
+
+    return embed
+
+
+class AnswerCache:
+    """LRU cache of agent answers keyed on normalized question text.
+
+    A lookup first tries the exact normalized question, then the most similar
+    cached question (cosine over TF-IDF word/bigram vectors, or over local
+    embeddings when ``embedding_model`` names an installed
+    sentence-transformers model). A match at or above ``threshold`` is served
+    only while it is younger than ``ttl`` and ``snapshot(sql)`` (the data
+    versions of the tables its SQL reads) is unchanged since it was stored.
+    ``snapshot`` returns None when the versions cannot be read (database
+    down): lookups then miss and answers are not stored, so the request is
+    answered by the agent as if the cache were off.
+    """
+
+    def __init__(
+        self,
+        snapshot: Callable[[str], Optional[Dict[str, str]]],
+        enabled: bool = True,
+        max_entries: int = 512,
+        ttl: float = 3600.0,
+        threshold: float = 0.85,
+        embedding_model: Optional[str] = None,
+    ) -> None:
+        self.snapshot = snapshot
+        self.enabled = enabled
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.threshold = threshold
+        self._embed = _load_embedder(embedding_model) if enabled else None
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._document_frequency: Counter = Counter()
+        self._stats = {
+            "hits": 0,
+            "similar_hits": 0,
+            "misses": 0,
+            "stale": 0,
+            "expired": 0,
+            "skipped": 0,
+            "evictions": 0,
+            "invalidations": 0,
+            "snapshot_errors": 0,
+        }
+
+    @property
+    def similarity(self) -> str:
+        return "embedding" if self._embed else "tfidf"
+
+    def _tfidf(self, features: Counter) -> Dict[str, float]:
+        documents = len(self._entries) + 1
+        vector = {
+            feature: count * (math.log((1 + documents) / (1 + self._document_frequency[feature])) + 1)
+            for feature, count in features.items()
+        }
+        norm = math.sqrt(sum(value * value for value in vector.values())) or 1.0
+        return {feature: value / norm for feature, value in vector.items()}
+
+    def _similar(self, normalized: str) -> Tuple[Optional[str], float]:
+        numbers = _numbers(normalized)
+        candidates = [key for key, entry in self._entries.items() if entry["numbers"] == numbers]
+        if not candidates:
+            return None, 0.0
+        if self._embed:
+            query = self._embed(normalized)
+            scored = (
+                (key, sum(a * b for a, b in zip(query, self._entries[key]["embedding"])))
+                for key in candidates
+            )
+        else:
+            query = self._tfidf(_features(normalized))
+            scored = []
+            for key in candidates:
+                vector = self._tfidf(self._entries[key]["features"])
+                scored.append((key, sum(weight * vector.get(feature, 0.0) for feature, weight in query.items())))
+        return max(scored, key=lambda item: item[1])
+
+    def get(self, question: str) -> Optional[Dict[str, Any]]:
+        """Cached ``{answer, sql, data}`` plus match details, or None."""
+        if not self.enabled:
+            return None
+        normalized = normalize_question(question)
+        if not normalized or _CONTEXT_DEPENDENT_RE.search(question.lower()):
+            self._count("skipped")
+            return None
+        with self._lock:
+            exact = normalized in self._entries
+            if exact:
+                key, score = normalized, 1.0
+            else:
+                key, score = self._similar(normalized)
+            entry = self._entries.get(key) if key is not None and score >= self.threshold else None
+            if entry is not None:
+                self._entries.move_to_end(key)
+        if entry is None:
+            self._count("misses")
+            return None
+        age = time.time() - entry["stored_at"]
+        if age > self.ttl:
+            self._drop(key, "expired")
+            return None
+        versions = self.snapshot(entry["sql"])
+        if versions is None:
+            # Cannot tell whether the data changed; keep the entry for later.
+            self._count("snapshot_errors")
+            self._count("misses")
+            return None
+        if versions != entry["versions"]:
+            self._drop(key, "stale")
+            return None
+        self._count("hits" if exact else "similar_hits")
+        return {
+            **copy.deepcopy(entry["answer"]),
+            "cache": {
+                "question": entry["question"],
+                "similarity": round(score, 4),
+                "age_s": round(age, 1),
+            },
+        }
+
+    def put(self, question: str, answer: Dict[str, Any]) -> bool:
+        """Store an ``{answer, sql, data}`` response; answers without SQL are not cached."""
+        if not self.enabled or not answer.get("sql") or not answer.get("answer"):
+            return False
+        normalized = normalize_question(question)
+        if not normalized or _CONTEXT_DEPENDENT_RE.search(question.lower()):
+            return False
+        versions = self.snapshot(answer["sql"])
+        if versions is None:
+            self._count("snapshot_errors")
+            return False
+        entry = {
+            "question": question,
+            "numbers": _numbers(normalized),
+            "features": _features(normalized),
+            "embedding": self._embed(normalized) if self._embed else None,
+            "sql": answer["sql"],
+            "versions": versions,
+            "stored_at": time.time(),
+            "answer": {key: copy.deepcopy(answer.get(key)) for key in ("answer", "sql", "data")},
+        }
+        with self._lock:
+            if normalized in self._entries:
+                self._remove(normalized)
+            self._entries[normalized] = entry
+            self._document_frequency.update(entry["features"].keys())
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self._stats["evictions"] += 1
+        return True
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._document_frequency.subtract(entry["features"].keys())
+            self._document_frequency += Counter()  # drop zero counts
+
+    def _drop(self, key: str, reason: str) -> None:
+        with self._lock:
+            self._remove(key)
+            self._stats[reason] += 1
+            self._stats["misses"] += 1
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._stats[name] += 1
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._document_frequency.clear()
+            self._stats["invalidations"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats: Dict[str, Any] = dict(self._stats)
+            stats["size"] = len(self._entries)
+        hits = stats["hits"] + stats["similar_hits"]
+        lookups = hits + stats["misses"]
+        stats["hit_rate"] = hits / lookups if lookups else 0.0
+        stats["enabled"] = self.enabled
+        stats["similarity"] = self.similarity
+        stats["threshold"] = self.threshold
+        stats["ttl"] = self.ttl
+        return stats
+
+
+def create_cache(snapshot: Callable[[str], Optional[Dict[str, str]]]) -> AnswerCache:
+    return AnswerCache(snapshot, **_cache_config())
@@ -1,8 +1,20 @@
+import functools
 import os
+import threading
+import time
 import requests
-from flask import Flask, render_template, request, jsonify
-
-from . import sales_analysis_tools
+from flask import Flask, Response, g, render_template, request, jsonify, stream_with_context
+from flask.json.provider import DefaultJSONProvider
+
+from . import (
+    adk_client,
+    answer_cache,
+    concurrency,
+    json_codec,
+    metrics,
+    sales_analysis_tools,
+    session_registry,
+)
 
 # ADK API Server base URL (Docker service name in compose)
 ADK_BASE_URL = os.getenv("ADK_API_BASE_URL", "http://localhost:8000")
@@ -10,25 +22,43 @@ ADK_BASE_URL = os.getenv("ADK_API_BASE_URL", "http://localhost:8000")
 # MUST match the ADK agent folder name
 ADK_APP_NAME = "monitoring_agent"
 
+HTTP_REQUEST_SECONDS = metrics.registry.histogram(
+    "http_request_duration_seconds",
+    "Time to serve each HTTP request, including queueing and streamed bodies.",
+    ("method", "endpoint", "status"),
+)
+
+def _tool_data(response: dict):
+    """Table payload from a tool result in any of the query result formats."""
+    if response.get("data") is not None:
+        return response["data"]
+    if response.get("values") is not None:
+        return {"columns": response.get("columns", []), "values": response["values"]}
+    if response.get("rows") is not None:
+        return {"columns": response.get("columns", []), "rows": response["rows"]}
+    return None
+
+
 def normalize_adk_response(adk_events: list):
     answer = None
     sql = None
     rows = None
 
-    for event in adk_events:
-        parts = event.get("content", {}).get("parts", [])
+    with metrics.stage("adk_normalize"):
+        for event in adk_events:
+            parts = event.get("content", {}).get("parts", [])
 
-        for part in parts:
-            # Final text answer
-            if "text" in part:
-                answer = part["text"]
+            for part in parts:
+                # Final text answer
+                if "text" in part:
+                    answer = part["text"]
 
-            # Tool response (SQL execution)
-            if "functionResponse" in part:
-                fr = part["functionResponse"]["response"]
-                if fr.get("status") == "success":
-                    rows = fr.get("data")
-                    sql = fr.get("sql")
+                # Tool response (SQL execution)
+                if "functionResponse" in part:
+                    fr = part["functionResponse"]["response"]
+                    if fr.get("status") == "success":
+                        rows = _tool_data(fr)
+                        sql = fr.get("sql")
 
     return {
         "answer": answer,
@@ -37,9 +67,126 @@ def normalize_adk_response(adk_events: list):
     }
 
 
+class FastJSONProvider(DefaultJSONProvider):
+    """jsonify() through json_codec: orjson when installed (JSON_BACKEND=stdlib
+    to opt out), with the same key sorting as Flask's default provider."""
+
+    def dumps(self, obj, **kwargs) -> str:
+        return json_codec.dumps(obj, sort_keys=kwargs.get("sort_keys", self.sort_keys)).decode()
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            json_codec.dumps(obj, sort_keys=self.sort_keys), mimetype=self.mimetype
+        )
+
+
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json_codec.dumps(data).decode()}\n\n"
+
+
+def _elapsed_ms(started: float) -> float:
+    return round((time.perf_counter() - started) * 1000, 1)
+
+
 
 def create_app() -> Flask:
     app = Flask(__name__)
+    app.json = FastJSONProvider(app)
+    adk = adk_client.get_client(ADK_BASE_URL, ADK_APP_NAME)
+    registry = session_registry.create_registry()
+    answers = answer_cache.create_cache(sales_analysis_tools.data_snapshot)
+    limiter = concurrency.create_limiter()
+
+    @app.before_request
+    def _start_timer():
+        # Registered first, so time spent queued for admission is included.
+        g.request_started = time.perf_counter()
+
+    @app.before_request
+    def _admit_request():
+        limit = limiter.limit_for(request.endpoint)
+        if limit is None:
+            return None
+        try:
+            limit.acquire()
+        except concurrency.Overloaded as e:
+            response = jsonify({
+                "error": "Server is busy, retry shortly.",
+                "limit": e.group,
+                "reason": e.reason,
+            })
+            response.headers["Retry-After"] = str(e.retry_after)
+            return response, 503
+        g.concurrency_limit = limit
+        return None
+
+    def _finish_request(limit, started, method, endpoint, status):
+        if limit is not None:
+            limit.release()
+        if started is not None:
+            HTTP_REQUEST_SECONDS.observe(
+                time.perf_counter() - started,
+                method,
+                # Unrouted paths share one series instead of one per URL.
+                endpoint or "unmatched",
+                str(status),
+            )
+
+    @app.after_request
+    def _finish_on_close(response):
+        # The request context is torn down as soon as a streamed view returns,
+        # so release the slot and record the duration once the server has
+        # sent the whole body and closes the response.
+        response.call_on_close(functools.partial(
+            _finish_request,
+            g.pop("concurrency_limit", None),
+            g.pop("request_started", None),
+            request.method,
+            request.endpoint,
+            response.status_code,
+        ))
+        return response
+
+    @app.teardown_request
+    def _release_request(exc):
+        # Only finds state left behind when the view raised before after_request.
+        _finish_request(
+            g.pop("concurrency_limit", None),
+            g.pop("request_started", None),
+            request.method,
+            request.endpoint,
+            500,
+        )
+
+    def _client_id():
+        """Client id from the X-Client-Id header or cookie; a new one otherwise."""
+        for value in (
+            request.headers.get(session_registry.CLIENT_HEADER),
+            request.cookies.get(session_registry.CLIENT_COOKIE),
+        ):
+            if session_registry.valid_client_id(value):
+                return value, False
+        return session_registry.new_client_id(), True
+
+    def _remember_client(response, client_id, is_new):
+        if is_new:
+            response.set_cookie(
+                session_registry.CLIENT_COOKIE,
+                client_id,
+                max_age=30 * 24 * 3600,
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
+
+    def _delete_retired_sessions():
+        retired = registry.drain_retired()
+        if retired:
+            threading.Thread(
+                target=lambda: [adk.delete_session(u, s) for u, s in retired],
+                daemon=True,
+            ).start()
 
     # -----------------------
     # Health & metadata
@@ -49,9 +196,59 @@ def create_app() -> Flask:
     def health():
         return {"status": "ok"}, 200
 
+    @app.get("/metrics")
+    def prometheus_metrics():
+        return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
+
+    @app.get("/server/stats")
+    def server_stats():
+        return jsonify({"concurrency": limiter.stats()})
+
+    @app.get("/db-pool")
+    def db_pool_stats():
+        return jsonify(sales_analysis_tools.db_pool.pool_stats())
+
+    @app.get("/query/cache")
+    def query_cache_stats():
+        return jsonify(sales_analysis_tools.result_cache_stats())
+
+    @app.delete("/query/cache")
+    def query_cache_clear():
+        sales_analysis_tools.invalidate_result_cache()
+        return jsonify(sales_analysis_tools.result_cache_stats())
+
+    @app.get("/slow-queries")
+    def slow_queries():
+        order = request.args.get("order", "total_time")
+        if order not in sales_analysis_tools.slow_query_log.ORDERS:
+            return jsonify({
+                "error": f"order must be one of {', '.join(sales_analysis_tools.slow_query_log.ORDERS)}."
+            }), 400
+        limit = request.args.get("limit", 20, type=int)
+        plans = request.args.get("plans", "false").lower() in ("1", "true", "yes")
+        return jsonify(sales_analysis_tools.slow_queries(order=order, limit=max(1, limit), plans=plans))
+
+    @app.get("/intents/stats")
+    def intent_stats():
+        return jsonify(sales_analysis_tools.intent_router_stats())
+
+    @app.get("/ask/cache")
+    def answer_cache_stats():
+        return jsonify(answers.stats())
+
+    @app.delete("/ask/cache")
+    def answer_cache_clear():
+        answers.invalidate()
+        return jsonify(answers.stats())
+
+    @app.get("/adk/stats")
+    def adk_stats():
+        return jsonify({**adk.stats(), "client_sessions": registry.stats()})
+
     @app.get("/schema")
     def schema():
-        return jsonify(sales_analysis_tools.get_sales_schema())
+        result = sales_analysis_tools.get_sales_schema()
+        return jsonify({**result, "cache": sales_analysis_tools.schema_cache_stats()})
 
     # -----------------------
     # Direct SQL / tool query
@@ -63,11 +260,18 @@ def create_app() -> Flask:
         question = (payload.get("question") or "").strip()
         sql = payload.get("sql")
         max_rows = payload.get("max_rows", 200)
+        result_format = payload.get("result_format")
+        page_token = payload.get("page_token")
+
+        if page_token:
+            result = sales_analysis_tools.fetch_next_page(page_token, result_format=result_format)
+            status_code = 200 if result.get("status") != "error" else 400
+            return jsonify(result), status_code
 
         if not question and not sql:
             return jsonify({
                 "status": "error",
-                "error_message": "Provide a question or SQL to execute.",
+                "error_message": "Provide a question, SQL or a page_token to execute.",
             }), 400
 
         if not isinstance(max_rows, int) or max_rows <= 0:
@@ -80,11 +284,38 @@ def create_app() -> Flask:
             question=question or "user-provided-sql",
             sql=sql,
             max_rows=max_rows,
+            result_format=result_format,
         )
 
         status_code = 200 if result.get("status") != "error" else 400
         return jsonify(result), status_code
 
+    @app.post("/query/stream")
+    def query_stream():
+        """
+        Stream every row of a read-only query as NDJSON: the first line is
+        {"columns": [...]}, each following line one row array.
+        """
+        payload = request.get_json(silent=True) or {}
+        sql = payload.get("sql")
+        if not sql or not sales_analysis_tools._is_readonly_sql(sql):
+            return jsonify({
+                "status": "error",
+                "error_message": "Provide a read-only SELECT/WITH query in 'sql'.",
+            }), 400
+
+        rows = sales_analysis_tools.stream_readonly_query(sql)
+
+        def generate():
+            try:
+                yield json_codec.dumps({"columns": next(rows)}) + b"\n"
+                for row in rows:
+                    yield json_codec.dumps(row) + b"\n"
+            finally:
+                rows.close()
+
+        return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
     # -----------------------
     # Agent invocation
     # -----------------------
@@ -105,30 +336,11 @@ def create_app() -> Flask:
         user_query = data["query"]
 
         try:
-            # 1️⃣ Ensure session exists (idempotent)
-            session_url = (
-                f"{ADK_BASE_URL}/apps/{ADK_APP_NAME}"
-                f"/users/{user_id}/sessions/{session_id}"
-            )
-
-            requests.post(session_url, json={}, timeout=10)
+            # 1️⃣ Ensure session exists (idempotent, cached)
+            adk.ensure_session(user_id, session_id)
 
             # 2️⃣ Run agent
-            run_payload = {
-                "appName": ADK_APP_NAME,
-                "userId": user_id,
-                "sessionId": session_id,
-                "newMessage": {
-                    "role": "user",
-                    "parts": [{"text": user_query}],
-                },
-            }
-
-            resp = requests.post(
-                f"{ADK_BASE_URL}/run",
-                json=run_payload,
-                timeout=60,
-            )
+            resp = adk.run(user_id, session_id, user_query)
 
             resp.raise_for_status()
             events = resp.json()
@@ -157,53 +369,151 @@ def create_app() -> Flask:
         if not query:
             return jsonify({"error": "Empty query"}), 400
 
-        user_id = "web_user"
-        session_id = "web_session"
+        started = time.perf_counter()
+        client_id, is_new = _client_id()
+        use_cache = payload.get("cache", True) is not False
+        cached = answers.get(query) if use_cache else None
+        if cached is not None:
+            cached["timing"] = {"total_ms": _elapsed_ms(started)}
+            return _remember_client(jsonify(cached), client_id, is_new), 200
 
-        # Ensure session exists (idempotent, like /invoke-agent)
-        session_url = (
-            f"{ADK_BASE_URL}/apps/{ADK_APP_NAME}"
-            f"/users/{user_id}/sessions/{session_id}"
-        )
+        entry = registry.checkout(client_id, new_session=bool(payload.get("new_session")))
+        if entry is None:
+            return jsonify({"error": "Another request for this client is still running."}), 429
+
+        completed = False
         try:
-            requests.post(session_url, json={}, timeout=10)
+            body, status = _run_turn(entry, query)
+            completed = status == 200
+            if completed:
+                if use_cache:
+                    answers.put(query, body)
+                body["session"] = entry.describe()
+        finally:
+            registry.release(entry, completed=completed)
+            _delete_retired_sessions()
+
+        if completed:
+            body["timing"] = {"total_ms": _elapsed_ms(started)}
+        return _remember_client(jsonify(body), client_id, is_new), status
+
+    def _run_turn(entry, query):
+        # Ensure session exists (idempotent, cached, like /invoke-agent)
+        try:
+            adk.ensure_session(entry.user_id, entry.session_id)
         except requests.RequestException as e:
-            return jsonify({"error": f"Failed to create ADK session: {e}"}), 502
-
-        adk_payload = {
-            "appName": ADK_APP_NAME,
-            "userId": user_id,
-            "sessionId": session_id,
-            "newMessage": {
-                "role": "user",
-                "parts": [{"text": query}]
-            }
-        }
+            return {"error": f"Failed to create ADK session: {e}"}, 502
 
         try:
-            resp = requests.post(
-                f"{ADK_BASE_URL}/run",
-                json=adk_payload,
-                timeout=60
-            )
+            resp = adk.run(entry.user_id, entry.session_id, query)
             resp.raise_for_status()
         except requests.RequestException as e:
-            return jsonify({"error": f"Failed to contact ADK agent: {e}"}), 502
+            return {"error": f"Failed to contact ADK agent: {e}"}, 502
 
         try:
             events = resp.json()
         except Exception:
-            return jsonify({"error": "ADK agent did not return valid JSON.", "raw": resp.text}), 502
+            return {"error": "ADK agent did not return valid JSON.", "raw": resp.text}, 502
 
         if not isinstance(events, (list, dict)):
-            return jsonify({"error": "Unexpected response format from ADK agent.", "raw": events}), 502
+            return {"error": "Unexpected response format from ADK agent.", "raw": events}, 502
 
         try:
-            normalized = normalize_adk_response(events)
+            return normalize_adk_response(events), 200
         except Exception as e:
-            return jsonify({"error": f"Failed to process ADK agent response: {e}", "raw": events}), 500
+            return {"error": f"Failed to process ADK agent response: {e}", "raw": events}, 500
+
+    @app.post("/ask/stream")
+    def ask_agent_stream():
+        """
+        Same as /ask, but proxies ADK's /run_sse and forwards text deltas and
+        tool results as Server-Sent Events while the agent is still running.
+        """
+        payload = request.get_json(silent=True) or {}
+        query = (payload.get("query") or "").strip()
+
+        if not query:
+            return jsonify({"error": "Empty query"}), 400
 
-        return jsonify(normalized)
+        started = time.perf_counter()
+        client_id, is_new = _client_id()
+        use_cache = payload.get("cache", True) is not False
+        cached = answers.get(query) if use_cache else None
+        if cached is not None:
+            cached["timing"] = {"ttfb_ms": _elapsed_ms(started), "total_ms": _elapsed_ms(started)}
+            events = [
+                _sse("tool_result", {"sql": cached["sql"], "data": cached["data"]}),
+                _sse("text", {"text": cached["answer"], "partial": False}),
+                _sse("done", cached),
+            ]
+            response = Response(
+                events,
+                mimetype="text/event-stream",
+                headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+            )
+            return _remember_client(response, client_id, is_new)
+
+        entry = registry.checkout(client_id, new_session=bool(payload.get("new_session")))
+        if entry is None:
+            return jsonify({"error": "Another request for this client is still running."}), 429
+
+        def generate():
+            completed = False
+            try:
+                completed = yield from _stream_turn()
+            finally:
+                # Runs when the stream ends or the client disconnects.
+                registry.release(entry, completed=completed)
+                _delete_retired_sessions()
+
+        def _stream_turn():
+            first_event_ms = None
+            final_events = []
+            try:
+                adk.ensure_session(entry.user_id, entry.session_id)
+            except requests.RequestException as e:
+                yield _sse("error", {"error": f"Failed to create ADK session: {e}"})
+                return False
+
+            try:
+                for event in adk.run_sse(entry.user_id, entry.session_id, query):
+                    if first_event_ms is None:
+                        first_event_ms = _elapsed_ms(started)
+                    if "error" in event and "content" not in event:
+                        yield _sse("error", {"error": f"ADK agent failed: {event['error']}"})
+                        return False
+
+                    partial = bool(event.get("partial"))
+                    if not partial:
+                        final_events.append(event)
+                    for part in (event.get("content") or {}).get("parts", []):
+                        if "text" in part:
+                            yield _sse("text", {"text": part["text"], "partial": partial})
+                        if "functionResponse" in part:
+                            fr = part["functionResponse"].get("response") or {}
+                            if fr.get("status") == "success":
+                                yield _sse("tool_result", {"sql": fr.get("sql"), "data": _tool_data(fr)})
+            except (requests.RequestException, ValueError) as e:
+                yield _sse("error", {"error": f"Failed to contact ADK agent: {e}"})
+                return False
+
+            normalized = normalize_adk_response(final_events)
+            normalized["timing"] = {
+                "ttfb_ms": first_event_ms,
+                "total_ms": _elapsed_ms(started),
+            }
+            if use_cache:
+                answers.put(query, normalized)
+            normalized["session"] = entry.describe()
+            yield _sse("done", normalized)
+            return True
+
+        response = Response(
+            stream_with_context(generate()),
+            mimetype="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+        return _remember_client(response, client_id, is_new)
 
     return app
 
@@ -0,0 +1,132 @@
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+
+def _limits_config() -> Dict[str, Dict[str, Any]]:
+    queue_timeout = float(os.getenv("API_QUEUE_TIMEOUT", "2"))
+    return {
+        # Agent turns hold a thread for up to ADK_RUN_TIMEOUT waiting on ADK,
+        # and a connection from the ADK client pool (ADK_HTTP_POOL_MAXSIZE, 32):
+        # admitting more than the pool holds only queues them out of sight.
+        "agent": {
+            "endpoints": ("ask_agent", "ask_agent_stream", "invoke_agent"),
+            "max_active": int(os.getenv("API_AGENT_CONCURRENCY", "32")),
+            "max_queued": int(os.getenv("API_AGENT_QUEUE", "32")),
+            "queue_timeout": queue_timeout,
+        },
+        # Direct SQL holds a pooled DB connection; keep this at or below DB_POOL_MAX.
+        "query": {
+            "endpoints": ("query", "query_stream"),
+            "max_active": int(os.getenv("API_QUERY_CONCURRENCY", "8")),
+            "max_queued": int(os.getenv("API_QUERY_QUEUE", "16")),
+            "queue_timeout": queue_timeout,
+        },
+    }
+
+
+class Overloaded(Exception):
+    def __init__(self, group: str, reason: str, retry_after: int) -> None:
+        super().__init__(f"{group}: {reason}")
+        self.group = group
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class ConcurrencyLimit:
+    """At most ``max_active`` requests run; up to ``max_queued`` more wait.
+
+    A request that finds the queue full is rejected at once, and a queued one
+    gives up after ``queue_timeout`` seconds, so overload answers with a fast
+    503 instead of piling threads up behind slow ADK calls.
+    """
+
+    def __init__(self, name: str, max_active: int, max_queued: int, queue_timeout: float) -> None:
+        self.name = name
+        self.max_active = max_active
+        self.max_queued = max_queued
+        self.queue_timeout = queue_timeout
+        self._condition = threading.Condition()
+        self._active = 0
+        self._queued = 0
+        self._stats = {"admitted": 0, "queued": 0, "rejected_queue_full": 0, "rejected_timeout": 0}
+        self._peak_active = 0
+        self._peak_queued = 0
+        self._wait_seconds = 0.0
+
+    def acquire(self) -> None:
+        with self._condition:
+            if self._active < self.max_active and not self._queued:
+                self._admit()
+                return
+            if self._queued >= self.max_queued:
+                self._stats["rejected_queue_full"] += 1
+                raise Overloaded(self.name, "queue_full", self._retry_after())
+            self._queued += 1
+            self._stats["queued"] += 1
+            self._peak_queued = max(self._peak_queued, self._queued)
+            started = time.monotonic()
+            try:
+                admitted = self._condition.wait_for(
+                    lambda: self._active < self.max_active, timeout=self.queue_timeout
+                )
+            finally:
+                self._queued -= 1
+                self._wait_seconds += time.monotonic() - started
+            if not admitted:
+                self._stats["rejected_timeout"] += 1
+                raise Overloaded(self.name, "queue_timeout", self._retry_after())
+            self._admit()
+
+    def _admit(self) -> None:
+        self._active += 1
+        self._stats["admitted"] += 1
+        self._peak_active = max(self._peak_active, self._active)
+
+    def _retry_after(self) -> int:
+        return max(1, int(self.queue_timeout))
+
+    def release(self) -> None:
+        with self._condition:
+            self._active -= 1
+            self._condition.notify()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._condition:
+            queued = self._stats["queued"]
+            return {
+                **self._stats,
+                "active": self._active,
+                "waiting": self._queued,
+                "max_active": self.max_active,
+                "max_queued": self.max_queued,
+                "peak_active": self._peak_active,
+                "peak_waiting": self._peak_queued,
+                "avg_queue_wait_ms": round(self._wait_seconds * 1000 / queued, 1) if queued else 0.0,
+            }
+
+
+class ConcurrencyLimiter:
+    """Per-endpoint-group limits, looked up by Flask endpoint name."""
+
+    def __init__(self, limits: Dict[str, Dict[str, Any]]) -> None:
+        self.limits: Dict[str, ConcurrencyLimit] = {}
+        self._by_endpoint: Dict[str, ConcurrencyLimit] = {}
+        for name, spec in limits.items():
+            if spec["max_active"] <= 0:
+                continue  # limit disabled
+            limit = ConcurrencyLimit(name, spec["max_active"], spec["max_queued"], spec["queue_timeout"])
+            self.limits[name] = limit
+            for endpoint in spec.get("endpoints", ()):
+                self._by_endpoint[endpoint] = limit
+
+    def limit_for(self, endpoint: Optional[str]) -> Optional[ConcurrencyLimit]:
+        return self._by_endpoint.get(endpoint or "")
+
+    def stats(self) -> Dict[str, Any]:
+        return {name: limit.stats() for name, limit in self.limits.items()}
+
+
+def create_limiter() -> ConcurrencyLimiter:
+    return ConcurrencyLimiter(_limits_config())
@@ -0,0 +1,28 @@
+"""Production serving for monitoring_api.
+
+    gunicorn --config monitoring_api/gunicorn.conf.py "monitoring_api.app:create_app()"
+
+Requests spend most of their time waiting on ADK or Postgres, so each worker
+runs a thread per in-flight request (gthread). The session registry, answer
+cache and result cache live in the worker process; keep WEB_CONCURRENCY at 1
+unless clients are routed stickily, or one client's turns can land on two
+workers and interleave in the same ADK session.
+
+On SIGTERM gunicorn stops accepting connections and waits up to
+graceful_timeout for in-flight turns before exiting.
+"""
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8080')}"
+worker_class = "gthread"
+workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+# Room for API_AGENT_CONCURRENCY + API_AGENT_QUEUE + API_QUERY_* plus cheap
+# endpoints; excess connections wait in the listen backlog.
+threads = int(os.getenv("GUNICORN_THREADS", "96"))
+backlog = int(os.getenv("GUNICORN_BACKLOG", "256"))
+# Longer than ADK_RUN_TIMEOUT so a slow agent turn is not killed mid-request.
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "90"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "75"))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "5"))
+accesslog = os.getenv("GUNICORN_ACCESS_LOG", "-") or None
+errorlog = "-"
@@ -0,0 +1,328 @@
+import argparse
+import atexit
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import psycopg2
+
+from . import db_pool, sql_parser
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "sql", "migrations")
+DEFAULT_TABLES = ("chocolate_sales", "sales_fact")
+
+_RANGE_OPERATORS = frozenset({"<", ">", "<=", ">=", "between"})
+_EQUALITY_OPERATORS = frozenset({"=", "in", "like", "ilike", "is"})
+_TEMPORAL_TYPES = ("date", "timestamp", "time")
+# |correlation| above this means physical order follows the column, so a
+# tiny BRIN index prunes almost as well as a btree for range scans.
+BRIN_CORRELATION = 0.9
+
+_PG_STAT_STATEMENTS_SQL = """
+SELECT query, calls
+FROM pg_stat_statements
+WHERE query ~* %s
+ORDER BY calls DESC
+LIMIT 1000;
+"""
+
+_COLUMNS_SQL = """
+SELECT c.relname, a.attname, format_type(a.atttypid, a.atttypmod), s.correlation,
+       EXISTS (
+           SELECT 1 FROM pg_index i
+           WHERE i.indrelid = c.oid AND i.indkey[0] = a.attnum
+       ) AS leading_index
+FROM pg_class c
+JOIN pg_namespace n ON n.oid = c.relnamespace
+JOIN pg_attribute a ON a.attrelid = c.oid AND a.attnum > 0 AND NOT a.attisdropped
+LEFT JOIN pg_stats s ON s.schemaname = n.nspname AND s.tablename = c.relname AND s.attname = a.attname
+WHERE c.relname = ANY(%s) AND c.relkind IN ('r', 'p') AND n.nspname = 'public';
+"""
+
+
+def _advisor_config() -> Dict[str, Any]:
+    return {
+        "path": os.getenv("INDEX_ADVISOR_LOG") or None,
+        "flush_interval": float(os.getenv("INDEX_ADVISOR_FLUSH_INTERVAL", "30")),
+    }
+
+
+def _aliases(tokens: List[Any]) -> Dict[str, str]:
+    """Map aliases and bare names of FROM/JOIN tables to the table's relname."""
+    aliases: Dict[str, str] = {}
+    for i, token in enumerate(tokens[:-1]):
+        if token.value not in ("from", "join", ","):
+            continue
+        j = i + 1
+        if not sql_parser.is_name(tokens[j]):
+            continue
+        name, j = sql_parser.read_qualified(tokens, j)
+        relname = name.rsplit(".", 1)[-1]
+        aliases[relname] = relname
+        if j < len(tokens) and tokens[j].value == "as":
+            j += 1
+        if j < len(tokens) and sql_parser.is_name(tokens[j]):
+            aliases[tokens[j].value] = relname
+    return aliases
+
+
+def extract_usage(sql: str) -> List[Tuple[Optional[str], str, str]]:
+    """Return ``(table, column, role)`` for columns used in filters and group-bys.
+
+    ``role`` is "range", "equality" or "group". ``table`` is None when an
+    unqualified column cannot be attributed to a single table; the advisor
+    resolves it against the catalog later.
+    """
+    analysis = sql_parser.analyze_sql(sql)
+    if not analysis.readonly:
+        return []
+    tokens = sql_parser.tokenize(sql)
+    aliases = _aliases(tokens)
+    relnames = {name.rsplit(".", 1)[-1] for name in analysis.tables}
+    only_table = next(iter(relnames)) if len(relnames) == 1 else None
+
+    usage: List[Tuple[Optional[str], str, str]] = []
+    clause: Optional[str] = None
+    for i, token in enumerate(tokens):
+        following = tokens[i + 1] if i + 1 < len(tokens) else None
+        if token.kind == "word":
+            if token.value in ("where", "on", "having"):
+                clause = "filter"
+                continue
+            if token.value in ("group", "order") and following is not None and following.value == "by":
+                clause = "group"
+                continue
+            if token.value in ("select", "from", "join", "limit", "offset", "union", "window"):
+                clause = None
+                continue
+        if clause is None or not sql_parser.is_name(token):
+            continue
+        if following is not None and following.text in ("(", "."):
+            continue
+        qualified = i >= 2 and tokens[i - 1].text == "."
+        table = aliases.get(tokens[i - 2].value) if qualified else only_table
+        if table is not None and table not in relnames:
+            continue
+        if clause == "group":
+            role = "group"
+        else:
+            start = i - 2 if qualified else i
+            previous = tokens[start - 1].value if start else ""
+            nearby = {following.value if following is not None else "", previous}
+            if nearby & _RANGE_OPERATORS:
+                role = "range"
+            elif nearby & _EQUALITY_OPERATORS:
+                role = "equality"
+            else:
+                continue
+        usage.append((table, token.value, role))
+    return usage
+
+
+class UsageLog:
+    """Counts ``(table, column, role)`` usage of executed queries.
+
+    Counts are kept in memory and, when ``path`` names a file, flushed to
+    SQLite every ``flush_interval`` seconds so several processes can share them.
+    """
+
+    def __init__(self, path: Optional[str] = None, flush_interval: float = 30.0) -> None:
+        self.path = path
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._pending: Counter = Counter()
+        self._flushed_at = time.monotonic()
+        if path:
+            atexit.register(self.flush)
+
+    def record(self, sql: str, weight: int = 1) -> None:
+        usage = extract_usage(sql)
+        if not usage:
+            return
+        with self._lock:
+            for table, column, role in usage:
+                self._pending[(table or "", column, role)] += weight
+            due = self.path and time.monotonic() - self._flushed_at > self.flush_interval
+        if due:
+            self.flush()
+
+    def _connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self.path)
+        db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS usage (
+                table_name TEXT NOT NULL,
+                column_name TEXT NOT NULL,
+                role TEXT NOT NULL,
+                uses INTEGER NOT NULL,
+                last_seen REAL NOT NULL,
+                PRIMARY KEY (table_name, column_name, role)
+            )
+            """
+        )
+        return db
+
+    def flush(self) -> None:
+        if not self.path:
+            return
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+            self._flushed_at = time.monotonic()
+        if not pending:
+            return
+        with self._connect() as db:
+            db.executemany(
+                """
+                INSERT INTO usage (table_name, column_name, role, uses, last_seen)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (table_name, column_name, role)
+                DO UPDATE SET uses = uses + excluded.uses, last_seen = excluded.last_seen
+                """,
+                [(table, column, role, uses, time.time()) for (table, column, role), uses in pending.items()],
+            )
+
+    def counts(self) -> Counter:
+        """Usage recorded by this process plus everything flushed to the log file."""
+        self.flush()
+        counts: Counter = Counter()
+        with self._lock:
+            counts.update(self._pending)
+        if self.path and os.path.exists(self.path):
+            with self._connect() as db:
+                for table, column, role, uses in db.execute(
+                    "SELECT table_name, column_name, role, uses FROM usage"
+                ):
+                    counts[(table, column, role)] += uses
+        return counts
+
+
+def statement_usage(cursor: Any, tables: Iterable[str]) -> Optional[Counter]:
+    """Usage weighted by calls from pg_stat_statements, or None if unavailable."""
+    pattern = r"\m(" + "|".join(re.escape(table) for table in tables) + r")\M"
+    try:
+        cursor.execute(_PG_STAT_STATEMENTS_SQL, (pattern,))
+    except psycopg2.Error:
+        return None
+    counts: Counter = Counter()
+    for query, calls in cursor.fetchall():
+        for table, column, role in extract_usage(query):
+            counts[(table or "", column, role)] += calls
+    return counts
+
+
+def recommend(
+    usage: Counter, columns: Dict[Tuple[str, str], Dict[str, Any]], min_uses: int = 5
+) -> List[Dict[str, Any]]:
+    """Turn usage counts into index recommendations, most used first."""
+    by_column: Dict[Tuple[str, str], Counter] = {}
+    for (table, column, role), uses in usage.items():
+        if table:
+            candidates = [table]
+        else:
+            candidates = [t for (t, c) in columns if c == column]
+            if len(candidates) != 1:
+                continue
+        key = (candidates[0], column)
+        if key in columns:
+            by_column.setdefault(key, Counter())[role] += uses
+
+    recommendations = []
+    for (table, column), roles in by_column.items():
+        total = sum(roles.values())
+        info = columns[(table, column)]
+        if total < min_uses or info["leading_index"]:
+            continue
+        temporal = info["type"].startswith(_TEMPORAL_TYPES)
+        correlation = info["correlation"]
+        if temporal and roles["range"] and correlation is not None and abs(correlation) >= BRIN_CORRELATION:
+            method = "brin"
+            reason = f"range filters on a column with physical correlation {correlation:.2f}"
+        else:
+            method = "btree"
+            reason = ", ".join(f"{role} x{count}" for role, count in roles.most_common())
+        name = f"idx_{table}_{column}" + ("_brin" if method == "brin" else "")
+        recommendations.append({
+            "table": table,
+            "column": column,
+            "method": method,
+            "uses": total,
+            "roles": dict(roles),
+            "reason": reason,
+            "ddl": f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} USING {method} ({column});",
+        })
+    recommendations.sort(key=lambda item: item["uses"], reverse=True)
+    return recommendations
+
+
+def catalog_columns(cursor: Any, tables: Iterable[str]) -> Dict[Tuple[str, str], Dict[str, Any]]:
+    cursor.execute(_COLUMNS_SQL, (list(tables),))
+    return {
+        (table, column): {"type": data_type, "correlation": correlation, "leading_index": leading}
+        for table, column, data_type, correlation, leading in cursor.fetchall()
+    }
+
+
+def write_migration(recommendations: List[Dict[str, Any]], directory: str = MIGRATIONS_DIR) -> Optional[str]:
+    if not recommendations:
+        return None
+    os.makedirs(directory, exist_ok=True)
+    numbers = [int(name[:3]) for name in os.listdir(directory) if name[:3].isdigit()]
+    path = os.path.join(directory, f"{max(numbers, default=0) + 1:03d}_advised_indexes.sql")
+    tables = sorted({item["table"] for item in recommendations})
+    lines = [
+        "-- Generated by monitoring_agent.index_advisor",
+        f"-- requires: {', '.join(tables)}",
+        "",
+    ]
+    for item in recommendations:
+        lines.append(f"-- {item['table']}.{item['column']}: {item['reason']} ({item['uses']} uses)")
+        lines.append(item["ddl"])
+        lines.append("")
+    with open(path, "w") as f:
+        f.write("\n".join(lines))
+    return path
+
+
+_usage_log: Optional[UsageLog] = None
+
+
+def usage_log() -> UsageLog:
+    global _usage_log
+    if _usage_log is None:
+        _usage_log = UsageLog(**_advisor_config())
+    return _usage_log
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Recommend indexes from observed query usage.")
+    parser.add_argument("--tables", nargs="+", default=list(DEFAULT_TABLES))
+    parser.add_argument("--min-uses", type=int, default=5)
+    parser.add_argument("--write-migration", action="store_true")
+    args = parser.parse_args(argv)
+
+    usage = usage_log().counts()
+    with db_pool.connection() as conn:
+        with conn.cursor() as cursor:
+            statements = statement_usage(cursor, args.tables)
+            columns = catalog_columns(cursor, args.tables)
+    if statements is None:
+        print("pg_stat_statements is not available; using the usage log only.")
+    else:
+        usage.update(statements)
+
+    recommendations = recommend(usage, columns, min_uses=args.min_uses)
+    if not recommendations:
+        print("No index recommendations.")
+        return
+    for item in recommendations:
+        print(f"{item['table']}.{item['column']} [{item['method']}] {item['reason']} -> {item['ddl']}")
+    if args.write_migration:
+        print(f"Wrote {write_migration(recommendations)}")
+
+
+if __name__ == "__main__":
+    main()
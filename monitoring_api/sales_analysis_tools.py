@@ -1,142 +1,92 @@
-import datetime
-import decimal
+import base64
+import json
 import os
-from typing import Any, Dict, List, Optional
+import time
+import uuid
+from typing import Any, Dict, Iterator, List, Optional, Sequence
 
 import psycopg2
+from psycopg2 import extensions
 from dotenv import load_dotenv
 
+from . import (
+    db_pool,
+    index_advisor,
+    intent_router,
+    introspection,
+    json_codec,
+    metrics,
+    result_cache,
+    rollups,
+    schema_cache,
+    slow_query_log,
+    sql_guard,
+    sql_parser,
+)
+
 load_dotenv()
 
 
-def _db_config() -> Dict[str, Any]:
-    return {
-        "host": os.getenv("DB_HOST", "localhost"),
-        "port": int(os.getenv("DB_PORT", "5432")),
-        "dbname": os.getenv("DB_NAME", "mydb"),
-        "user": os.getenv("DB_USER", "postgres"),
-        "password": os.getenv("DB_PASSWORD", "postgres"),
-    }
+def _get_connection():
+    """Check out a pooled read-only connection; use as a context manager."""
+    return db_pool.connection()
 
 
-def _get_connection():
-    conn = psycopg2.connect(**_db_config())
-    conn.set_session(readonly=True, autocommit=True)
-    return conn
+def _cursor_itersize() -> int:
+    return int(os.getenv("QUERY_CURSOR_ITERSIZE", "2000"))
+
+
+# Page tokens are not signed: they carry only the SQL and position, and the
+# SQL is validated again like any other query when the page is fetched. Any
+# worker or restarted process can continue a token.
+def encode_page_token(sql: str, offset: int, max_rows: int) -> str:
+    return base64.urlsafe_b64encode(
+        json.dumps({"sql": sql, "offset": offset, "max_rows": max_rows}).encode()
+    ).decode()
+
+
+def decode_page_token(token: str) -> Optional[Dict[str, Any]]:
+    """Return ``{"sql", "offset", "max_rows"}`` or None for a garbled token."""
+    try:
+        page = json.loads(base64.urlsafe_b64decode(token.encode()))
+    except (ValueError, TypeError):
+        return None
+    if not (
+        isinstance(page, dict)
+        and isinstance(page.get("sql"), str)
+        and type(page.get("offset")) is int and page["offset"] >= 0
+        and type(page.get("max_rows")) is int and page["max_rows"] > 0
+    ):
+        return None
+    return {key: page[key] for key in ("sql", "offset", "max_rows")}
+
+
+_query_guard = sql_guard.create_guard()
+
+
+def _named_cursor(conn: Any) -> Any:
+    """Server-side cursor: rows stay in Postgres until fetched.
+
+    Named cursors only live inside a transaction, so autocommit is switched
+    off here; the pool rolls back and restores autocommit on check-in.
+    """
+    if conn.autocommit:
+        conn.autocommit = False
+    cursor = conn.cursor(name=f"q_{uuid.uuid4().hex}")
+    cursor.itersize = _cursor_itersize()
+    return cursor
 
 
 def _is_readonly_sql(sql: str) -> bool:
-    normalized = " ".join(sql.strip().strip(";").split()).lower()
-    if not normalized:
-        return False
-    if normalized.startswith("select ") or normalized.startswith("with "):
-        forbidden = (
-            " insert ",
-            " update ",
-            " delete ",
-            " drop ",
-            " alter ",
-            " create ",
-            " truncate ",
-            " grant ",
-            " revoke ",
-            " commit ",
-            " rollback ",
-        )
-        return not any(token in f" {normalized} " for token in forbidden)
-    return False
+    return sql_parser.analyze_sql(sql).readonly
 
 
-def _fetch_schema() -> Dict[str, Any]:
-    schema: Dict[str, Any] = {"tables": {}}
-    allowed_tables = {"chocolate_sales", "car_sales", "walmart_grocery_sales"}
-    with _get_connection() as conn:
-        with conn.cursor() as cursor:
-            cursor.execute(
-                """
-                SELECT table_schema, table_name, column_name, data_type, is_nullable
-                FROM information_schema.columns
-                WHERE table_schema NOT IN ('pg_catalog', 'information_schema')
-                    AND table_name = ANY(%s)
-                ORDER BY table_schema, table_name, ordinal_position;
-                """,
-                (list(allowed_tables),),
-            )
-            for table_schema, table_name, column_name, data_type, is_nullable in cursor.fetchall():
-                key = f"{table_schema}.{table_name}"
-                table = schema["tables"].setdefault(
-                    key,
-                    {"columns": [], "primary_key": [], "foreign_keys": []},
-                )
-                table["columns"].append(
-                    {
-                        "name": column_name,
-                        "type": data_type,
-                        "nullable": is_nullable == "YES",
-                    }
-                )
+_ALLOWED_TABLES = ("chocolate_sales", "car_sales", "walmart_grocery_sales")
+_introspector = introspection.CatalogIntrospector(relnames=_ALLOWED_TABLES)
 
-            cursor.execute(
-                """
-                SELECT tc.table_schema, tc.table_name, kcu.column_name
-                FROM information_schema.table_constraints tc
-                JOIN information_schema.key_column_usage kcu
-                    ON tc.constraint_name = kcu.constraint_name
-                    AND tc.table_schema = kcu.table_schema
-                WHERE tc.constraint_type = 'PRIMARY KEY'
-                    AND tc.table_schema NOT IN ('pg_catalog', 'information_schema')
-                    AND tc.table_name = ANY(%s)
-                ORDER BY tc.table_schema, tc.table_name, kcu.ordinal_position;
-                """,
-                (list(allowed_tables),),
-            )
-            for table_schema, table_name, column_name in cursor.fetchall():
-                key = f"{table_schema}.{table_name}"
-                table = schema["tables"].setdefault(
-                    key,
-                    {"columns": [], "primary_key": [], "foreign_keys": []},
-                )
-                table["primary_key"].append(column_name)
-
-            cursor.execute(
-                """
-                SELECT tc.table_schema, tc.table_name, kcu.column_name,
-                       ccu.table_schema, ccu.table_name, ccu.column_name
-                FROM information_schema.table_constraints tc
-                JOIN information_schema.key_column_usage kcu
-                    ON tc.constraint_name = kcu.constraint_name
-                    AND tc.table_schema = kcu.table_schema
-                JOIN information_schema.constraint_column_usage ccu
-                    ON ccu.constraint_name = tc.constraint_name
-                    AND ccu.table_schema = tc.table_schema
-                WHERE tc.constraint_type = 'FOREIGN KEY'
-                    AND tc.table_schema NOT IN ('pg_catalog', 'information_schema')
-                    AND tc.table_name = ANY(%s)
-                ORDER BY tc.table_schema, tc.table_name, kcu.ordinal_position;
-                """,
-                (list(allowed_tables),),
-            )
-            for (
-                table_schema,
-                table_name,
-                column_name,
-                foreign_schema,
-                foreign_table,
-                foreign_column,
-            ) in cursor.fetchall():
-                key = f"{table_schema}.{table_name}"
-                table = schema["tables"].setdefault(
-                    key,
-                    {"columns": [], "primary_key": [], "foreign_keys": []},
-                )
-                table["foreign_keys"].append(
-                    {
-                        "column": column_name,
-                        "references": f"{foreign_schema}.{foreign_table}({foreign_column})",
-                    }
-                )
-    schema["table_count"] = len(schema["tables"])
-    return schema
+
+def _fetch_schema() -> Dict[str, Any]:
+    return _introspector.refresh()
 
 
 def _format_schema(schema: Dict[str, Any]) -> str:
@@ -156,6 +106,62 @@ def _format_schema(schema: Dict[str, Any]) -> str:
     return "\n".join(lines).strip()
 
 
+_schema_cache = schema_cache.create_cache(_fetch_schema, _format_schema)
+
+
+def _cached_schema() -> Dict[str, Any]:
+    """Return ``{"schema": ..., "schema_text": ...}`` from the process-wide cache."""
+    with metrics.stage("schema_fetch"):
+        return _schema_cache.get()
+
+
+def schema_cache_stats() -> Dict[str, Any]:
+    return _schema_cache.stats()
+
+
+def invalidate_schema_cache() -> None:
+    _schema_cache.invalidate()
+
+
+_result_cache = result_cache.create_cache()
+
+
+def slow_queries(order: str = "total_time", limit: int = 20, plans: bool = False) -> Dict[str, Any]:
+    """Top statements by ``order`` and the most recent slow executions."""
+    log = slow_query_log.query_log()
+    return {
+        "stats": log.stats(),
+        "top": log.top(order=order, limit=limit),
+        "recent": log.recent(limit=limit, plans=plans),
+    }
+
+
+def result_cache_stats() -> Dict[str, Any]:
+    return _result_cache.stats()
+
+
+def invalidate_result_cache() -> None:
+    _result_cache.invalidate()
+
+
+def data_snapshot(sql: str) -> Optional[Dict[str, str]]:
+    """Current data versions of the tables ``sql`` reads, for answer caching; None if unavailable."""
+    try:
+        return _result_cache.snapshot(sql)
+    except psycopg2.Error:
+        return None
+
+
+# records: rows plus a row-of-dicts copy in "data" (what the chat UI charts).
+# columnar: {"columns": [...], "values": {column: [...]}}, no per-row keys.
+# rows: column names once plus positional rows only.
+RESULT_FORMATS = ("records", "columnar", "rows")
+
+
+def _default_result_format() -> str:
+    return os.getenv("QUERY_RESULT_FORMAT", "records")
+
+
 def _visualization_ready_result(result: Dict[str, Any]) -> Dict[str, Any]:
     if result.get("status") != "success":
         return result
@@ -163,149 +169,292 @@ def _visualization_ready_result(result: Dict[str, Any]) -> Dict[str, Any]:
     rows = result.get("rows", [])
     data = [dict(zip(columns, row)) for row in rows]
     result["data"] = data
-    result["metadata"] = {
-        "columns": columns,
-        "row_count": result.get("row_count", 0),
-        "truncated": result.get("truncated", False),
-    }
+    return result
+
+
+def _columnar_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    if result.get("status") != "success":
+        return result
+    columns = result.get("columns", [])
+    rows = result.pop("rows", [])
+    transposed = zip(*rows) if rows else ([] for _ in columns)
+    result["values"] = {column: list(values) for column, values in zip(columns, transposed)}
+    return result
+
+
+def _shape_result(result: Dict[str, Any], result_format: str) -> Dict[str, Any]:
+    if result_format == "records":
+        result = _visualization_ready_result(result)
+    elif result_format == "columnar":
+        result = _columnar_result(result)
+    if result.get("status") == "success":
+        result["metadata"] = {
+            "columns": result.get("columns", []),
+            "row_count": result.get("row_count", 0),
+            "truncated": result.get("truncated", False),
+            "format": result_format,
+        }
     return result
 
 
 def get_sales_schema() -> Dict[str, Any]:
     """Return the database schema (tables, columns, primary keys, foreign keys)."""
-    schema = _fetch_schema()
-    return {"status": "success", "schema": schema, "schema_text": _format_schema(schema)}
+    cached = _cached_schema()
+    return {"status": "success", "schema": cached["schema"], "schema_text": cached["schema_text"]}
 
 
-def run_readonly_query(sql: str, max_rows: int = 200) -> Dict[str, Any]:
+def _query_error(sql: str, error: psycopg2.Error, tables: Sequence[str]) -> Dict[str, Any]:
+    reason = _query_guard.error_reason(error, tables=tables)
+    return {
+        "status": "error",
+        "error_message": f"Query failed: {reason['message']}",
+        "reason": reason,
+        "sql": sql,
+    }
+
+
+def run_readonly_query(
+    sql: str, max_rows: int = 200, result_format: Optional[str] = None, offset: int = 0
+) -> Dict[str, Any]:
     """Execute a read-only SQL query and return rows and column metadata.
 
+    Only ``max_rows + 1`` rows are transferred from a server-side cursor, so
+    memory does not depend on the size of the full result. When more rows
+    exist, ``next_page_token`` can be passed to fetch_next_page().
+
+    The statement is wrapped in an outer LIMIT and its plan is checked before
+    it runs; a plan that is too expensive, a run past the statement timeout,
+    or SQL Postgres rejects (syntax errors, unknown columns) returns status
+    "error" with a structured ``reason`` (code, estimates or message, hint)
+    to refine the SQL with.
+
     Args:
         sql: A read-only SQL statement (SELECT or WITH). Must not modify data.
         max_rows: Maximum number of rows to return in the response.
+        result_format: "records" (rows plus row dicts in "data"), "columnar"
+            (one value list per column) or "rows" (positional rows only).
+        offset: Number of result rows to skip (used by page tokens).
     """
-    if not _is_readonly_sql(sql):
+    result_format = result_format or _default_result_format()
+    if result_format not in RESULT_FORMATS:
         return {
             "status": "error",
-            "error_message": "Only read-only SELECT/WITH queries are allowed.",
+            "error_message": f"result_format must be one of {', '.join(RESULT_FORMATS)}.",
         }
+    with metrics.stage("sql_validate"):
+        analysis = sql_parser.analyze_sql(sql)
+    if not analysis.readonly:
+        return {
+            "status": "error",
+            "error_message": f"Only read-only SELECT/WITH queries are allowed: {analysis.reason}.",
+        }
+
+    cached = _result_cache.get(sql, max_rows, offset)
+    if cached is not None:
+        cached["cached"] = True
+        return _shape_result(cached, result_format)
 
+    limited_sql = sql_guard.limit_sql(sql, offset + max_rows + 1)
     with _get_connection() as conn:
-        with conn.cursor() as cursor:
-            cursor.execute(sql)
-            rows = cursor.fetchmany(max_rows + 1)
-            truncated = len(rows) > max_rows
-            if truncated:
-                rows = rows[:max_rows]
-            columns = [desc[0] for desc in cursor.description or []]
-            rows = [_json_safe_row(row) for row in rows]
-    return _visualization_ready_result(
-        {
-            "status": "success",
-            "sql": sql,
-            "columns": columns,
-            "row_count": len(rows),
-            "truncated": truncated,
-            "rows": rows,
-        }
+        # The guard's SET LOCAL needs the transaction the cursor will run in.
+        conn.autocommit = False
+        try:
+            with metrics.stage("sql_plan_check"):
+                rejection = _query_guard.prepare(conn, limited_sql, tables=analysis.tables)
+        except psycopg2.Error as e:
+            return _query_error(sql, e, analysis.tables)
+        if rejection is not None:
+            return {
+                "status": "error",
+                "error_message": f"Query rejected before execution: {rejection['hint']}",
+                "reason": rejection,
+                "sql": sql,
+            }
+        started = time.perf_counter()
+        try:
+            with _named_cursor(conn) as cursor:
+                with metrics.stage("query_execute"):
+                    cursor.execute(limited_sql)
+                    if offset:
+                        # MOVE on the server; skipped rows are never sent.
+                        cursor.scroll(offset)
+                    rows = cursor.fetchmany(max_rows + 1)
+                slow_query_log.query_log().record(
+                    sql, time.perf_counter() - started, len(rows), executed_sql=limited_sql
+                )
+                truncated = len(rows) > max_rows
+                if truncated:
+                    rows = rows[:max_rows]
+                columns = [desc[0] for desc in cursor.description or []]
+                with metrics.stage("row_convert"):
+                    convert = json_codec.row_converter(cursor.description)
+                    rows = [convert(row) for row in rows]
+        except psycopg2.errors.QueryCanceled:
+            slow_query_log.query_log().record(sql, time.perf_counter() - started, status="cancelled")
+            reason = _query_guard.timeout_reason(tables=analysis.tables)
+            return {
+                "status": "error",
+                "error_message": f"Query cancelled: {reason['hint']}",
+                "reason": reason,
+                "sql": sql,
+            }
+        except psycopg2.Error as e:
+            slow_query_log.query_log().record(sql, time.perf_counter() - started, status="error")
+            return _query_error(sql, e, analysis.tables)
+    result = {
+        "status": "success",
+        "sql": sql,
+        "columns": columns,
+        "row_count": len(rows),
+        "truncated": truncated,
+        "rows": rows,
+        "offset": offset,
+        "next_page_token": encode_page_token(sql, offset + max_rows, max_rows) if truncated else None,
+    }
+    _result_cache.put(sql, max_rows, result, offset)
+    index_advisor.usage_log().record(sql)
+    result["cached"] = False
+    return _shape_result(result, result_format)
+
+
+def fetch_next_page(page_token: str, result_format: Optional[str] = None) -> Dict[str, Any]:
+    """Fetch the next page of a previous run_readonly_query/query_sales result.
+
+    Args:
+        page_token: The next_page_token returned with the previous page.
+        result_format: "records" (default), "columnar" or "rows".
+    """
+    page = decode_page_token(page_token)
+    if page is None:
+        return {"status": "error", "error_message": "Invalid or expired page_token."}
+    return run_readonly_query(
+        page["sql"], max_rows=page["max_rows"], result_format=result_format, offset=page["offset"]
     )
 
 
-def _json_safe_value(value: Any) -> Any:
-    if isinstance(value, (datetime.date, datetime.datetime)):
-        return value.isoformat()
-    if isinstance(value, decimal.Decimal):
-        return str(value)
-    return value
+def stream_readonly_query(sql: str) -> Iterator[List[Any]]:
+    """Yield the column names, then every result row, from a server-side cursor.
 
+    Rows are fetched ``QUERY_CURSOR_ITERSIZE`` at a time, so memory stays flat
+    however large the result is. The connection is held until the iterator is
+    exhausted or closed.
+    """
+    if not _is_readonly_sql(sql):
+        raise ValueError("Only read-only SELECT/WITH queries are allowed.")
+    with _get_connection() as conn:
+        with _named_cursor(conn) as cursor:
+            cursor.execute(sql)
+            first = cursor.fetchone()
+            yield [desc[0] for desc in cursor.description or []]
+            if first is None:
+                return
+            convert = json_codec.row_converter(cursor.description)
+            yield convert(first)
+            for row in cursor:
+                yield convert(row)
 
-def _json_safe_row(row: Any) -> Any:
-    if isinstance(row, (list, tuple)):
-        return [_json_safe_value(value) for value in row]
-    return _json_safe_value(row)
 
+def _rollup_sql(query: str) -> Optional[str]:
+    """Answer a canned aggregate from its rollup view unless the view is stale."""
+    with _get_connection() as conn:
+        with conn.cursor() as cursor:
+            return rollups.choose_sql(cursor, query)
+
+
+def _intent_values() -> Optional[Dict[str, List[str]]]:
+    """Distinct countries and products the intent router can filter on; None if the lookup failed."""
+    values: Dict[str, List[str]] = {}
+    try:
+        with _get_connection() as conn:
+            with conn.cursor() as cursor:
+                for column in ("country", "product"):
+                    cursor.execute(
+                        f"SELECT DISTINCT {column} FROM {intent_router.SOURCE_TABLE} "
+                        f"WHERE {column} IS NOT NULL;"
+                    )
+                    values[column] = [row[0] for row in cursor.fetchall()]
+    except psycopg2.Error:
+        return None
+    return values
+
+
+_intent_router = intent_router.create_router(_intent_values)
+
+
+def intent_router_stats() -> Dict[str, Any]:
+    return _intent_router.stats()
 
-def _intent_to_sql(question: str, schema: Dict[str, Any]) -> Optional[str]:
-    normalized = " ".join(question.lower().split())
-    if "list tables" in normalized or "show tables" in normalized:
-        return (
-            "SELECT table_schema, table_name FROM information_schema.tables "
-            "WHERE table_schema NOT IN ('pg_catalog', 'information_schema') "
-            "ORDER BY table_schema, table_name;"
-        )
-    if normalized.startswith("describe ") or normalized.startswith("show schema for "):
-        table_name = normalized.replace("describe ", "").replace("show schema for ", "").strip()
-        if table_name and "." not in table_name:
-            matches = [name for name in schema.get("tables", {}) if name.endswith(f".{table_name}")]
-            if len(matches) == 1:
-                table_name = matches[0]
-        return (
-            "SELECT column_name, data_type, is_nullable "
-            "FROM information_schema.columns "
-            f"WHERE table_schema || '.' || table_name = '{table_name}' "
-            "ORDER BY ordinal_position;"
-        )
-    if "total sales" in normalized or "sum amount" in normalized:
-        return "SELECT SUM(amount) AS total_amount FROM chocolate_sales;"
-    if "total boxes" in normalized or "sum boxes" in normalized:
-        return "SELECT SUM(boxes_shipped) AS total_boxes FROM chocolate_sales;"
-    if "row count" in normalized or "count rows" in normalized:
-        for name in schema.get("tables", {}):
-            if name.endswith(f".{normalized.split()[-1]}"):
-                return f"SELECT COUNT(*) AS row_count FROM {name};"
-    if "sample" in normalized or "example rows" in normalized:
-        for name in schema.get("tables", {}):
-            if name.endswith(f".{normalized.split()[-1]}"):
-                return f"SELECT * FROM {name} LIMIT 5;"
-    if "top" in normalized and "sales" in normalized:
-        return (
-            "SELECT sales_person, SUM(amount) AS total_amount "
-            "FROM chocolate_sales "
-            "GROUP BY sales_person "
-            "ORDER BY total_amount DESC LIMIT 10;"
-        )
-    if "sales by country" in normalized:
-        return (
-            "SELECT country, SUM(amount) AS total_amount "
-            "FROM chocolate_sales "
-            "GROUP BY country "
-            "ORDER BY total_amount DESC;"
-        )
-    if "sales by product" in normalized:
-        return (
-            "SELECT product, SUM(amount) AS total_amount "
-            "FROM chocolate_sales "
-            "GROUP BY product "
-            "ORDER BY total_amount DESC;"
-        )
-    if "sales by month" in normalized or "monthly sales" in normalized:
-        return (
-            "SELECT DATE_TRUNC('month', date) AS month, SUM(amount) AS total_amount "
-            "FROM chocolate_sales "
-            "GROUP BY month "
-            "ORDER BY month;"
-        )
-    return None
 
+def _sql_literal(value: Any) -> str:
+    if isinstance(value, str):
+        # Quoted here rather than by adapt(), which needs a connection to know
+        # whether backslashes must be escaped; an E'' string is read the same
+        # way whatever standard_conforming_strings is set to.
+        quoted = value.replace("'", "''")
+        if "\\" in quoted:
+            return "E'" + quoted.replace("\\", "\\\\") + "'"
+        return f"'{quoted}'"
+    return extensions.adapt(value).getquoted().decode()
 
-def query_sales(question: str, sql: Optional[str] = None, max_rows: int = 200) -> Dict[str, Any]:
+
+def _bind_sql(sql: str, params: Dict[str, Any]) -> str:
+    """Render a parameterized template into literal SQL without a database round trip."""
+    if not params:
+        return sql
+    return sql % {name: _sql_literal(value) for name, value in params.items()}
+
+
+def _intent_to_sql(question: str, schema: Dict[str, Any]) -> Optional[intent_router.RoutedQuery]:
+    """Route a question to an intent, using its rollup view when one answers it."""
+    routed = _intent_router.route(question, schema)
+    if routed is None:
+        return None
+    if routed.rollup:
+        sql = _rollup_sql(routed.rollup)
+        if sql == rollups.QUERIES[routed.rollup].rollup_sql:
+            return routed._replace(sql=sql)
+    return routed._replace(sql=_bind_sql(routed.sql, routed.params), rollup=None)
+
+
+def query_sales(
+    question: str,
+    sql: Optional[str] = None,
+    max_rows: int = 200,
+    result_format: Optional[str] = None,
+) -> Dict[str, Any]:
     """Answer a user question by reading schema, generating SQL, and querying.
 
     Args:
         question: Natural language question about the database.
-        sql: Optional SQL to run. If omitted, simple intent patterns are applied.
+        sql: Optional SQL to run. If omitted, common questions (totals, sales by
+            country/product/month, top N, filtered by country, product or date
+            range) are answered from built-in intents.
         max_rows: Maximum number of rows to return.
+        result_format: "records" (default), "columnar" or "rows"; see run_readonly_query.
     """
-    schema = _fetch_schema()
-    schema_text = _format_schema(schema)
-    query = sql or _intent_to_sql(question, schema)
+    cached = _cached_schema()
+    schema = cached["schema"]
+    schema_text = cached["schema_text"]
+    routed = None if sql else _intent_to_sql(question, schema)
+    query = sql or (routed.sql if routed else None)
     if not query:
         return {
             "status": "needs_sql",
             "error_message": "Provide SQL for this request. Use the schema to craft a read-only query.",
             "schema_text": schema_text,
         }
-    result = run_readonly_query(query, max_rows=max_rows)
+    started = time.perf_counter()
+    with slow_query_log.question_context(question):
+        result = run_readonly_query(query, max_rows=max_rows, result_format=result_format)
+    if routed is not None:
+        _intent_router.record_query(
+            routed.intent, time.perf_counter() - started, result.get("status") == "success"
+        )
+        result["intent"] = {
+            "name": routed.intent,
+            "params": {key: json_codec.json_safe_value(value) for key, value in routed.params.items()},
+            "rollup": bool(routed.rollup),
+        }
     result["schema_text"] = schema_text
     result["generated_sql"] = sql is None
     return result
@@ -0,0 +1,185 @@
+import os
+import select
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+import psycopg2
+import psycopg2.extensions
+
+from . import db_pool
+
+# Cheap DDL fingerprint: pg_class rows get a new xmin on most ALTER TABLE
+# forms, and constraint add/drop changes the pg_constraint rows.
+_FINGERPRINT_SQL = """
+SELECT
+    (SELECT md5(coalesce(string_agg(c.oid::text || ':' || c.xmin::text || ':' || c.relfilenode::text,
+                                    ',' ORDER BY c.oid), ''))
+     FROM pg_class c
+     JOIN pg_namespace n ON n.oid = c.relnamespace
+     WHERE c.relkind IN ('r', 'p', 'v', 'm', 'f')
+         AND n.nspname NOT IN ('pg_catalog', 'information_schema')
+         AND n.nspname NOT LIKE 'pg_toast%')
+    || '/' ||
+    (SELECT md5(coalesce(string_agg(con.oid::text || ':' || con.xmin::text, ',' ORDER BY con.oid), ''))
+     FROM pg_constraint con
+     JOIN pg_namespace n ON n.oid = con.connamespace
+     WHERE n.nspname NOT IN ('pg_catalog', 'information_schema'))
+    || '/' ||
+    (SELECT count(*)::text || ':' || coalesce(max(a.xmin::text::bigint), 0)::text
+     FROM pg_attribute a
+     JOIN pg_class c ON c.oid = a.attrelid
+     JOIN pg_namespace n ON n.oid = c.relnamespace
+     WHERE a.attnum > 0
+         AND c.relkind IN ('r', 'p', 'v', 'm', 'f')
+         AND n.nspname NOT IN ('pg_catalog', 'information_schema')
+         AND n.nspname NOT LIKE 'pg_toast%');
+"""
+
+SCHEMA_CHANGE_CHANNEL = "schema_changed"
+
+
+def _cache_config() -> Dict[str, Any]:
+    return {
+        "ttl": float(os.getenv("SCHEMA_CACHE_TTL", "300")),
+        "listen": os.getenv("SCHEMA_CACHE_LISTEN", "false").lower() in ("1", "true", "yes"),
+    }
+
+
+def fetch_fingerprint() -> str:
+    with db_pool.connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(_FINGERPRINT_SQL)
+            return cursor.fetchone()[0]
+
+
+class SchemaCache:
+    """Process-wide cache for the introspected schema and its rendered text.
+
+    Entries are served without touching the database until ``ttl`` seconds
+    have passed. After that the pg_catalog fingerprint is compared with the
+    one recorded at load time and the schema is only reloaded when DDL has
+    changed it. ``invalidate()`` forces a reload on the next ``get()``; it is
+    also called by the optional LISTEN thread when ``sql/schema_change_notify.sql``
+    is installed.
+    """
+
+    def __init__(
+        self,
+        loader: Callable[[], Dict[str, Any]],
+        formatter: Callable[[Dict[str, Any]], str],
+        ttl: float = 300.0,
+    ) -> None:
+        self._loader = loader
+        self._formatter = formatter
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entry: Optional[Dict[str, Any]] = None
+        self._listener: Optional[threading.Thread] = None
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "revalidations": 0,
+            "invalidations": 0,
+            "fingerprint_errors": 0,
+        }
+
+    def get(self) -> Dict[str, Any]:
+        """Return ``{"schema": ..., "schema_text": ...}`` for the current schema."""
+        entry = self._entry
+        if entry is not None and time.monotonic() < entry["expires_at"]:
+            with self._lock:
+                self._stats["hits"] += 1
+            return entry
+
+        with self._lock:
+            entry = self._entry
+            now = time.monotonic()
+            if entry is not None and now < entry["expires_at"]:
+                self._stats["hits"] += 1
+                return entry
+
+            fingerprint = None
+            try:
+                fingerprint = fetch_fingerprint()
+            except psycopg2.Error:
+                self._stats["fingerprint_errors"] += 1
+
+            if entry is not None and fingerprint is not None and fingerprint == entry["fingerprint"]:
+                self._stats["revalidations"] += 1
+                self._stats["hits"] += 1
+                entry = dict(entry, expires_at=now + self.ttl)
+                self._entry = entry
+                return entry
+
+            self._stats["misses"] += 1
+            schema = self._loader()
+            entry = {
+                "schema": schema,
+                "schema_text": self._formatter(schema),
+                "fingerprint": fingerprint,
+                "loaded_at": time.time(),
+                "expires_at": time.monotonic() + self.ttl,
+            }
+            self._entry = entry
+            return entry
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._entry = None
+            self._stats["invalidations"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            entry = self._entry
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        stats["ttl"] = self.ttl
+        stats["cached"] = entry is not None
+        stats["age_seconds"] = time.time() - entry["loaded_at"] if entry else None
+        stats["listening"] = self._listener is not None and self._listener.is_alive()
+        return stats
+
+    def start_listener(self, channel: str = SCHEMA_CHANGE_CHANNEL) -> None:
+        """Invalidate on NOTIFY from the DDL event trigger, in a daemon thread."""
+        if self._listener is not None and self._listener.is_alive():
+            return
+        self._listener = threading.Thread(
+            target=self._listen, args=(channel,), name="schema-cache-listener", daemon=True
+        )
+        self._listener.start()
+
+    def _listen(self, channel: str) -> None:
+        while True:
+            conn = None
+            try:
+                conn = psycopg2.connect(**db_pool._db_config())
+                conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+                with conn.cursor() as cursor:
+                    cursor.execute(f"LISTEN {channel};")
+                # Anything may have changed while we were not listening.
+                self.invalidate()
+                while True:
+                    if select.select([conn], [], [], 60) == ([], [], []):
+                        continue
+                    conn.poll()
+                    if conn.notifies:
+                        conn.notifies.clear()
+                        self.invalidate()
+            except psycopg2.Error:
+                if conn is not None:
+                    conn.close()
+                time.sleep(5)
+
+
+def create_cache(
+    loader: Callable[[], Dict[str, Any]],
+    formatter: Callable[[Dict[str, Any]], str],
+) -> SchemaCache:
+    """Build a cache configured from SCHEMA_CACHE_TTL / SCHEMA_CACHE_LISTEN."""
+    config = _cache_config()
+    cache = SchemaCache(loader, formatter, ttl=config["ttl"])
+    if config["listen"]:
+        cache.start_listener()
+    return cache
@@ -0,0 +1,167 @@
+import os
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+CLIENT_COOKIE = "adk_client_id"
+CLIENT_HEADER = "X-Client-Id"
+
+# Client ids end up in ADK URLs, so only accept a conservative alphabet.
+_CLIENT_ID_RE = re.compile(r"^[A-Za-z0-9_-]{8,64}$")
+
+
+def _registry_config() -> Dict[str, Any]:
+    return {
+        "idle_timeout": float(os.getenv("CHAT_SESSION_IDLE_TIMEOUT", "1800")),
+        "max_turns": int(os.getenv("CHAT_SESSION_MAX_TURNS", "20")),
+        "max_clients": int(os.getenv("CHAT_SESSION_MAX_CLIENTS", "5000")),
+        "busy_timeout": float(os.getenv("CHAT_SESSION_BUSY_TIMEOUT", "30")),
+    }
+
+
+def new_client_id() -> str:
+    return uuid.uuid4().hex
+
+
+def valid_client_id(value: Optional[str]) -> bool:
+    return bool(value) and bool(_CLIENT_ID_RE.match(value))
+
+
+class ClientSession:
+    """The ADK session currently assigned to one browser/API client."""
+
+    def __init__(self, client_id: str) -> None:
+        self.client_id = client_id
+        self.user_id = f"web-{client_id}"
+        self.lock = threading.Lock()
+        self.session_id = ""
+        self.turns = 0
+        self.generation = 0
+        self.last_active = 0.0
+        self.roll_over()
+
+    def roll_over(self) -> None:
+        self.generation += 1
+        self.session_id = f"{self.client_id}-{self.generation}-{uuid.uuid4().hex[:8]}"
+        self.turns = 0
+        self.last_active = time.monotonic()
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "client_id": self.client_id,
+            "user_id": self.user_id,
+            "session_id": self.session_id,
+            "turn": self.turns + 1,
+            "generation": self.generation,
+        }
+
+
+class SessionRegistry:
+    """Maps client ids to ADK sessions and keeps each session's history bounded.
+
+    A client's session is rolled over to a fresh ADK session once it has been
+    idle for ``idle_timeout`` seconds or has served ``max_turns`` turns, so the
+    prompt ADK rebuilds from session history stays small. Clients idle for
+    longer than ``idle_timeout`` are evicted, and at most ``max_clients`` are
+    tracked (least recently active first out). Retired ``(user_id,
+    session_id)`` pairs are queued so the caller can delete them on ADK.
+
+    ``checkout()`` also takes the client's lock, so concurrent requests from
+    one client (two tabs sharing a cookie) are serialised instead of
+    interleaving turns in the same session.
+    """
+
+    def __init__(
+        self,
+        idle_timeout: float = 1800.0,
+        max_turns: int = 20,
+        max_clients: int = 5000,
+        busy_timeout: float = 30.0,
+    ) -> None:
+        self.idle_timeout = idle_timeout
+        self.max_turns = max_turns
+        self.max_clients = max_clients
+        self.busy_timeout = busy_timeout
+        self._lock = threading.Lock()
+        self._clients: "OrderedDict[str, ClientSession]" = OrderedDict()
+        self._retired: List[Tuple[str, str]] = []
+        self._stats = {"sessions_created": 0, "rollovers": 0, "evictions": 0, "busy_rejections": 0}
+
+    def _retire(self, entry: ClientSession) -> None:
+        if entry.turns:
+            self._retired.append((entry.user_id, entry.session_id))
+
+    def _evict_idle(self, now: float, keep: str) -> None:
+        # Entries are ordered by last activity, so stop at the first live one
+        # once the registry is within max_clients. Entries in use are skipped.
+        evicted = []
+        for client_id, entry in self._clients.items():
+            idle = now - entry.last_active > self.idle_timeout
+            if not idle and len(self._clients) - len(evicted) <= self.max_clients:
+                break
+            if client_id != keep and not entry.lock.locked():
+                evicted.append(client_id)
+        for client_id in evicted:
+            self._retire(self._clients.pop(client_id))
+            self._stats["evictions"] += 1
+
+    def checkout(self, client_id: str, new_session: bool = False) -> Optional[ClientSession]:
+        """Return the client's session with its lock held, or None when busy.
+
+        The caller must pass the result to :meth:`release` when the turn ends.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._clients.get(client_id)
+            if entry is None:
+                entry = ClientSession(client_id)
+                self._clients[client_id] = entry
+                self._stats["sessions_created"] += 1
+            self._clients.move_to_end(client_id)
+            # After the insert, so the bound holds; an idle session of this
+            # client is rolled over below instead.
+            self._evict_idle(now, keep=client_id)
+
+        if not entry.lock.acquire(timeout=self.busy_timeout):
+            with self._lock:
+                self._stats["busy_rejections"] += 1
+            return None
+
+        with self._lock:
+            expired = now - entry.last_active > self.idle_timeout
+            if new_session or expired or entry.turns >= self.max_turns:
+                self._retire(entry)
+                entry.roll_over()
+                self._stats["rollovers"] += 1
+                self._stats["sessions_created"] += 1
+        return entry
+
+    def release(self, entry: ClientSession, completed: bool = True) -> None:
+        with self._lock:
+            if completed:
+                entry.turns += 1
+            entry.last_active = time.monotonic()
+        entry.lock.release()
+
+    def drain_retired(self) -> List[Tuple[str, str]]:
+        with self._lock:
+            retired, self._retired = self._retired, []
+        return retired
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats: Dict[str, Any] = dict(self._stats)
+            stats["active_clients"] = len(self._clients)
+            stats["busy_clients"] = sum(1 for entry in self._clients.values() if entry.lock.locked())
+            stats["pending_deletes"] = len(self._retired)
+        stats["idle_timeout"] = self.idle_timeout
+        stats["max_turns"] = self.max_turns
+        stats["max_clients"] = self.max_clients
+        return stats
+
+
+def create_registry() -> SessionRegistry:
+    return SessionRegistry(**_registry_config())
@@ -24,37 +24,133 @@ async function sendQuery() {
     </div>
   `;
 
-  const resp = await fetch("/ask", {
-    method: "POST",
-    headers: { "Content-Type": "application/json" },
-    body: JSON.stringify({ query })
-  });
+  const message = document.createElement("div");
+  message.className = "message assistant-message";
+  message.innerHTML = `
+    <div class="label">Assistant</div>
+    <div class="bubble"><div class="answer">…</div><div class="result"></div><div class="timing"></div></div>
+  `;
+  messages.appendChild(message);
+  const answerEl = message.querySelector(".answer");
+  const resultEl = message.querySelector(".result");
+  const timingEl = message.querySelector(".timing");
 
-  const data = await resp.json();
+  // Final text events replace the partial deltas streamed before them.
+  let answer = "";
+  let streamed = "";
+  const render = () => {
+    answerEl.textContent = streamed || answer || "…";
+    messages.scrollTop = messages.scrollHeight;
+  };
 
-  let tableHtml = data.data ? renderTable(data.data) : "";
+  const started = performance.now();
+  let firstEventMs = null;
 
-  messages.innerHTML += `
-    <div class="message assistant-message">
-      <div class="label">Assistant</div>
-      <div class="bubble">${data.answer || "No answer"}${tableHtml}</div>
-    </div>
-  `;
+  const handlers = {
+    text: (data) => {
+      if (data.partial) {
+        streamed += data.text;
+      } else {
+        answer = data.text;
+        streamed = "";
+      }
+      render();
+    },
+    tool_result: (data) => {
+      if (data.data) resultEl.innerHTML = renderTable(data.data);
+      render();
+    },
+    done: (data) => {
+      answer = data.answer || answer || "No answer";
+      streamed = "";
+      if (data.data && !resultEl.innerHTML) resultEl.innerHTML = renderTable(data.data);
+      const timing = data.timing || {};
+      const totalMs = Math.round(performance.now() - started);
+      timingEl.textContent =
+        `first event ${firstEventMs ?? "-"} ms · total ${totalMs} ms` +
+        (timing.ttfb_ms != null ? ` (server: ${timing.ttfb_ms} / ${timing.total_ms} ms)` : "");
+      render();
+    },
+    error: (data) => {
+      answer = data.error || "Request failed";
+      streamed = "";
+      render();
+    },
+  };
+
+  let resp;
+  try {
+    resp = await fetch("/ask/stream", {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify({ query })
+    });
+  } catch (err) {
+    handlers.error({ error: String(err) });
+    return;
+  }
+
+  if (!resp.ok || !resp.body) {
+    const data = await resp.json().catch(() => ({}));
+    handlers.error({ error: data.error || `Request failed (${resp.status})` });
+    return;
+  }
+
+  const reader = resp.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    let boundary;
+    while ((boundary = buffer.indexOf("\n\n")) !== -1) {
+      const frame = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+
+      let event = "message";
+      let data = "";
+      frame.split("\n").forEach(line => {
+        if (line.startsWith("event:")) event = line.slice(6).trim();
+        else if (line.startsWith("data:")) data += line.slice(5).trim();
+      });
+      if (!data || !handlers[event]) continue;
+      if (firstEventMs === null) firstEventMs = Math.round(performance.now() - started);
+      handlers[event](JSON.parse(data));
+    }
+  }
+}
 
-  messages.scrollTop = messages.scrollHeight;
+// Accepts row objects ("records"), {columns, values} ("columnar")
+// or {columns, rows} ("rows") and renders them as positional rows.
+function toTable(data) {
+  if (Array.isArray(data)) {
+    const cols = data.length ? Object.keys(data[0]) : [];
+    return { cols, rows: data.map(r => cols.map(c => r[c])) };
+  }
+  const cols = data.columns || [];
+  if (data.values) {
+    const count = cols.length ? data.values[cols[0]].length : 0;
+    const rows = [];
+    for (let i = 0; i < count; i++) rows.push(cols.map(c => data.values[c][i]));
+    return { cols, rows };
+  }
+  return { cols, rows: data.rows || [] };
 }
 
-function renderTable(rows) {
+function renderTable(data) {
+  const { cols, rows } = toTable(data);
   if (!rows.length) return "";
 
-  const cols = Object.keys(rows[0]);
   let table = "<table><tr>";
   cols.forEach(c => table += `<th>${c}</th>`);
   table += "</tr>";
 
   rows.forEach(r => {
     table += "<tr>";
-    cols.forEach(c => table += `<td>${r[c]}</td>`);
+    r.forEach(v => table += `<td>${v}</td>`);
     table += "</tr>";
   });
 
@@ -1,10 +1,12 @@
 
-from . import postgres_tools
+from . import metrics, postgres_tools
 from google.adk.agents import Agent
 from dotenv import load_dotenv
 
 load_dotenv()
 
+metrics.serve_from_env()
+
 root_agent = Agent(
     name="Postgresql_Agent",
     model="gemini-2.5-flash",
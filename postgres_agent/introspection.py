@@ -0,0 +1,164 @@
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from . import db_pool
+
+# One round trip over pg_catalog. Every relation carries a version string built
+# from its pg_class xmin/relfilenode plus the attribute and constraint rows that
+# belong to it; column/key details are only computed (the CASE branches are
+# evaluated lazily) for relations whose version differs from the one we know.
+_INTROSPECT_SQL = """
+WITH known(oid, version) AS (
+    SELECT * FROM unnest(%(known_oids)s::oid[], %(known_versions)s::text[])
+),
+rels AS (
+    SELECT
+        c.oid,
+        n.nspname,
+        c.relname,
+        concat_ws(
+            '/',
+            c.xmin::text,
+            c.relfilenode::text,
+            (SELECT count(*)::text || ':' || coalesce(max(a.xmin::text::bigint), 0)::text
+             FROM pg_attribute a
+             WHERE a.attrelid = c.oid AND a.attnum > 0),
+            (SELECT count(*)::text || ':' || coalesce(max(con.xmin::text::bigint), 0)::text
+             FROM pg_constraint con
+             WHERE con.conrelid = c.oid)
+        ) AS version
+    FROM pg_class c
+    JOIN pg_namespace n ON n.oid = c.relnamespace
+    WHERE c.relkind IN ('r', 'p', 'v', 'f')
+        AND NOT c.relispartition  -- partitions are reached through their parent
+        AND n.nspname NOT IN ('pg_catalog', 'information_schema')
+        AND n.nspname NOT LIKE 'pg_toast%%'
+        AND (%(relnames)s::text[] IS NULL OR c.relname = ANY(%(relnames)s::text[]))
+)
+SELECT
+    r.oid,
+    r.nspname,
+    r.relname,
+    r.version,
+    k.version IS DISTINCT FROM r.version AS changed,
+    CASE WHEN k.version IS DISTINCT FROM r.version THEN (
+        SELECT json_agg(
+            json_build_array(
+                a.attname,
+                CASE
+                    WHEN t.typtype = 'd' THEN format_type(t.typbasetype, NULL)
+                    WHEN t.typcategory = 'A' THEN 'ARRAY'
+                    WHEN tn.nspname = 'pg_catalog' THEN format_type(a.atttypid, NULL)
+                    ELSE 'USER-DEFINED'
+                END,
+                NOT a.attnotnull
+            )
+            ORDER BY a.attnum
+        )
+        FROM pg_attribute a
+        JOIN pg_type t ON t.oid = a.atttypid
+        JOIN pg_namespace tn ON tn.oid = t.typnamespace
+        WHERE a.attrelid = r.oid AND a.attnum > 0 AND NOT a.attisdropped
+    ) END AS columns,
+    CASE WHEN k.version IS DISTINCT FROM r.version THEN (
+        SELECT array_agg(a.attname::text ORDER BY keycols.ord)
+        FROM pg_constraint con
+        CROSS JOIN LATERAL unnest(con.conkey) WITH ORDINALITY AS keycols(attnum, ord)
+        JOIN pg_attribute a ON a.attrelid = con.conrelid AND a.attnum = keycols.attnum
+        WHERE con.conrelid = r.oid AND con.contype = 'p'
+    ) END AS primary_key,
+    CASE WHEN k.version IS DISTINCT FROM r.version THEN (
+        SELECT json_agg(
+            json_build_array(a.attname, fn.nspname, fc.relname, fa.attname)
+            ORDER BY con.conname, keycols.ord
+        )
+        FROM pg_constraint con
+        CROSS JOIN LATERAL unnest(con.conkey, con.confkey) WITH ORDINALITY AS keycols(attnum, fattnum, ord)
+        JOIN pg_attribute a ON a.attrelid = con.conrelid AND a.attnum = keycols.attnum
+        JOIN pg_class fc ON fc.oid = con.confrelid
+        JOIN pg_namespace fn ON fn.oid = fc.relnamespace
+        JOIN pg_attribute fa ON fa.attrelid = con.confrelid AND fa.attnum = keycols.fattnum
+        WHERE con.conrelid = r.oid AND con.contype = 'f'
+    ) END AS foreign_keys
+FROM rels r
+LEFT JOIN known k ON k.oid = r.oid
+ORDER BY r.nspname, r.relname;
+"""
+
+
+def _build_table(columns: Any, primary_key: Any, foreign_keys: Any) -> Dict[str, Any]:
+    return {
+        "columns": [
+            {"name": name, "type": data_type, "nullable": nullable}
+            for name, data_type, nullable in columns or []
+        ],
+        "primary_key": list(primary_key or []),
+        "foreign_keys": [
+            {
+                "column": column,
+                "references": f"{foreign_schema}.{foreign_table}({foreign_column})",
+            }
+            for column, foreign_schema, foreign_table, foreign_column in foreign_keys or []
+        ],
+    }
+
+
+class CatalogIntrospector:
+    """Builds the ``{"tables": {...}}`` schema structure from pg_catalog.
+
+    The first ``refresh()`` reads every relation in a single query. Later calls
+    send the known per-relation versions along and only rebuild the relations
+    that were created or altered since; dropped relations simply disappear.
+    """
+
+    def __init__(self, relnames: Optional[Iterable[str]] = None) -> None:
+        self._relnames = sorted(relnames) if relnames is not None else None
+        self._lock = threading.Lock()
+        self._versions: Dict[int, str] = {}
+        self._tables: Dict[int, Tuple[str, Dict[str, Any]]] = {}
+        self.last_refresh: Dict[str, Any] = {}
+
+    def refresh(self, full: bool = False) -> Dict[str, Any]:
+        with self._lock:
+            known = {} if full else self._versions
+            started = time.perf_counter()
+            with db_pool.connection() as conn:
+                with conn.cursor() as cursor:
+                    cursor.execute(
+                        _INTROSPECT_SQL,
+                        {
+                            "known_oids": list(known.keys()),
+                            "known_versions": list(known.values()),
+                            "relnames": self._relnames,
+                        },
+                    )
+                    rows = cursor.fetchall()
+
+            versions: Dict[int, str] = {}
+            tables: Dict[int, Tuple[str, Dict[str, Any]]] = {}
+            rebuilt = 0
+            for oid, nspname, relname, version, changed, columns, primary_key, foreign_keys in rows:
+                key = f"{nspname}.{relname}"
+                if changed:
+                    table = _build_table(columns, primary_key, foreign_keys)
+                    rebuilt += 1
+                else:
+                    table = self._tables[oid][1]
+                versions[oid] = version
+                tables[oid] = (key, table)
+
+            self._versions = versions
+            self._tables = tables
+            self.last_refresh = {
+                "relations": len(rows),
+                "rebuilt": rebuilt,
+                "seconds": time.perf_counter() - started,
+            }
+            return self.schema()
+
+    def schema(self) -> Dict[str, Any]:
+        ordered: List[Tuple[str, Dict[str, Any]]] = sorted(self._tables.values(), key=lambda item: item[0])
+        schema: Dict[str, Any] = {"tables": dict(ordered)}
+        schema["table_count"] = len(schema["tables"])
+        return schema
@@ -0,0 +1,121 @@
+import datetime
+import decimal
+import json
+import os
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+try:
+    import orjson
+except ImportError:  # optional fast backend for dumps()
+    orjson = None
+
+# Postgres type OIDs (pg_type.oid) whose psycopg2 values are already JSON types.
+_NATIVE_OIDS = frozenset({
+    16,  # bool
+    18, 19, 25, 1042, 1043,  # char, name, text, bpchar, varchar
+    20, 21, 23, 26,  # int8, int2, int4, oid
+    700, 701,  # float4, float8
+    114, 3802,  # json, jsonb (decoded by psycopg2)
+    705,  # unknown (string literals)
+})
+
+
+def _codec_config() -> Dict[str, Any]:
+    return {"backend": os.getenv("JSON_BACKEND", "auto").lower()}
+
+
+def _bytea(value: memoryview) -> str:
+    return "\\x" + bytes(value).hex()
+
+
+# OID -> converter for values psycopg2 returns as non-JSON Python types.
+_CONVERTERS: Dict[int, Callable[[Any], Any]] = {
+    1700: str,  # numeric -> Decimal
+    1082: datetime.date.isoformat,  # date
+    1114: datetime.datetime.isoformat,  # timestamp
+    1184: datetime.datetime.isoformat,  # timestamptz
+    1083: datetime.time.isoformat,  # time
+    1266: datetime.time.isoformat,  # timetz
+    1186: str,  # interval -> timedelta
+    2950: str,  # uuid
+    17: _bytea,  # bytea -> memoryview
+}
+
+
+def json_safe_value(value: Any) -> Any:
+    """Convert one value of any type; the fallback for columns of unknown type."""
+    if isinstance(value, (datetime.date, datetime.datetime, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, (decimal.Decimal, uuid.UUID, datetime.timedelta)):
+        return str(value)
+    if isinstance(value, memoryview):
+        return _bytea(value)
+    if isinstance(value, (list, tuple)):
+        return [json_safe_value(item) for item in value]
+    return value
+
+
+def column_converters(description: Sequence[Any]) -> List[Optional[Callable[[Any], Any]]]:
+    """One converter per result column from ``cursor.description`` type OIDs; None keeps the value."""
+    converters: List[Optional[Callable[[Any], Any]]] = []
+    for column in description or ():
+        oid = column[1]
+        if oid in _NATIVE_OIDS:
+            converters.append(None)
+        else:
+            converters.append(_CONVERTERS.get(oid, json_safe_value))
+    return converters
+
+
+def row_converter(description: Sequence[Any]) -> Callable[[Sequence[Any]], List[Any]]:
+    """Build a function turning a result row into a list of JSON-ready values.
+
+    Types are resolved once per column from the cursor description, so a row
+    costs one call per non-native column and no isinstance checks.
+    """
+    converted = [
+        (index, converter)
+        for index, converter in enumerate(column_converters(description))
+        if converter is not None
+    ]
+    if not converted:
+        return list
+
+    def convert(row: Sequence[Any]) -> List[Any]:
+        values = list(row)
+        for index, converter in converted:
+            value = values[index]
+            if value is not None:
+                values[index] = converter(value)
+        return values
+
+    return convert
+
+
+def default(value: Any) -> Any:
+    """``default=`` hook for encoders: whatever was not converted at fetch time."""
+    converted = json_safe_value(value)
+    if converted is value:
+        return str(value)
+    return converted
+
+
+def backend() -> str:
+    name = _codec_config()["backend"]
+    if name == "stdlib" or orjson is None:
+        return "stdlib"
+    return "orjson"
+
+
+def dumps(obj: Any, sort_keys: bool = False) -> bytes:
+    """Encode ``obj`` as compact UTF-8 JSON with orjson when available, else the stdlib."""
+    if _backend == "orjson":
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_SORT_KEYS if sort_keys else 0)
+        return orjson.dumps(obj, default=default, option=option)
+    return json.dumps(
+        obj, default=default, sort_keys=sort_keys, ensure_ascii=False, separators=(",", ":")
+    ).encode()
+
+
+_backend = backend()
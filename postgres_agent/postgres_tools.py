@@ -1,135 +1,26 @@
-import datetime
-import decimal
-import os
 from typing import Any, Dict, List, Optional
 
-import psycopg2
 from dotenv import load_dotenv
 
-load_dotenv()
-
+from . import db_pool, introspection, json_codec, metrics, schema_cache, sql_parser
 
-def _db_config() -> Dict[str, Any]:
-    return {
-        "host": os.getenv("DB_HOST", "localhost"),
-        "port": int(os.getenv("DB_PORT", "5432")),
-        "dbname": os.getenv("DB_NAME", "mydb"),
-        "user": os.getenv("DB_USER", "postgres"),
-        "password": os.getenv("DB_PASSWORD", "postgres"),
-    }
+load_dotenv()
 
 
 def _get_connection():
-    conn = psycopg2.connect(**_db_config())
-    conn.set_session(readonly=True, autocommit=True)
-    return conn
+    """Check out a pooled read-only connection; use as a context manager."""
+    return db_pool.connection()
 
 
 def _is_readonly_sql(sql: str) -> bool:
-    normalized = " ".join(sql.strip().strip(";").split()).lower()
-    if not normalized:
-        return False
-    if normalized.startswith("select ") or normalized.startswith("with "):
-        forbidden = (
-            " insert ",
-            " update ",
-            " delete ",
-            " drop ",
-            " alter ",
-            " create ",
-            " truncate ",
-            " grant ",
-            " revoke ",
-            " commit ",
-            " rollback ",
-        )
-        return not any(token in f" {normalized} " for token in forbidden)
-    return False
+    return sql_parser.analyze_sql(sql).readonly
+
+
+_introspector = introspection.CatalogIntrospector()
 
 
 def _fetch_schema() -> Dict[str, Any]:
-    schema: Dict[str, Any] = {"tables": {}}
-    with _get_connection() as conn:
-        with conn.cursor() as cursor:
-            cursor.execute(
-                """
-                SELECT table_schema, table_name, column_name, data_type, is_nullable
-                FROM information_schema.columns
-                WHERE table_schema NOT IN ('pg_catalog', 'information_schema')
-                ORDER BY table_schema, table_name, ordinal_position;
-                """
-            )
-            for table_schema, table_name, column_name, data_type, is_nullable in cursor.fetchall():
-                key = f"{table_schema}.{table_name}"
-                table = schema["tables"].setdefault(
-                    key,
-                    {"columns": [], "primary_key": [], "foreign_keys": []},
-                )
-                table["columns"].append(
-                    {
-                        "name": column_name,
-                        "type": data_type,
-                        "nullable": is_nullable == "YES",
-                    }
-                )
-
-            cursor.execute(
-                """
-                SELECT tc.table_schema, tc.table_name, kcu.column_name
-                FROM information_schema.table_constraints tc
-                JOIN information_schema.key_column_usage kcu
-                    ON tc.constraint_name = kcu.constraint_name
-                    AND tc.table_schema = kcu.table_schema
-                WHERE tc.constraint_type = 'PRIMARY KEY'
-                    AND tc.table_schema NOT IN ('pg_catalog', 'information_schema')
-                ORDER BY tc.table_schema, tc.table_name, kcu.ordinal_position;
-                """
-            )
-            for table_schema, table_name, column_name in cursor.fetchall():
-                key = f"{table_schema}.{table_name}"
-                table = schema["tables"].setdefault(
-                    key,
-                    {"columns": [], "primary_key": [], "foreign_keys": []},
-                )
-                table["primary_key"].append(column_name)
-
-            cursor.execute(
-                """
-                SELECT tc.table_schema, tc.table_name, kcu.column_name,
-                       ccu.table_schema, ccu.table_name, ccu.column_name
-                FROM information_schema.table_constraints tc
-                JOIN information_schema.key_column_usage kcu
-                    ON tc.constraint_name = kcu.constraint_name
-                    AND tc.table_schema = kcu.table_schema
-                JOIN information_schema.constraint_column_usage ccu
-                    ON ccu.constraint_name = tc.constraint_name
-                    AND ccu.table_schema = tc.table_schema
-                WHERE tc.constraint_type = 'FOREIGN KEY'
-                    AND tc.table_schema NOT IN ('pg_catalog', 'information_schema')
-                ORDER BY tc.table_schema, tc.table_name, kcu.ordinal_position;
-                """
-            )
-            for (
-                table_schema,
-                table_name,
-                column_name,
-                foreign_schema,
-                foreign_table,
-                foreign_column,
-            ) in cursor.fetchall():
-                key = f"{table_schema}.{table_name}"
-                table = schema["tables"].setdefault(
-                    key,
-                    {"columns": [], "primary_key": [], "foreign_keys": []},
-                )
-                table["foreign_keys"].append(
-                    {
-                        "column": column_name,
-                        "references": f"{foreign_schema}.{foreign_table}({foreign_column})",
-                    }
-                )
-    schema["table_count"] = len(schema["tables"])
-    return schema
+    return _introspector.refresh()
 
 
 def _format_schema(schema: Dict[str, Any]) -> str:
@@ -149,10 +40,27 @@ def _format_schema(schema: Dict[str, Any]) -> str:
     return "\n".join(lines).strip()
 
 
+_schema_cache = schema_cache.create_cache(_fetch_schema, _format_schema)
+
+
+def _cached_schema() -> Dict[str, Any]:
+    """Return ``{"schema": ..., "schema_text": ...}`` from the process-wide cache."""
+    with metrics.stage("schema_fetch"):
+        return _schema_cache.get()
+
+
+def schema_cache_stats() -> Dict[str, Any]:
+    return _schema_cache.stats()
+
+
+def invalidate_schema_cache() -> None:
+    _schema_cache.invalidate()
+
+
 def get_postgres_schema() -> Dict[str, Any]:
     """Return the database schema (tables, columns, primary keys, foreign keys)."""
-    schema = _fetch_schema()
-    return {"status": "success", "schema": schema, "schema_text": _format_schema(schema)}
+    cached = _cached_schema()
+    return {"status": "success", "schema": cached["schema"], "schema_text": cached["schema_text"]}
 
 
 def run_readonly_query(sql: str, max_rows: int = 200) -> Dict[str, Any]:
@@ -162,21 +70,26 @@ def run_readonly_query(sql: str, max_rows: int = 200) -> Dict[str, Any]:
         sql: A read-only SQL statement (SELECT or WITH). Must not modify data.
         max_rows: Maximum number of rows to return in the response.
     """
-    if not _is_readonly_sql(sql):
+    with metrics.stage("sql_validate"):
+        analysis = sql_parser.analyze_sql(sql)
+    if not analysis.readonly:
         return {
             "status": "error",
-            "error_message": "Only read-only SELECT/WITH queries are allowed.",
+            "error_message": f"Only read-only SELECT/WITH queries are allowed: {analysis.reason}.",
         }
 
     with _get_connection() as conn:
         with conn.cursor() as cursor:
-            cursor.execute(sql)
-            rows = cursor.fetchmany(max_rows + 1)
+            with metrics.stage("query_execute"):
+                cursor.execute(sql)
+                rows = cursor.fetchmany(max_rows + 1)
             truncated = len(rows) > max_rows
             if truncated:
                 rows = rows[:max_rows]
             columns = [desc[0] for desc in cursor.description or []]
-            rows = [_json_safe_row(row) for row in rows]
+            with metrics.stage("row_convert"):
+                convert = json_codec.row_converter(cursor.description)
+                rows = [convert(row) for row in rows]
     return {
         "status": "success",
         "sql": sql,
@@ -187,20 +100,6 @@ def run_readonly_query(sql: str, max_rows: int = 200) -> Dict[str, Any]:
     }
 
 
-def _json_safe_value(value: Any) -> Any:
-    if isinstance(value, (datetime.date, datetime.datetime)):
-        return value.isoformat()
-    if isinstance(value, decimal.Decimal):
-        return str(value)
-    return value
-
-
-def _json_safe_row(row: Any) -> Any:
-    if isinstance(row, (list, tuple)):
-        return [_json_safe_value(value) for value in row]
-    return _json_safe_value(row)
-
-
 def _intent_to_sql(question: str, schema: Dict[str, Any]) -> Optional[str]:
     normalized = " ".join(question.lower().split())
     if "list tables" in normalized or "show tables" in normalized:
@@ -236,9 +135,9 @@ def query_postgres(question: str, sql: Optional[str] = None, max_rows: int = 200
         sql: Optional SQL to run. If omitted, simple intent patterns are applied.
         max_rows: Maximum number of rows to return.
     """
-    schema = _fetch_schema()
-    print(f"#############sql: {sql}. ############")
-    schema_text = _format_schema(schema)
+    cached = _cached_schema()
+    schema = cached["schema"]
+    schema_text = cached["schema_text"]
     query = sql or _intent_to_sql(question, schema)
     if not query:
         return {
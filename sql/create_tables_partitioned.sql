@@ -0,0 +1,124 @@
+CREATE TABLE IF NOT EXISTS stores (
+    store_id SERIAL PRIMARY KEY,
+    store_code VARCHAR(20) UNIQUE NOT NULL,
+    store_name VARCHAR(100),
+    city VARCHAR(50),
+    state VARCHAR(50),
+    region VARCHAR(50),
+    store_type VARCHAR(30),
+    opened_date DATE
+);
+
+CREATE TABLE IF NOT EXISTS products (
+    product_id SERIAL PRIMARY KEY,
+    sku_code VARCHAR(30) UNIQUE NOT NULL,
+    product_name VARCHAR(150),
+    brand VARCHAR(100),
+    category VARCHAR(50),
+    sub_category VARCHAR(50),
+    pack_size VARCHAR(30),
+    unit_price NUMERIC(10,2),
+    launch_date DATE,
+    is_active BOOLEAN DEFAULT TRUE
+);
+
+CREATE TABLE IF NOT EXISTS calendar (
+    date_id DATE PRIMARY KEY,
+    year INT,
+    month INT,
+    day INT,
+    week_of_year INT,
+    quarter INT,
+    day_of_week INT,
+    is_weekend BOOLEAN
+);
+
+-- sales_fact range-partitioned by month on date_id. The primary key has to
+-- include the partition key; uq_sales already does.
+CREATE TABLE IF NOT EXISTS sales_fact (
+    sales_id BIGSERIAL,
+    date_id DATE NOT NULL,
+    store_id INT NOT NULL,
+    product_id INT NOT NULL,
+    units_sold INT,
+    gross_sales NUMERIC(12,2),
+    discount_amount NUMERIC(12,2),
+    net_sales NUMERIC(12,2),
+    promo_flag BOOLEAN DEFAULT FALSE,
+    inventory_on_hand INT,
+
+    CONSTRAINT pk_sales_fact PRIMARY KEY (sales_id, date_id),
+    CONSTRAINT fk_sales_date FOREIGN KEY (date_id) REFERENCES calendar(date_id),
+    CONSTRAINT fk_sales_store FOREIGN KEY (store_id) REFERENCES stores(store_id),
+    CONSTRAINT fk_sales_product FOREIGN KEY (product_id) REFERENCES products(product_id),
+    CONSTRAINT uq_sales UNIQUE (date_id, store_id, product_id)
+) PARTITION BY RANGE (date_id);
+
+-- Creates the monthly partition holding month_start (sales_fact_2025_01 etc.).
+CREATE OR REPLACE FUNCTION ensure_sales_fact_partition(month_start DATE)
+RETURNS void
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    lower_bound DATE := date_trunc('month', month_start)::date;
+    partition_name TEXT := 'sales_fact_' || to_char(lower_bound, 'YYYY_MM');
+BEGIN
+    IF to_regclass(partition_name) IS NOT NULL THEN
+        RETURN;
+    END IF;
+    EXECUTE format(
+        'CREATE TABLE IF NOT EXISTS %I PARTITION OF sales_fact FOR VALUES FROM (%L) TO (%L)',
+        partition_name, lower_bound, (lower_bound + INTERVAL '1 month')::date
+    );
+EXCEPTION
+    WHEN duplicate_table THEN
+        NULL;  -- a concurrent loader created it first
+END;
+$$;
+
+-- Every fact row needs its calendar row first (fk_sales_date), so creating
+-- partitions as calendar days arrive means ingestion never hits a month
+-- without one. A partition cannot be created from a trigger on sales_fact
+-- itself while the insert into it is running.
+CREATE OR REPLACE FUNCTION calendar_create_sales_fact_partitions()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    PERFORM ensure_sales_fact_partition(month_start)
+    FROM (SELECT DISTINCT date_trunc('month', date_id)::date AS month_start FROM new_dates) months;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS calendar_sales_fact_partitions ON calendar;
+
+CREATE TRIGGER calendar_sales_fact_partitions
+    AFTER INSERT ON calendar
+    REFERENCING NEW TABLE AS new_dates
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION calendar_create_sales_fact_partitions();
+
+SELECT ensure_sales_fact_partition(month_start)
+FROM (SELECT DISTINCT date_trunc('month', date_id)::date AS month_start FROM calendar) months;
+
+-- The parent has no pg_stat counters of its own; this sequence gives the
+-- query result cache a write version for sales_fact (see result_cache.py).
+CREATE SEQUENCE IF NOT EXISTS sales_fact_change_seq;
+
+CREATE OR REPLACE FUNCTION sales_fact_bump_change_seq()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    PERFORM nextval('sales_fact_change_seq');
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS sales_fact_change_seq ON sales_fact;
+
+CREATE TRIGGER sales_fact_change_seq
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON sales_fact
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION sales_fact_bump_change_seq();
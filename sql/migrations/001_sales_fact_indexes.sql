@@ -0,0 +1,8 @@
+-- sales_fact is appended day by day, so a BRIN index on date_id prunes date
+-- ranges at a fraction of a btree's size. Dimension keys get btrees for joins
+-- and equality filters (date_id-first uq_sales does not serve them).
+-- requires: sales_fact
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_sales_fact_date_id_brin ON sales_fact USING brin (date_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_sales_fact_store_id ON sales_fact USING btree (store_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_sales_fact_product_id ON sales_fact USING btree (product_id);
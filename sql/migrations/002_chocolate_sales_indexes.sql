@@ -0,0 +1,8 @@
+-- The CSV is not in date order, so date gets a btree here; the index advisor
+-- recommends BRIN instead once the physical correlation is high.
+-- requires: chocolate_sales
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_chocolate_sales_date ON chocolate_sales USING btree (date);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_chocolate_sales_country ON chocolate_sales USING btree (country);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_chocolate_sales_product ON chocolate_sales USING btree (product);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_chocolate_sales_sales_person ON chocolate_sales USING btree (sales_person);
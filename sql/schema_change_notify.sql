@@ -0,0 +1,16 @@
+-- Optional: lets the agent's schema cache invalidate immediately on DDL
+-- (set SCHEMA_CACHE_LISTEN=true). Event triggers require superuser.
+CREATE OR REPLACE FUNCTION notify_schema_changed()
+RETURNS event_trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    PERFORM pg_notify('schema_changed', tg_tag);
+END;
+$$;
+
+DROP EVENT TRIGGER IF EXISTS schema_changed_notify;
+
+CREATE EVENT TRIGGER schema_changed_notify
+    ON ddl_command_end
+    EXECUTE FUNCTION notify_schema_changed();
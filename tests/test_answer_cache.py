@@ -0,0 +1,149 @@
+import pytest
+
+from monitoring_api import answer_cache
+
+ANSWER = {"answer": "UK leads.", "sql": "SELECT country, SUM(amount) FROM chocolate_sales GROUP BY 1", "data": [{"country": "UK"}]}
+
+
+class Snapshot:
+    """Stand-in for sales_analysis_tools.data_snapshot with controllable versions."""
+
+    def __init__(self):
+        self.versions = {"chocolate_sales": "1"}
+        self.calls = 0
+
+    def __call__(self, sql):
+        self.calls += 1
+        return dict(self.versions) if self.versions is not None else None
+
+
+@pytest.fixture
+def snapshot():
+    return Snapshot()
+
+
+def make_cache(snapshot, **options):
+    return answer_cache.AnswerCache(snapshot, **options)
+
+
+def test_exact_hit_after_normalization(snapshot):
+    cache = make_cache(snapshot)
+    assert cache.put("What are total sales by country?", ANSWER)
+    hit = cache.get("  total REVENUE per country ")
+    assert hit["answer"] == ANSWER["answer"] and hit["sql"] == ANSWER["sql"]
+    assert hit["cache"]["similarity"] == 1.0
+    assert cache.stats()["hits"] == 1
+
+
+def test_near_duplicate_hit(snapshot):
+    cache = make_cache(snapshot, threshold=0.7)
+    cache.put("What are total sales by country?", ANSWER)
+    hit = cache.get("show me total sales by country overall")
+    assert hit is not None
+    assert 0.7 <= hit["cache"]["similarity"] < 1.0
+    assert cache.stats()["similar_hits"] == 1
+    assert cache.get("total sales by product") is None
+
+
+def test_different_numbers_never_match(snapshot):
+    cache = make_cache(snapshot, threshold=0.1)
+    cache.put("top 5 sales people", ANSWER)
+    assert cache.get("top 10 sales people") is None
+    assert cache.get("top sales people") is None
+    assert cache.get("top 5 sales people") is not None
+
+
+@pytest.mark.parametrize(
+    "question",
+    ["and what about India?", "What about products?", "show those by month", "same for 2022", "compare it to last year"],
+)
+def test_context_dependent_follow_ups_are_skipped(snapshot, question):
+    cache = make_cache(snapshot)
+    assert not cache.put(question, ANSWER)
+    cache.put(question.replace("?", ""), ANSWER)
+    assert cache.get(question) is None
+    assert cache.stats()["size"] == 0
+    assert cache.stats()["skipped"] == 1
+
+
+def test_answers_without_sql_are_not_cached(snapshot):
+    cache = make_cache(snapshot)
+    assert not cache.put("hello there", {"answer": "Hi!", "sql": None, "data": None})
+    assert cache.stats()["size"] == 0
+
+
+def test_ttl_expiry(snapshot, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(answer_cache.time, "time", lambda: now[0])
+    cache = make_cache(snapshot, ttl=60)
+    cache.put("total sales by country", ANSWER)
+    now[0] += 59
+    assert cache.get("total sales by country") is not None
+    now[0] += 2
+    assert cache.get("total sales by country") is None
+    stats = cache.stats()
+    assert stats["expired"] == 1 and stats["size"] == 0
+
+
+def test_stale_snapshot_evicts(snapshot):
+    cache = make_cache(snapshot)
+    cache.put("total sales by country", ANSWER)
+    snapshot.versions = {"chocolate_sales": "2"}
+    assert cache.get("total sales by country") is None
+    stats = cache.stats()
+    assert stats["stale"] == 1 and stats["size"] == 0
+
+
+def test_unreadable_snapshot_misses_without_evicting(snapshot):
+    cache = make_cache(snapshot)
+    cache.put("total sales by country", ANSWER)
+    snapshot.versions = None
+    assert cache.get("total sales by country") is None
+    assert not cache.put("total sales by product", ANSWER)
+    assert cache.stats()["snapshot_errors"] == 2
+    snapshot.versions = {"chocolate_sales": "1"}
+    assert cache.get("total sales by country") is not None
+
+
+def test_lru_bound(snapshot):
+    cache = make_cache(snapshot, max_entries=2)
+    cache.put("total sales by country", ANSWER)
+    cache.put("total sales by product", ANSWER)
+    assert cache.get("total sales by country") is not None  # now most recently used
+    cache.put("total sales by month", ANSWER)
+    stats = cache.stats()
+    assert stats["size"] == 2 and stats["evictions"] == 1
+    assert cache.get("total sales by product") is None
+    assert cache.get("total sales by country") is not None
+    assert cache.get("total sales by month") is not None
+
+
+def test_callers_get_independent_copies(snapshot):
+    cache = make_cache(snapshot)
+    answer = {"answer": "UK leads.", "sql": ANSWER["sql"], "data": [{"country": "UK"}]}
+    cache.put("total sales by country", answer)
+    answer["data"][0]["country"] = "changed by the caller that stored it"
+
+    first = cache.get("total sales by country")
+    assert first["data"] == [{"country": "UK"}]
+    first["data"].append({"country": "India"})
+    first["timing"] = {"total_ms": 1}
+
+    second = cache.get("total sales by country")
+    assert second["data"] == [{"country": "UK"}]
+    assert "timing" not in second
+
+
+def test_disabled_cache_does_nothing(snapshot):
+    cache = make_cache(snapshot, enabled=False)
+    assert not cache.put("total sales by country", ANSWER)
+    assert cache.get("total sales by country") is None
+    assert snapshot.calls == 0
+
+
+def test_invalidate(snapshot):
+    cache = make_cache(snapshot)
+    cache.put("total sales by country", ANSWER)
+    cache.invalidate()
+    assert cache.get("total sales by country") is None
+    assert cache.stats()["invalidations"] == 1
@@ -0,0 +1,139 @@
+import threading
+import time
+
+import pytest
+
+from benchmarks import fake_adk_server
+from monitoring_api import app as app_module
+from monitoring_api import concurrency
+
+QUESTION = {"query": "What are total sales by country?", "cache": False}
+
+
+def test_admits_up_to_max_active_then_rejects_when_queue_full():
+    limit = concurrency.ConcurrencyLimit("agent", max_active=2, max_queued=0, queue_timeout=1)
+    limit.acquire()
+    limit.acquire()
+    with pytest.raises(concurrency.Overloaded) as caught:
+        limit.acquire()
+    assert caught.value.reason == "queue_full"
+    assert limit.stats()["rejected_queue_full"] == 1
+    limit.release()
+    limit.acquire()
+    assert limit.stats()["active"] == 2
+
+
+def test_queued_request_times_out():
+    limit = concurrency.ConcurrencyLimit("agent", max_active=1, max_queued=1, queue_timeout=0.05)
+    limit.acquire()
+    started = time.monotonic()
+    with pytest.raises(concurrency.Overloaded) as caught:
+        limit.acquire()
+    assert caught.value.reason == "queue_timeout"
+    assert time.monotonic() - started >= 0.05
+    stats = limit.stats()
+    assert stats["rejected_timeout"] == 1 and stats["waiting"] == 0
+
+
+def test_release_admits_a_queued_request():
+    limit = concurrency.ConcurrencyLimit("agent", max_active=1, max_queued=1, queue_timeout=5)
+    limit.acquire()
+    admitted = threading.Event()
+
+    def waiter():
+        limit.acquire()
+        admitted.set()
+
+    thread = threading.Thread(target=waiter)
+    thread.start()
+    time.sleep(0.05)
+    assert not admitted.is_set()
+    limit.release()
+    thread.join(5)
+    assert admitted.is_set()
+    assert limit.stats()["queued"] == 1
+
+
+def test_disabled_limits_and_endpoint_lookup():
+    limiter = concurrency.ConcurrencyLimiter({
+        "agent": {"endpoints": ("ask_agent",), "max_active": 1, "max_queued": 0, "queue_timeout": 1},
+        "query": {"endpoints": ("query",), "max_active": 0, "max_queued": 0, "queue_timeout": 1},
+    })
+    assert limiter.limit_for("ask_agent").name == "agent"
+    assert limiter.limit_for("query") is None
+    assert limiter.limit_for(None) is None
+
+
+@pytest.fixture
+def fake_adk():
+    server = fake_adk_server.start_server(0, llm_delay=0.01, answer_delay=0.01, jitter=0, tool_mode="canned")
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+def make_client(monkeypatch, fake_adk, max_queued, queue_timeout=0.05):
+    monkeypatch.setenv("API_AGENT_CONCURRENCY", "1")
+    monkeypatch.setenv("API_AGENT_QUEUE", str(max_queued))
+    monkeypatch.setenv("API_QUEUE_TIMEOUT", str(queue_timeout))
+    monkeypatch.setattr(app_module, "ADK_BASE_URL", fake_adk)
+    return app_module.create_app().test_client()
+
+
+def agent_stats(client):
+    return client.get("/server/stats").get_json()["concurrency"]["agent"]
+
+
+def open_stream(client, client_id):
+    response = client.post(
+        "/ask/stream", json=QUESTION, headers={"X-Client-Id": client_id}, buffered=False
+    )
+    assert response.status_code == 200
+    next(iter(response.response))  # the turn is running and holds its slot
+    return response
+
+
+def test_full_queue_returns_503(monkeypatch, fake_adk):
+    client = make_client(monkeypatch, fake_adk, max_queued=0)
+    stream = open_stream(client, "client-stream-1")
+    try:
+        response = client.post("/ask", json=QUESTION, headers={"X-Client-Id": "client-other-1"})
+        assert response.status_code == 503
+        assert response.get_json()["reason"] == "queue_full"
+        assert response.headers["Retry-After"] == "1"
+    finally:
+        stream.close()
+
+
+def test_queue_timeout_returns_503(monkeypatch, fake_adk):
+    client = make_client(monkeypatch, fake_adk, max_queued=1)
+    stream = open_stream(client, "client-stream-1")
+    try:
+        response = client.post("/ask", json=QUESTION, headers={"X-Client-Id": "client-other-1"})
+        assert response.status_code == 503
+        assert response.get_json()["reason"] == "queue_timeout"
+        assert agent_stats(client)["rejected_timeout"] == 1
+    finally:
+        stream.close()
+
+
+def test_stream_closed_early_releases_its_slot(monkeypatch, fake_adk):
+    client = make_client(monkeypatch, fake_adk, max_queued=0)
+    stream = open_stream(client, "client-stream-1")
+    assert agent_stats(client)["active"] == 1
+    stream.close()  # client went away before the turn finished
+    assert agent_stats(client)["active"] == 0
+
+    with client.post("/ask", json=QUESTION, headers={"X-Client-Id": "client-other-1"}) as response:
+        assert response.status_code == 200
+    # The WSGI server closes every response; that is when the slot is released.
+    assert agent_stats(client)["active"] == 0
+
+
+def test_unlimited_endpoints_are_not_admitted(monkeypatch, fake_adk):
+    client = make_client(monkeypatch, fake_adk, max_queued=0)
+    stream = open_stream(client, "client-stream-1")
+    try:
+        assert client.get("/health").status_code == 200
+    finally:
+        stream.close()
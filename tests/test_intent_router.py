@@ -0,0 +1,154 @@
+import datetime
+import importlib
+
+import pytest
+
+COPIES = ["monitoring_agent", "monitoring_api"]
+VALUES = {"country": ["UK", "New Zealand"], "product": ["85% Dark Bars", "Mint Chip Choco"]}
+SCHEMA = {"tables": {"public.chocolate_sales": {}}}
+
+
+@pytest.fixture(params=COPIES)
+def package(request):
+    return request.param
+
+
+@pytest.fixture
+def intent_router(package):
+    return importlib.import_module(f"{package}.intent_router")
+
+
+@pytest.fixture
+def router(intent_router):
+    return intent_router.IntentRouter(values_loader=lambda: VALUES)
+
+
+def test_top_n_products(router):
+    routed = router.route("Top 5 products", SCHEMA)
+    assert routed.intent == "top_products"
+    assert routed.params == {"top_n": 5}
+    assert "LIMIT %(top_n)s" in routed.sql
+
+
+def test_default_top_n_uses_rollup(router):
+    routed = router.route("Who are the top sales people?", SCHEMA)
+    assert routed.intent == "top_sales_people"
+    assert routed.params == {"top_n": 10}
+    assert routed.rollup == "top_sales_people"
+
+
+def test_country_and_product_values(router):
+    routed = router.route("Total boxes shipped of 85% dark bars in new zealand", SCHEMA)
+    assert routed.intent == "total_boxes"
+    assert routed.params == {"country": "New Zealand", "product": "85% Dark Bars"}
+    assert "country = %(country)s" in routed.sql and "product = %(product)s" in routed.sql
+    assert routed.rollup is None
+
+
+def test_values_match_whole_words_only(router):
+    assert "country" not in router.extract_params("sales by country for ukraine")
+
+
+@pytest.mark.parametrize(
+    "question, date_from, date_to",
+    [
+        ("sales by product in march 2022", datetime.date(2022, 3, 1), datetime.date(2022, 4, 1)),
+        ("sales by product in dec 2021", datetime.date(2021, 12, 1), datetime.date(2022, 1, 1)),
+        ("sales by country q2 2022", datetime.date(2022, 4, 1), datetime.date(2022, 7, 1)),
+        ("sales by country q4 2022", datetime.date(2022, 10, 1), datetime.date(2023, 1, 1)),
+        ("total sales in 2021", datetime.date(2021, 1, 1), datetime.date(2022, 1, 1)),
+        ("what were 2022 sales by product", datetime.date(2022, 1, 1), datetime.date(2023, 1, 1)),
+        (
+            "total sales between 2022-01-05 and 2022-01-10",
+            datetime.date(2022, 1, 5),
+            datetime.date(2022, 1, 11),
+        ),
+    ],
+)
+def test_date_ranges(router, question, date_from, date_to):
+    params = router.extract_params(question)
+    assert (params["date_from"], params["date_to"]) == (date_from, date_to)
+
+
+@pytest.mark.parametrize(
+    "question, expected",
+    [
+        ("top 2000 sales people", {"top_n": 2000}),
+        ("top 1999 products", {"top_n": 1999}),
+        ("list 2000 rows of sales", {}),
+        ("2000 products by sales", {}),
+        (
+            "2000 boxes shipped in 2021",
+            {"date_from": datetime.date(2021, 1, 1), "date_to": datetime.date(2022, 1, 1)},
+        ),
+        (
+            "top 5 products in 2022",
+            {"top_n": 5, "date_from": datetime.date(2022, 1, 1), "date_to": datetime.date(2023, 1, 1)},
+        ),
+    ],
+)
+def test_counts_are_not_years(router, question, expected):
+    assert router.extract_params(question) == expected
+
+
+def test_unmatched_question(router):
+    assert router.route("why is the sky blue", SCHEMA) is None
+    assert router.stats()["unmatched"] == 1
+
+
+def test_failed_value_lookup_is_not_cached(intent_router):
+    results = [None, VALUES]
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return results[min(len(calls), len(results)) - 1]
+
+    router = intent_router.IntentRouter(values_loader=loader, values_ttl=300)
+    assert "country" not in router.extract_params("sales by country for uk")
+    assert router.extract_params("sales by country for uk")["country"] == "UK"
+    router.extract_params("sales by country for uk")
+    assert len(calls) == 2
+
+
+def test_disabled_router(intent_router):
+    router = intent_router.IntentRouter(values_loader=lambda: VALUES, enabled=False)
+    assert router.route("top 5 products", SCHEMA) is None
+
+
+@pytest.fixture
+def tools(package):
+    return importlib.import_module(f"{package}.sales_analysis_tools")
+
+
+@pytest.mark.parametrize(
+    "value, literal",
+    [
+        ("UK", "'UK'"),
+        ("O'Brien", "'O''Brien'"),
+        ("back\\slash", "E'back\\\\slash'"),
+        ("it's a \\ test", "E'it''s a \\\\ test'"),
+        (5, "5"),
+        (datetime.date(2022, 3, 1), "'2022-03-01'::date"),
+        (None, "NULL"),
+    ],
+)
+def test_sql_literal(tools, value, literal):
+    assert tools._sql_literal(value) == literal
+
+
+def test_bind_sql_output_is_one_readonly_statement(tools, package):
+    sql_parser = importlib.import_module(f"{package}.sql_parser")
+    template = "SELECT SUM(amount) FROM chocolate_sales WHERE country = %(country)s AND product = %(product)s;"
+    bound = tools._bind_sql(template, {"country": "x\\'; DELETE FROM chocolate_sales; --", "product": "a'b"})
+    assert bound == (
+        "SELECT SUM(amount) FROM chocolate_sales "
+        "WHERE country = E'x\\\\''; DELETE FROM chocolate_sales; --' AND product = 'a''b';"
+    )
+    analysis = sql_parser.analyze_sql(bound)
+    assert analysis.readonly
+    assert analysis.tables == ("chocolate_sales",)
+
+
+def test_bind_sql_without_params_is_unchanged(tools):
+    assert tools._bind_sql("SELECT 1;", {}) == "SELECT 1;"
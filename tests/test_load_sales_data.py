@@ -0,0 +1,48 @@
+import io
+
+import pytest
+
+from monitoring_agent import load_sales_data
+
+FIELDNAMES = ["Sales Person", "Country", "Product", "Date", "Amount", "Boxes Shipped"]
+GOOD = 'Jehu Rudeforth,UK,Mint Chip Choco,04/01/2022,"$5,320.00",180'
+
+
+class Rejects:
+    def __init__(self):
+        self.rows = []
+
+    def write(self, line_num, row, error):
+        self.rows.append((line_num, error, row))
+
+
+def parse(text, batch_size=1000):
+    rejects = Rejects()
+    chunks = load_sales_data.iter_columnar_chunks(io.StringIO(text), FIELDNAMES, batch_size, rejects, 1)
+    copied = sum(count for count, _ in chunks)
+    return copied, rejects.rows
+
+
+@pytest.mark.parametrize("batch_size", [1000, 7])
+def test_wide_lines_are_rejected_with_their_line_numbers(batch_size):
+    lines = [GOOD] * 5000
+    lines[10] = GOOD + ",extra"
+    lines[2000] = GOOD + ',"x,y",z'
+    lines[2001] = "Short,Line"
+    lines[4999] = GOOD + ",last"  # no trailing newline
+    copied, rejected = parse("\n".join(lines), batch_size)
+
+    assert copied == 4996
+    assert [(line_num, error) for line_num, error, _ in rejected] == [
+        (12, "expected 6 fields, saw 7"),
+        (2002, "expected 6 fields, saw 8"),
+        (2003, "expected 6 fields, saw 2"),
+        (5001, "expected 6 fields, saw 7"),
+    ]
+    assert rejected[0][2]["Amount"] == "$5,320.00"
+
+
+def test_quoted_commas_and_quotes_are_not_extra_fields():
+    text = '"Ann, ""Q"" Lee",UK,"Dark, 70%",04/01/2022,"$1,000.00",5\n' + GOOD + "\n"
+    copied, rejected = parse(text)
+    assert (copied, rejected) == (2, [])
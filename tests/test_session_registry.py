@@ -0,0 +1,120 @@
+import threading
+
+import pytest
+
+from monitoring_api import session_registry
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(session_registry.time, "monotonic", lambda: now[0])
+    return now
+
+
+def turn(registry, client_id, **options):
+    entry = registry.checkout(client_id, **options)
+    assert entry is not None
+    session_id = entry.session_id
+    registry.release(entry)
+    return session_id
+
+
+def test_same_session_until_max_turns(clock):
+    registry = session_registry.SessionRegistry(max_turns=3)
+    sessions = [turn(registry, "client-aaaa") for _ in range(4)]
+    assert sessions[0] == sessions[1] == sessions[2]
+    assert sessions[3] != sessions[0]
+    assert registry.stats()["rollovers"] == 1
+    assert registry.drain_retired() == [("web-client-aaaa", sessions[0])]
+    assert registry.drain_retired() == []
+
+
+def test_failed_turns_do_not_count(clock):
+    registry = session_registry.SessionRegistry(max_turns=1)
+    entry = registry.checkout("client-aaaa")
+    first = entry.session_id
+    registry.release(entry, completed=False)
+    assert turn(registry, "client-aaaa") == first
+
+
+def test_rollover_after_idle_timeout(clock):
+    registry = session_registry.SessionRegistry(idle_timeout=60)
+    first = turn(registry, "client-aaaa")
+    clock[0] += 59
+    assert turn(registry, "client-aaaa") == first
+    clock[0] += 61
+    second = turn(registry, "client-aaaa")
+    assert second != first
+    assert registry.drain_retired() == [("web-client-aaaa", first)]
+
+
+def test_new_session_on_request(clock):
+    registry = session_registry.SessionRegistry()
+    first = turn(registry, "client-aaaa")
+    assert turn(registry, "client-aaaa", new_session=True) != first
+
+
+def test_busy_client_is_rejected_after_busy_timeout():
+    registry = session_registry.SessionRegistry(busy_timeout=0.05)
+    entry = registry.checkout("client-aaaa")
+    results = []
+    thread = threading.Thread(target=lambda: results.append(registry.checkout("client-aaaa")))
+    thread.start()
+    thread.join(5)
+    assert results == [None]
+    assert registry.stats()["busy_rejections"] == 1
+    registry.release(entry)
+    assert registry.checkout("client-aaaa") is entry
+
+
+def test_waiting_request_gets_the_session_when_released():
+    registry = session_registry.SessionRegistry(busy_timeout=5)
+    entry = registry.checkout("client-aaaa")
+    results = []
+    thread = threading.Thread(target=lambda: results.append(registry.checkout("client-aaaa")))
+    thread.start()
+    registry.release(entry)
+    thread.join(5)
+    assert results == [entry]
+    assert entry.turns == 1
+
+
+def test_idle_clients_are_evicted(clock):
+    registry = session_registry.SessionRegistry(idle_timeout=60)
+    first = turn(registry, "client-aaaa")
+    clock[0] += 61
+    turn(registry, "client-bbbb")
+    stats = registry.stats()
+    assert stats["active_clients"] == 1 and stats["evictions"] == 1
+    assert registry.drain_retired() == [("web-client-aaaa", first)]
+
+
+def test_max_clients_evicts_least_recently_active(clock):
+    registry = session_registry.SessionRegistry(max_clients=2)
+    for client_id in ("client-aaaa", "client-bbbb", "client-cccc"):
+        turn(registry, client_id)
+        clock[0] += 1
+    turn(registry, "client-dddd")
+    assert registry.stats()["active_clients"] == 2
+    assert {user for user, _ in registry.drain_retired()} == {"web-client-aaaa", "web-client-bbbb"}
+
+
+def test_eviction_skips_clients_in_use(clock):
+    registry = session_registry.SessionRegistry(idle_timeout=60, max_clients=2)
+    busy = registry.checkout("client-aaaa")
+    turn(registry, "client-bbbb")
+    clock[0] += 61
+    turn(registry, "client-cccc")
+    # client-aaaa is idle and oldest but mid-turn; client-bbbb goes instead.
+    assert set(registry._clients) == {"client-aaaa", "client-cccc"}
+    registry.release(busy)
+    assert turn(registry, "client-aaaa") != ""
+    assert registry.stats()["evictions"] == 1
+
+
+def test_client_id_validation():
+    assert session_registry.valid_client_id(session_registry.new_client_id())
+    assert not session_registry.valid_client_id("short")
+    assert not session_registry.valid_client_id("../../etc/passwd-xxxx")
+    assert not session_registry.valid_client_id(None)
@@ -0,0 +1,136 @@
+import importlib
+
+import pytest
+
+COPIES = ["monitoring_agent.sql_parser", "monitoring_api.sql_parser", "postgres_agent.sql_parser"]
+
+
+@pytest.fixture(params=COPIES)
+def sql_parser(request):
+    return importlib.import_module(request.param)
+
+
+@pytest.mark.parametrize(
+    "sql",
+    [
+        # standard_conforming_strings: '\' is a complete literal, so DELETE is a second statement.
+        "SELECT '\\' ; DELETE FROM t; --'",
+        "SELECT '\\'; DELETE FROM chocolate_sales",
+        # In an E-string \' is an escaped quote; the literal ends after the stacked DELETE.
+        "SELECT E'\\'' ; DELETE FROM t",
+    ],
+)
+def test_backslash_does_not_hide_stacked_statements(sql_parser, sql):
+    analysis = sql_parser.analyze_sql(sql)
+    assert not analysis.readonly
+    assert analysis.reason == "multiple statements are not allowed"
+
+
+@pytest.mark.parametrize(
+    "sql",
+    [
+        "SELECT E'\\' ; DELETE FROM t; --'",
+        "SELECT e'it\\'s; drop table x' AS note",
+        "SELECT 'it''s; delete' AS note",
+        "SELECT '\\' AS backslash",
+    ],
+)
+def test_semicolons_inside_literals_are_data(sql_parser, sql):
+    assert sql_parser.analyze_sql(sql).readonly
+
+
+def test_string_value_unescapes_each_literal_form(sql_parser):
+    values = [
+        sql_parser.string_value(token)
+        for token in sql_parser.tokenize("SELECT '\\', 'a''b', E'a\\'b', $x$c'd$x$")
+        if token.kind in ("string", "dollar")
+    ]
+    assert values == ["\\", "a'b", "a'b", "c'd"]
+
+
+@pytest.mark.parametrize(
+    "sql",
+    [
+        'SELECT "pg_sleep"(10)',
+        'SELECT "PG_SLEEP"(10)',
+        'SELECT "pg_catalog"."pg_sleep"(10)',
+        'SELECT "pg_advisory_lock"(1)',
+        "SELECT \"set_config\"('search_path', 'public', false)",
+    ],
+)
+def test_quoted_function_names_are_checked(sql_parser, sql):
+    analysis = sql_parser.analyze_sql(sql)
+    assert not analysis.readonly
+    assert analysis.reason.startswith("function ")
+
+
+@pytest.mark.parametrize(
+    "sql",
+    [
+        "SELECT set_config('transaction_read_only', 'off', true)",
+        "SELECT \"set_config\"('default_transaction_read_only','off',false)",
+        "SELECT SET_CONFIG(E'DEFAULT_TRANSACTION_READ_ONLY', 'off', false)",
+        "SELECT set_config($$default_transaction_read_only$$, 'off', false)",
+    ],
+)
+def test_set_config_cannot_turn_off_read_only(sql_parser, sql):
+    analysis = sql_parser.analyze_sql(sql)
+    assert not analysis.readonly
+    assert analysis.reason == "set_config() cannot change transaction_read_only"
+
+
+def test_quoted_identifiers_are_still_columns(sql_parser):
+    analysis = sql_parser.analyze_sql('SELECT "country", "delete" FROM chocolate_sales')
+    assert analysis.readonly
+    assert analysis.columns == ("country", "delete")
+
+
+@pytest.mark.parametrize(
+    "sql, expected",
+    [
+        ("SELECT 1; -- done", "SELECT 1"),
+        ("  SELECT 1 -- note\n ;; /* end */\n", "SELECT 1"),
+        ("SELECT ';--' AS x -- tail", "SELECT ';--' AS x"),
+        ("SELECT 1 /* keep */ + 2", "SELECT 1 /* keep */ + 2"),
+    ],
+)
+def test_strip_statement_end(sql_parser, sql, expected):
+    assert sql_parser.strip_statement_end(sql) == expected
+
+
+@pytest.mark.parametrize(
+    "sql",
+    [
+        "SELECT comment, key, lock, set, release, security FROM tickets",
+        "SELECT t.do, t.analyze, t.into FROM t",
+        "SELECT update, delete, insert, merge FROM audit_log ORDER BY update DESC",
+        "SELECT lower(comment) AS comment, count(*) AS set FROM tickets GROUP BY 1",
+        "SELECT \"into\", \"do\" FROM t",
+        "SELECT substring(name FROM 1 FOR 3) FROM t",
+        "SELECT (update) FROM audit_log",
+    ],
+)
+def test_keywords_used_as_column_names_are_accepted(sql_parser, sql):
+    analysis = sql_parser.analyze_sql(sql)
+    assert analysis.readonly, analysis.reason
+
+
+@pytest.mark.parametrize(
+    "sql, reason",
+    [
+        ("WITH gone AS (DELETE FROM t RETURNING *) SELECT * FROM gone", "DELETE is not allowed in a read-only query"),
+        ("WITH x AS (SELECT 1) DELETE FROM t", "DELETE is not allowed in a read-only query"),
+        ("WITH x AS (SELECT 1) UPDATE t SET a = 1", "UPDATE is not allowed in a read-only query"),
+        ("WITH x AS (INSERT INTO t VALUES (1) RETURNING *) SELECT * FROM x", "INSERT is not allowed in a read-only query"),
+        ("SELECT * INTO new_table FROM t", "SELECT ... INTO is not allowed in a read-only query"),
+        ("SELECT * FROM t FOR UPDATE", "FOR UPDATE/SHARE row locks are not allowed"),
+        ("SELECT * FROM t FOR NO KEY UPDATE", "FOR UPDATE/SHARE row locks are not allowed"),
+        ("SELECT * FROM t FOR SHARE", "FOR UPDATE/SHARE row locks are not allowed"),
+        ("SELECT 1; SET transaction_read_only = off", "multiple statements are not allowed"),
+        ("SET transaction_read_only = off", "only SELECT/WITH statements are allowed"),
+    ],
+)
+def test_write_clauses_are_rejected(sql_parser, sql, reason):
+    analysis = sql_parser.analyze_sql(sql)
+    assert not analysis.readonly
+    assert analysis.reason == reason